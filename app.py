@@ -1,113 +1,127 @@
 import streamlit as st
+
+# Imported ahead of everything else so the first run in a process can time
+# the imports below (the "imports" stage of its cold start)
+from sfcrime import perf
+
 import pandas as pd
 import numpy as np
-import requests
-import plotly.express as px
-import plotly.graph_objects as go
-from statsmodels.tsa.statespace.sarimax import SARIMAX
 
-# Configuration for API call
-# Using a chunked approach for robustness on Streamlit Cloud
-LIMIT_PER_CHUNK = 50000
-MAX_TOTAL_ROWS = 250000
-BASE_URL = "https://data.sfgov.org/resource/wg3w-h783.json"
+from sfcrime import charts, colstore, daily, snapshot
+from sfcrime.binning import HEX_LEVELS
+from sfcrime.cube import CountCube
+from sfcrime.export import EXPORT_FORMATS, export_rows, figure_png, png_export_available
+from sfcrime.backtest import BacktestJob
+from sfcrime.filter_index import FilterIndex
+from sfcrime.forecast import (
+    AUTO_SUFFIX, MIN_MONTHS, ORDER, SEASONAL_ORDER, STEPS, BatchForecastJob,
+    batch_series, describe_orders, fit_sarimax, forecast_frame
+)
+from sfcrime.ingest import IngestError, MAX_WORKERS
+from sfcrime.model_store import series_fingerprint
+from sfcrime.order_selection import OrderSelectionJob
+from sfcrime.precompute import PATTERN_CHARTS, TREND_CHARTS, Artifacts, hexbin_name
+from sfcrime.refresh import RefreshScheduler, refresh
+from sfcrime.schema import WEEKDAYS, memory_report
 
 # --------------------------------------------------
 # Helper: Download Plotly figure as PNG
 # --------------------------------------------------
-def png_download_button(fig, filename: str, label: str):
-    """Creates a Streamlit download button for a Plotly PNG."""
-    # Since 'kaleido' is in requirements.txt, this should work without warning.
-    try:
-        img_bytes = fig.to_image(format="png", scale=2)
-        st.download_button(
-            label=label,
-            data=img_bytes,
-            file_name=filename,
-            mime="image/png"
-        )
-    except Exception:
+def png_download_button(fig, filename: str, label: str, stored=None):
+    """Creates a Streamlit download button for a Plotly PNG.
+
+    The image is rendered only when the button is clicked (deferred data),
+    so reruns never pay for kaleido. ``stored`` is the path of a PNG the
+    precompute already rendered, which is served as is.
+    """
+    if stored is None and not png_export_available():
         # Fail silently as we expect the user to install kaleido
-        pass
+        return
+    st.download_button(
+        label=label,
+        data=stored.read_bytes if stored is not None else lambda: figure_png(fig),
+        file_name=filename,
+        mime="image/png",
+        on_click="ignore"
+    )
 
 # --------------------------------------------------
-# Load and clean incident data (API Source)
+# Load incident data (published column store, refreshed in the background)
 # --------------------------------------------------
-# FIX: Using ttl=24*3600 (24 hours) to cache data and prevent NameError
-@st.cache_data(ttl=24*3600)
-def load_incidents() -> pd.DataFrame:
-    st.info(f"Fetching up to {MAX_TOTAL_ROWS:,} incidents from DataSF API (cached for 24 hours)...")
-    
-    all_chunks = []
-    select_cols = ",".join([
-        "incident_date", "incident_datetime", "analysis_neighborhood",
-        "incident_category", "incident_day_of_week", "latitude", "longitude"
-    ])
-    where_clause = (
-        "incident_date >= '2018-01-01T00:00:00.000' "
-        "AND incident_date <= '2025-12-31T23:59:59.999'"
-    )
+# cache_resource: every session shares one read-only, memory-mapped table
+@st.cache_resource(max_entries=2)
+def open_store(version: str) -> colstore.ColumnStore:
+    return colstore.ColumnStore(version)
+
+
+def load_incidents() -> colstore.ColumnStore | None:
+    """The store ``CURRENT`` points at; blocks only before the first publish."""
+    version = colstore.current_version()
+    if version is None:
+        # Concurrent first visitors wait on the same refresh (file lock)
+        # rather than each starting a fetch of their own
+        with st.spinner(
+            "Fetching 2018–2025 incidents from DataSF API "
+            f"({MAX_WORKERS} parallel month shards, saved to a local snapshot)..."
+        ):
+            version = refresh(blocking=True)
+    if version is None:
+        st.warning("Could not retrieve any data from the API.")
+        return None
+    return open_store(version)
 
-    offset = 0
-    while offset < MAX_TOTAL_ROWS:
-        params = {
-            "$select": select_cols,
-            "$where": where_clause,
-            "$limit": LIMIT_PER_CHUNK,
-            "$offset": offset
-        }
 
-        try:
-            r = requests.get(BASE_URL, params=params, timeout=60)
-            r.raise_for_status()
-            
-            chunk = pd.DataFrame(r.json())
-            if chunk.empty:
-                break
-
-            all_chunks.append(chunk)
-            offset += LIMIT_PER_CHUNK
-        except requests.exceptions.RequestException as e:
-            st.error(f"API request failed at offset {offset}. Details: {e}")
-            break
-        except Exception as e:
-            st.error(f"An unexpected error occurred while processing data: {e}")
-            break
-
-    if not all_chunks:
-        st.warning("Could not retrieve any data from the API.")
-        return pd.DataFrame()
+@st.cache_resource(max_entries=2, ttl=600)
+def load_artifacts(version: str) -> Artifacts | None:
+    # Rechecked every few minutes: the precompute may publish after the data
+    return Artifacts.open(version)
+
+
+@st.cache_resource(max_entries=2)
+def build_filter_index(_store: colstore.ColumnStore, version: str) -> FilterIndex:
+    # Keyed on the store version; the bitsets are mapped from the store
+    return _store.filter_index()
+
+
+@st.cache_resource(max_entries=2)
+def build_cube(_df: pd.DataFrame, version: str) -> CountCube:
+    return CountCube(_df)
+
 
-    df = pd.concat(all_chunks, ignore_index=True)
-    st.success(f"Successfully loaded {len(df):,} total incidents.")
+@st.cache_resource(max_entries=2)
+def build_daily(_store: colstore.ColumnStore, version: str) -> daily.DailyCounts:
+    # Published and updated by the refresh; mapped from disk. Versions
+    # published before the daily store existed are counted once here
+    return daily.publish_update(version, None, None, frame=lambda: _store.frame)
 
-    # Rename columns to convention
-    df = df.rename(columns={
-        "incident_date": "date",
-        "incident_datetime": "incident_datetime",
-        "analysis_neighborhood": "neighborhood",
-        "incident_category": "category",
-        "incident_day_of_week": "weekday",
-    })
 
-    # Convert types
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df["incident_datetime"] = pd.to_datetime(df["incident_datetime"], errors="coerce")
-    df["latitude"] = pd.to_numeric(df["latitude"], errors="coerce")
-    df["longitude"] = pd.to_numeric(df["longitude"], errors="coerce")
+def warm_caches(version: str):
+    """Open a newly published version and build its per-process structures.
 
-    # Drop missing essentials
-    df = df.dropna(subset=["date", "neighborhood", "category"])
+    Called from the refresh thread, so the first rerun on the new version
+    finds everything cached.
+    """
+    store = open_store(version)
+    build_filter_index(store, version)
+    build_cube(store.frame, version)
+    build_daily(store, version)
 
-    # Derived fields
-    df["year"] = df["date"].dt.year
-    df["month"] = df["date"].dt.to_period("M").dt.to_timestamp()
-    df["hour"] = df["incident_datetime"].dt.hour
 
-    # Focus range (Project Scope)
-    df = df[(df["year"] >= 2018) & (df["year"] <= 2025)].copy()
+@st.cache_resource
+def start_refresh_scheduler() -> RefreshScheduler:
+    return RefreshScheduler(on_publish=warm_caches).start()
 
-    return df
+
+@st.cache_data(ttl=24*3600)
+def dataset_memory_report(_df: pd.DataFrame, version: str) -> pd.DataFrame:
+    report = memory_report(_df)
+    report[["bytes", "uncompacted_bytes"]] = report[["bytes", "uncompacted_bytes"]] / 2**20
+    return report.rename(columns={"bytes": "MiB", "uncompacted_bytes": "MiB (object dtypes)"})
+
+# --------------------------------------------------
+# Rerun timing (see the "Performance" expander in the sidebar)
+# --------------------------------------------------
+run_timer = perf.RerunTimer(profile=st.session_state.pop("profile_rerun", False)).start()
 
 # --------------------------------------------------
 # Page config and Custom CSS (for tab coloring)
@@ -157,11 +171,25 @@ st.markdown(
     "Filters update all charts instantly."
 )
 
-# Load the data
-df = load_incidents()
-if df.empty:
+# Load the data; refreshes happen on a background thread (sfcrime/refresh.py)
+scheduler = start_refresh_scheduler()
+try:
+    with perf.stage("load_incidents") as stage:
+        store = load_incidents()
+except IngestError as e:
+    st.error(f"API request failed after retries. Details: {e}")
+    st.stop()
+if store is None:
     st.stop()
 
+df = store.frame
+stage.rows = len(df)
+data_version = store.version
+with perf.stage("build_filter_index", rows=len(df)):
+    filter_index = build_filter_index(store, data_version)
+with perf.stage("build_cube", rows=len(df)):
+    cube = build_cube(df, data_version)
+
 # --------------------------------------------------
 # Sidebar filters
 # --------------------------------------------------
@@ -192,10 +220,7 @@ selected_categories = st.sidebar.multiselect(
     default=categories[:10]
 )
 
-weekday_order = [
-    "Monday", "Tuesday", "Wednesday", "Thursday",
-    "Friday", "Saturday", "Sunday"
-]
+weekday_order = WEEKDAYS
 selected_weekdays = st.sidebar.multiselect(
     "Weekdays",
     options=weekday_order,
@@ -213,386 +238,681 @@ hour_range = st.sidebar.slider(
 # --------------------------------------------------
 # Apply filters
 # --------------------------------------------------
-mask = (
-    (df["year"] >= year_range[0]) &
-    (df["year"] <= year_range[1]) &
-    (df["neighborhood"].isin(selected_nbhds)) &
-    (df["category"].isin(selected_categories)) &
-    (df["weekday"].isin(selected_weekdays)) &
-    (df["hour"].between(hour_range[0], hour_range[1], inclusive="both"))
-)
-
-df_filt = df[mask].copy()
+with perf.stage("filter_index.select") as stage:
+    rows = filter_index.select(
+        years=year_range,
+        neighborhoods=selected_nbhds,
+        categories=selected_categories,
+        weekdays=selected_weekdays,
+        hours=hour_range,
+    )
+    stage.rows = len(rows)
+
+# Chart and metric aggregates come from the count cube, not raw rows
+with perf.stage("cube.select"):
+    view = cube.select(
+        years=year_range,
+        neighborhoods=selected_nbhds,
+        categories=selected_categories,
+        weekdays=selected_weekdays,
+        hours=hour_range,
+    )
+    n_filt = view.total()
 
+synced_at = (snapshot.read_manifest() or {}).get("synced_at", "unknown")
 st.caption(
-    f"Filtered incidents: **{len(df_filt):,}** out of {len(df):,} total (API data)."
+    f"Filtered incidents: **{n_filt:,}** out of {len(df):,} total "
+    f"(API data, synced {synced_at})."
 )
+if scheduler.last_error:
+    st.warning(
+        "The latest background refresh from DataSF failed; showing the last "
+        f"good dataset. Details: {scheduler.last_error}"
+    )
 
 # --------------------------------------------------
-# Download filtered CSV
+# Download filtered data (written only when clicked)
 # --------------------------------------------------
 st.sidebar.markdown("---")
+export_format = st.sidebar.selectbox("Export format", list(EXPORT_FORMATS))
+export_ext, export_mime = EXPORT_FORMATS[export_format]
+
+
+def filtered_export() -> bytes:
+    # Runs on click; the spooled file is read once into Streamlit's media store
+    with export_rows(df, rows, export_format) as f:
+        return f.read()
+
+
 st.sidebar.download_button(
-    label="Download filtered CSV",
-    data=df_filt.to_csv(index=False).encode("utf-8"),
-    file_name="sf_crime_filtered.csv",
-    mime="text/csv"
+    label=f"Download filtered {export_format}",
+    data=filtered_export,
+    file_name=f"sf_crime_filtered.{export_ext}",
+    mime=export_mime,
+    on_click="ignore"
 )
 
+with st.sidebar.expander("Dataset memory footprint"):
+    st.dataframe(dataset_memory_report(df, data_version), hide_index=True)
+    st.caption(
+        f"Memory-mapped from a {store.nbytes / 2**20:,.1f} MiB column store "
+        "shared by every session and worker process."
+    )
+
 # --------------------------------------------------
 # Summary metrics row
 # --------------------------------------------------
 col1, col2, col3 = st.columns(3)
 
 with col1:
-    st.metric("Total incidents (filtered)", f"{len(df_filt):,}")
+    st.metric("Total incidents (filtered)", f"{n_filt:,}")
 
 with col2:
-    if len(df_filt) > 0:
-        span_days = (df_filt["date"].max() - df_filt["date"].min()).days + 1
-        avg_per_day = len(df_filt) / max(span_days, 1)
+    if n_filt > 0:
+        span_days = view.span_days()
+        avg_per_day = n_filt / max(span_days, 1)
         st.metric("Average per day", f"{avg_per_day:,.1f}")
     else:
         st.metric("Average per day", "0")
 
 with col3:
-    st.metric("Neighborhoods in view", df_filt["neighborhood"].nunique())
+    st.metric("Neighborhoods in view", view.n_distinct("neighborhood"))
 
 st.markdown("---")
 
+# --------------------------------------------------
+# Per-tab figures, cached per dataset version and filter state
+# --------------------------------------------------
+# Shared by all sessions; a rerun that leaves the filters alone (another
+# widget, a tab switch, a fragment) redraws cached figures without
+# aggregating or building anything
+filter_state = (
+    year_range, tuple(selected_nbhds), tuple(selected_categories),
+    tuple(selected_weekdays), hour_range,
+)
+
+
+# Figures the nightly precompute (sfcrime/precompute.py) rendered for this
+# exact filter state are read back instead of being built
+artifacts = load_artifacts(data_version)
+preset = artifacts.preset(*filter_state) if artifacts else None
+
+
+def stored_png(name: str):
+    return artifacts.png_path(preset, name) if preset else None
+
+
+@st.cache_resource(max_entries=32)
+def trend_figures(version: str, filters: tuple, _view) -> dict:
+    stored = artifacts.figures(preset, TREND_CHARTS) if preset else None
+    return stored or charts.trend_figures(_view)
+
+
+@st.cache_resource(max_entries=32)
+def pattern_figures(version: str, filters: tuple, _view) -> dict:
+    stored = artifacts.figures(preset, PATTERN_CHARTS) if preset else None
+    return stored or charts.pattern_figures(_view)
+
+
+@st.cache_resource(max_entries=32)
+def hexbin_figure(version: str, filters: tuple, hex_size: float, _rows: np.ndarray) -> tuple:
+    name = hexbin_name(hex_size)
+    stored = artifacts.figures(preset, [name]) if preset else None
+    if stored:
+        return stored[name], preset["figures"][name]["cells"]
+    return charts.hexbin_figure(
+        df["latitude"].to_numpy()[_rows],
+        df["longitude"].to_numpy()[_rows],
+        hex_size
+    )
+
+
+@st.cache_resource(max_entries=32)
+def neighborhood_figure(version: str, filters: tuple, _view):
+    stored = artifacts.figures(preset, ["neighborhood_choropleth"]) if preset else None
+    return stored["neighborhood_choropleth"] if stored else charts.neighborhood_figure(_view)
+
 # --------------------------------------------------
 # Tabs
 # --------------------------------------------------
-tab1, tab2, tab3, tab4 = st.tabs([
+# Only the open tab's body runs: switching tabs reruns the script, and the
+# other tabs' aggregations, figures and models are skipped entirely
+tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
     "Trends and Rankings",
     "Hour and Weekday Patterns",
+    "Spatial Density Map",
     "Forecast (2026 Outlook)",
+    "Rolling Windows and Anomalies",
     "About SF and Analysis Zones"
-])
+], key="tab", on_change="rerun")
 
 # ==================================================
 # TAB 1: Trends and Rankings
 # ==================================================
-with tab1:
-    left, right = st.columns((2, 1.3))
-
-    with left:
-        st.subheader("Monthly Incident Trend")
-        if len(df_filt) > 0:
-            monthly = (
-                df_filt.groupby("month")
-                .size()
-                .reset_index(name="incidents")
-                .sort_values("month")
-            )
+if tab1.open:
+    with tab1:
+        figs = trend_figures(data_version, filter_state, view) if n_filt > 0 else {}
+        left, right = st.columns((2, 1.3))
+
+        with left:
+            st.subheader("Monthly Incident Trend")
+            if n_filt > 0:
+                st.plotly_chart(figs["monthly_trend"], use_container_width=True)
+                png_download_button(figs["monthly_trend"], "monthly_trend.png",
+                                    "Download Monthly Trend (PNG)", stored_png("monthly_trend"))
+            else:
+                st.info("No data for current filters.")
+
+        with right:
+            st.subheader("Top Neighborhoods")
+            if n_filt > 0:
+                st.plotly_chart(figs["top_neighborhoods"], use_container_width=True)
+                png_download_button(figs["top_neighborhoods"], "top_neighborhoods.png",
+                                    "Download Top Neighborhoods (PNG)", stored_png("top_neighborhoods"))
+            else:
+                st.info("No neighborhood counts to display.")
+
+        st.subheader("Top Categories")
+        if n_filt > 0:
+            st.plotly_chart(figs["top_categories"], use_container_width=True)
+            png_download_button(figs["top_categories"], "top_categories.png",
+                                "Download Top Categories (PNG)", stored_png("top_categories"))
+        else:
+            st.info("No category counts to display.")
 
-            fig_ts = px.line(
-                monthly,
-                x="month",
-                y="incidents",
-                markers=True,
-                labels={"month": "Month", "incidents": "Incidents"}
-            )
-            fig_ts.update_layout(height=350)
-            st.plotly_chart(fig_ts, use_container_width=True)
-            png_download_button(fig_ts, "monthly_trend.png", "Download Monthly Trend (PNG)")
+# ==================================================
+# TAB 2: Hour and Weekday Patterns
+# ==================================================
+if tab2.open:
+    with tab2:
+        figs = pattern_figures(data_version, filter_state, view) if n_filt > 0 else {}
+        st.subheader("Incident Intensity by Hour and Weekday")
+        if n_filt > 0:
+            st.plotly_chart(figs["hour_weekday_heatmap"], use_container_width=True)
+            png_download_button(figs["hour_weekday_heatmap"], "hour_weekday_heatmap.png",
+                                "Download Heatmap (PNG)", stored_png("hour_weekday_heatmap"))
         else:
-            st.info("No data for current filters.")
+            st.info("No data for heatmap under current filters.")
 
-    with right:
-        st.subheader("Top Neighborhoods")
-        if len(df_filt) > 0:
-            top_nbh = (
-                df_filt["neighborhood"]
-                .value_counts()
-                .head(10)
-                .reset_index()
-            )
-            top_nbh.columns = ["neighborhood", "incidents"]
-
-            fig_bar = px.bar(
-                top_nbh,
-                x="incidents",
-                y="neighborhood",
-                orientation="h",
-                labels={"incidents": "Incidents", "neighborhood": ""},
-                color="incidents",
-                color_continuous_scale="Viridis",
-                text_auto=".2s"
-            )
-            fig_bar.update_layout(height=350, yaxis={"categoryorder": "total ascending"})
-            st.plotly_chart(fig_bar, use_container_width=True)
-            png_download_button(fig_bar, "top_neighborhoods.png", "Download Top Neighborhoods (PNG)")
+        st.markdown("---")
+        left, right = st.columns(2)
+
+        with left:
+            st.subheader("Hourly Pattern")
+            if n_filt > 0:
+                st.plotly_chart(figs["hourly_pattern"], use_container_width=True)
+                png_download_button(figs["hourly_pattern"], "hourly_pattern.png",
+                                    "Download Hourly Pattern (PNG)", stored_png("hourly_pattern"))
+
+        with right:
+            st.subheader("Weekday Pattern")
+            if n_filt > 0:
+                st.plotly_chart(figs["weekday_pattern"], use_container_width=True)
+                png_download_button(figs["weekday_pattern"], "weekday_pattern.png",
+                                    "Download Weekday Pattern (PNG)", stored_png("weekday_pattern"))
+
+# ==================================================
+# TAB 3: Spatial Density Map
+# ==================================================
+if tab3.open:
+    with tab3:
+        st.subheader("Incident Density (Hexagonal Bins)")
+        if n_filt > 0:
+            level = st.radio("Cell size", list(HEX_LEVELS), index=1, horizontal=True)
+            fig_hex, n_cells = hexbin_figure(data_version, filter_state, HEX_LEVELS[level], rows)
+            st.plotly_chart(fig_hex, use_container_width=True)
+            st.caption(f"{n_cells:,} cells drawn for {n_filt:,} incidents.")
+            png_download_button(fig_hex, "spatial_density_hexbin.png", "Download Density Map (PNG)",
+                                stored_png(hexbin_name(HEX_LEVELS[level])))
+
+            st.subheader("Incidents by Analysis Neighborhood")
+            fig_choro = neighborhood_figure(data_version, filter_state, view)
+            st.plotly_chart(fig_choro, use_container_width=True)
+            png_download_button(fig_choro, "neighborhood_choropleth.png", "Download Choropleth (PNG)",
+                                stored_png("neighborhood_choropleth"))
         else:
-            st.info("No neighborhood counts to display.")
-
-    st.subheader("Top Categories")
-    if len(df_filt) > 0:
-        top_cat = (
-            df_filt["category"]
-            .value_counts()
-            .head(10)
-            .reset_index()
-        )
-        top_cat.columns = ["category", "incidents"]
-
-        fig_cat = px.bar(
-            top_cat,
-            x="category",
-            y="incidents",
-            labels={"category": "Category", "incidents": "Incidents"},
-            color="incidents",
-            color_continuous_scale="Plasma",
-            text_auto=".2s"
-        )
-        st.plotly_chart(fig_cat, use_container_width=True)
-        png_download_button(fig_cat, "top_categories.png", "Download Top Categories (PNG)")
-    else:
-        st.info("No category counts to display.")
+            st.info("No data for the map under current filters.")
 
 # ==================================================
-# TAB 2: Hour and Weekday Patterns
+# TAB 4: Forecast (2026 Outlook)
 # ==================================================
-with tab2:
-    st.subheader("Incident Intensity by Hour and Weekday")
-    if len(df_filt) > 0:
-        heat = (
-            df_filt.groupby(["weekday", "hour"])
-            .size()
-            .reset_index(name="incidents")
-        )
+@st.cache_resource(max_entries=64)
+def cached_forecast_figure(key: tuple, title: str, _history: pd.Series, _forecast_df: pd.DataFrame):
+    # ``key`` identifies the data and model behind the figure
+    return charts.forecast_figure(_history, _forecast_df, title)
+
+
+@st.cache_resource(max_entries=2)
+def start_batch_forecast(_cube: CountCube, version: str, auto_orders: bool) -> BatchForecastJob:
+    # One background batch per dataset version and mode, shared by all
+    # sessions, unless the precompute already ran it for this version
+    stored = load_artifacts(version)
+    stored = stored.batch_forecast(auto_orders) if stored else None
+    if stored is not None:
+        return BatchForecastJob.completed(*stored, auto_orders=auto_orders)
+    return BatchForecastJob(batch_series(_cube), auto_orders=auto_orders)
+
+
+@st.fragment(run_every=5)
+def batch_forecast_progress(job: BatchForecastJob):
+    # Polls without blocking; hands over to the full panel once finished
+    if job.finished:
+        st.rerun()
+    st.progress(
+        job.done / max(job.total, 1),
+        text=f"Fitting neighborhood and category models in the background ({job.done}/{job.total})..."
+    )
 
-        heat["weekday"] = pd.Categorical(
-            heat["weekday"], categories=weekday_order, ordered=True
-        )
-        heat = heat.sort_values(["weekday", "hour"], ascending=[False, True])
-
-        fig_heat = px.density_heatmap(
-            heat,
-            x="hour",
-            y="weekday",
-            z="incidents",
-            nbinsx=24,
-            labels={"hour": "Hour", "weekday": "Weekday", "z": "Incidents"},
-            color_continuous_scale="Reds"
-        )
-        fig_heat.update_layout(height=450)
-        st.plotly_chart(fig_heat, use_container_width=True)
-        png_download_button(fig_heat, "hour_weekday_heatmap.png", "Download Heatmap (PNG)")
-    else:
-        st.info("No data for heatmap under current filters.")
 
-    st.markdown("---")
-    left, right = st.columns(2)
+@st.fragment
+def batch_forecast_panel(job: BatchForecastJob):
+    if job.error is not None:
+        st.error(f"Batch forecasting failed: {job.error}")
+        return
+
+    ok = (job.status["status"] == "ok").sum()
+    st.caption(f"{ok} of {len(job.status)} series fitted.")
+    if job.forecasts.empty:
+        return
 
+    left, right = st.columns((1, 2))
     with left:
-        st.subheader("Hourly Pattern")
-        if len(df_filt) > 0:
-            hourly = df_filt["hour"].value_counts().sort_index().reset_index()
-            hourly.columns = ["hour", "incidents"]
+        kind = st.radio("Series type", ["Neighborhood", "Category"], horizontal=True)
+    names = sorted(job.forecasts.loc[job.forecasts["kind"] == kind, "name"].unique())
+    with right:
+        name = st.selectbox(kind, names)
+    if name is None:
+        return
+
+    history = cube.select(
+        neighborhoods=[name] if kind == "Neighborhood" else None,
+        categories=[name] if kind == "Category" else None,
+    ).counts_by("month")
+    fc = job.forecasts[(job.forecasts["kind"] == kind) & (job.forecasts["name"] == name)]
+    st.plotly_chart(
+        cached_forecast_figure(
+            (data_version, job.auto_orders, kind, name),
+            f"{name}: Monthly Incidents and 6-Month Forecast", history, fc
+        ),
+        use_container_width=True
+    )
+    st.dataframe(
+        fc[["month", "forecast", "lower", "upper"]].round({"forecast": 1, "lower": 1, "upper": 1}),
+        hide_index=True
+    )
+    model = job.status.loc[(job.status["kind"] == kind) & (job.status["name"] == name), "model"]
+    if len(model) and model.iloc[0]:
+        st.caption(f"Model: {model.iloc[0]}")
+
+    failed = job.status[job.status["status"] != "ok"]
+    if len(failed):
+        with st.expander(f"{len(failed)} series without a forecast"):
+            st.dataframe(failed, hide_index=True)
+
+
+@st.cache_resource(max_entries=8)
+def start_backtest(series_id: str, data_key: str, _ts: pd.Series) -> BacktestJob:
+    # One background backtest per series and data, shared by all sessions;
+    # finished folds are cached on disk (sfcrime/backtest.py)
+    return BacktestJob(_ts)
+
+
+@st.fragment(run_every=5)
+def backtest_progress(job: BacktestJob):
+    if job.finished:
+        st.rerun()
+    st.progress(
+        job.done / max(job.total, 1),
+        text=f"Backtesting on rolling origins in the background ({job.done}/{job.total} folds)..."
+    )
 
-            fig_hour = px.line(hourly, x="hour", y="incidents", markers=True)
-            st.plotly_chart(fig_hour, use_container_width=True)
-            png_download_button(fig_hour, "hourly_pattern.png", "Download Hourly Pattern (PNG)")
 
-    with right:
-        st.subheader("Weekday Pattern")
-        if len(df_filt) > 0:
-            wk = df_filt["weekday"].value_counts().reindex(weekday_order).reset_index()
-            wk.columns = ["weekday", "incidents"]
+@st.cache_resource(max_entries=2)
+def backtest_series(_cube: CountCube, version: str) -> dict:
+    series = {"Citywide": _cube.select().counts_by("month")}
+    series.update({f"{kind}: {name}": ts for (kind, name), ts in batch_series(_cube).items()})
+    return series
 
-            fig_wk = px.bar(wk, x="weekday", y="incidents", text_auto=True)
-            st.plotly_chart(fig_wk, use_container_width=True)
-            png_download_button(fig_wk, "weekday_pattern.png", "Download Weekday Pattern (PNG)")
 
-# ==================================================
-# TAB 3: Forecast (2026 Outlook)
-# ==================================================
-with tab3:
-    st.subheader("Citywide Monthly Forecast (2026 Outlook)")
+@st.cache_resource(max_entries=4)
+def start_order_selection(series_id: str, data_key: str, _ts: pd.Series) -> OrderSelectionJob:
+    # One background search per series and data, shared by all sessions;
+    # the chosen orders are kept in the model store (sfcrime/order_selection.py)
+    return OrderSelectionJob(_ts, series_id=series_id)
 
-    # Added check for sufficient data length to prevent statsmodels ValueError
-    ts_city_full = df.groupby("month").size()
-    ts_city_full.index = pd.to_datetime(ts_city_full.index)
 
-    if len(ts_city_full) < 24:
-        st.warning("Not enough historical data (24+ months) to perform a reliable Seasonal ARIMA forecast.")
-    else:
-        @st.cache_data(ttl=24*3600)
-        def fit_forecast(ts: pd.Series):
-            try:
-                model = SARIMAX(
-                    ts,
-                    order=(1, 1, 1),
-                    seasonal_order=(1, 1, 1, 12),
-                    enforce_stationarity=False,
-                    enforce_invertibility=False
-                )
-                return model.fit(disp=False)
-            except Exception as e:
-                st.error(f"Error fitting SARIMAX model: {e}")
-                return None
-        
-        results = fit_forecast(ts_city_full)
-
-        if results:
-            steps = 6
-            pred = results.get_forecast(steps=steps)
-            ci = pred.conf_int()
-
-            forecast_index = pd.date_range(
-                ts_city_full.index[-1] + pd.offsets.MonthBegin(1),
-                periods=steps,
-                freq="MS"
-            )
+@st.fragment(run_every=5)
+def order_selection_progress(job: OrderSelectionJob):
+    if job.finished:
+        st.rerun()
+    st.info(
+        "Selecting SARIMAX orders in the background; the forecast below uses the fixed "
+        f"{describe_orders(ORDER, SEASONAL_ORDER)} until the search finishes."
+    )
 
-            forecast_df = pd.DataFrame({
-                "month": forecast_index,
-                "forecast": pred.predicted_mean.values,
-                "lower": ci.iloc[:, 0].values,
-                "upper": ci.iloc[:, 1].values
-            })
-
-            historical_df = ts_city_full.reset_index(name="incidents")
-            historical_df.columns = ["month", "incidents"]
-
-            fig_fc = px.line(
-                historical_df,
-                x="month",
-                y="incidents",
-                markers=True,
-                title="Historical Incidents (2018–2025) and 6-Month Forecast"
-            )
 
-            # Add Forecast line
-            fig_fc.add_trace(
-                go.Scatter(
-                    x=forecast_df["month"],
-                    y=forecast_df["forecast"],
-                    mode="lines+markers",
-                    name="Forecast",
-                    line=dict(color="#d62728", dash="dash") # Red
+@st.fragment
+def backtest_panel():
+    series = backtest_series(cube, data_version)
+    choice = st.selectbox("Series to backtest", list(series))
+    ts = series[choice]
+
+    job = start_backtest(choice, series_fingerprint(ts), ts)
+    if not job.finished:
+        backtest_progress(job)
+        return
+    if job.error is not None:
+        st.error(f"Backtest failed: {job.error}")
+        return
+    if job.folds.empty:
+        st.info(f"Not enough history to backtest {choice} (needs {MIN_MONTHS + STEPS}+ months).")
+        return
+
+    cutoffs = job.folds["cutoff"]
+    st.caption(
+        f"{cutoffs.nunique()} rolling origins from {cutoffs.min():%b %Y} to {cutoffs.max():%b %Y}, "
+        f"each scored on the following {STEPS} months. MASE below 1 beats repeating last year; "
+        "coverage is the share of actual months inside the 95% interval."
+    )
+    st.dataframe(
+        job.summary.round({"MAPE %": 2, "MASE": 3, "coverage %": 1,
+                           "fit CPU s/fold": 3, "total fit CPU s": 2}),
+        hide_index=True
+    )
+
+
+if tab4.open:
+    with tab4:
+        st.subheader("Citywide Monthly Forecast (2026 Outlook)")
+
+        # Added check for sufficient data length to prevent statsmodels ValueError
+        ts_city_full = cube.select().counts_by("month")
+        auto_orders = st.toggle(
+            "Select SARIMAX orders automatically",
+            help="Search a (p,d,q)(P,D,Q,12) grid per series instead of the fixed "
+                 f"{describe_orders(ORDER, SEASONAL_ORDER)}. Choices are remembered until the data changes materially."
+        )
+
+        if len(ts_city_full) < MIN_MONTHS:
+            st.warning("Not enough historical data (24+ months) to perform a reliable Seasonal ARIMA forecast.")
+        else:
+            # Keyed by data fingerprint instead of hashing the series; fitted
+            # parameters persist on disk (sfcrime/model_store.py)
+            @st.cache_resource(max_entries=4)
+            def fit_forecast(series_id: str, data_key: str, orders: tuple, _ts: pd.Series):
+                try:
+                    with perf.stage("sarimax.fit", rows=len(_ts)):
+                        return fit_sarimax(_ts, *orders, series_id=series_id)
+                except Exception as e:
+                    st.error(f"Error fitting SARIMAX model: {e}")
+                    return None
+
+            data_key = series_fingerprint(ts_city_full)
+            stored = artifacts.citywide_forecast(auto_orders) if artifacts else None
+            selection_job = None
+            if stored is not None:
+                # Precomputed for this dataset version: nothing to fit
+                forecast_df, entry = stored
+                model_caption = f"Model: {entry['model']}, AIC {entry['aic']:,.1f}."
+                forecast_png = artifacts.path / entry["png"] if entry["png"] else None
+                forecast_key = ("citywide", data_key, auto_orders)
+            else:
+                # The grid search runs in the background; until it is done the
+                # fixed orders are fitted and shown
+                series_id, orders = "citywide", (ORDER, SEASONAL_ORDER)
+                if auto_orders:
+                    selection_job = start_order_selection("citywide", data_key, ts_city_full)
+                    if selection_job.finished and selection_job.error is None:
+                        selection = selection_job.selection
+                        series_id += AUTO_SUFFIX
+                        orders = (selection["order"], selection["seasonal_order"])
+                results = fit_forecast(series_id, data_key, orders, ts_city_full)
+                forecast_df = forecast_frame(results, ts_city_full.index[-1], STEPS) if results else None
+                model_caption = f"Model: {describe_orders(*orders)}, AIC {results.aic:,.1f}." if results else None
+                forecast_png = None
+                forecast_key = ("citywide", data_key, orders)
+
+            if selection_job is not None and not selection_job.finished:
+                order_selection_progress(selection_job)
+            elif selection_job is not None and selection_job.error is not None:
+                st.warning(f"Automatic order selection failed, showing the fixed orders: {selection_job.error}")
+
+            if forecast_df is not None:
+                fig_fc = cached_forecast_figure(
+                    forecast_key,
+                    "Historical Incidents (2018–2025) and 6-Month Forecast",
+                    ts_city_full, forecast_df
                 )
-            )
-            # Add Confidence Interval bounds
-            fig_fc.add_trace(
-                go.Scatter(
-                    x=forecast_df["month"],
-                    y=forecast_df["lower"],
-                    mode="lines",
-                    line=dict(width=0),
-                    showlegend=False
+                st.plotly_chart(fig_fc, use_container_width=True)
+                png_download_button(fig_fc, "forecast_2026.png", "Download Forecast Plot (PNG)", forecast_png)
+
+                st.markdown(
+                    "This forecast is a baseline Seasonal ARIMA model fit on citywide monthly totals. "
+                    "It is intended as a short-term planning aid, not a causal prediction."
                 )
+                st.caption(model_caption)
+
+        st.markdown("---")
+        st.subheader("Backtest: SARIMAX vs. Cheap Baselines")
+        backtest_panel()
+
+        st.markdown("---")
+        st.subheader("Neighborhood and Category Outlook")
+        batch_job = start_batch_forecast(cube, data_version, auto_orders)
+        if batch_job.finished:
+            batch_forecast_panel(batch_job)
+        else:
+            batch_forecast_progress(batch_job)
+
+# ==================================================
+# TAB 5: Rolling Windows and Anomalies
+# ==================================================
+# Backed by the daily prefix-sum store (sfcrime/daily.py): every window
+# below is a difference of two stored rows, never a scan of incidents
+@st.cache_resource(max_entries=32)
+def rolling_panel(version: str, filters: tuple, window: int, _daily: daily.DailyCounts) -> dict:
+    years, nbhds, cats = filters
+    as_of = min(pd.Timestamp(f"{years[1]}-12-31"), _daily.days[_daily.last_day])
+    with perf.stage("daily.rolling"):
+        rolling = _daily.rolling(window, nbhds, cats)
+        year_ago = rolling.shift(daily.YOY_DAYS, freq="D")
+        shown = slice(pd.Timestamp(f"{years[0]}-01-01"), as_of)
+        rolling, year_ago = rolling.loc[shown], year_ago.loc[shown]
+
+    with perf.stage("daily.window_sum"):
+        start = as_of - pd.Timedelta(days=window - 1)
+        shift = pd.Timedelta(days=daily.YOY_DAYS)
+        current = _daily.window_sum(start, as_of, nbhds, cats)
+        previous = _daily.window_sum(start - shift, as_of - shift, nbhds, cats)
+
+    with perf.stage("daily.anomalies"):
+        anomalies = {
+            by: _daily.anomalies(by, window, as_of, nbhds, cats)
+            for by in ("neighborhood", "category")
+        }
+    return {
+        "figure": charts.rolling_figure(rolling, year_ago, window),
+        "as_of": as_of,
+        "current": current,
+        "previous": previous,
+        "anomalies": anomalies,
+    }
+
+
+def anomaly_table(frame: pd.DataFrame, by: str):
+    st.dataframe(
+        frame[[by, "incidents", "year_ago", "yoy", "baseline", "z", "anomaly"]],
+        column_config={
+            by: by.capitalize(),
+            "incidents": st.column_config.NumberColumn("Incidents", format="%d"),
+            "year_ago": st.column_config.NumberColumn("A year earlier", format="%d"),
+            "yoy": st.column_config.NumberColumn("YoY", format="percent"),
+            "baseline": st.column_config.NumberColumn("Baseline", format="%.1f"),
+            "z": st.column_config.NumberColumn("z", format="%.2f"),
+            "anomaly": "Flag",
+        },
+        hide_index=True,
+        height=400
+    )
+
+
+if tab5.open:
+    with tab5:
+        with perf.stage("build_daily"):
+            daily_counts = build_daily(store, data_version)
+        if daily_counts.last_day < 0 or n_filt == 0:
+            st.info("No data for current filters.")
+        else:
+            window = st.radio(
+                "Window",
+                daily.WINDOWS,
+                format_func=lambda w: f"{w} days",
+                horizontal=True,
+                key="rolling_window"
             )
-            fig_fc.add_trace(
-                go.Scatter(
-                    x=forecast_df["month"],
-                    y=forecast_df["upper"],
-                    mode="lines",
-                    line=dict(width=0),
-                    fill="tonexty",
-                    fillcolor="rgba(214, 39, 40, 0.2)", # Light Red Fill
-                    name="Confidence Interval"
-                )
+            panel = rolling_panel(
+                data_version, (year_range, tuple(selected_nbhds), tuple(selected_categories)),
+                window, daily_counts
             )
 
-            fig_fc.update_layout(height=500, showlegend=True)
-            st.plotly_chart(fig_fc, use_container_width=True)
-            png_download_button(fig_fc, "forecast_2026.png", "Download Forecast Plot (PNG)")
-
-            st.markdown(
-                "This forecast is a baseline Seasonal ARIMA model fit on citywide monthly totals. "
-                "It is intended as a short-term planning aid, not a causal prediction."
+            left, right = st.columns(2)
+            with left:
+                yoy = (
+                    f"{panel['current'] / panel['previous'] - 1:+.1%} vs. a year earlier"
+                    if panel["previous"] else None
+                )
+                st.metric(f"Incidents, last {window} days", f"{panel['current']:,}", yoy)
+            with right:
+                st.metric("Window ends", f"{panel['as_of']:%Y-%m-%d}")
+
+            st.subheader(f"Rolling {window}-Day Incident Count")
+            st.plotly_chart(panel["figure"], use_container_width=True)
+            png_download_button(panel["figure"], f"rolling_{window}d.png", "Download Rolling Trend (PNG)")
+
+            st.subheader("Anomalies")
+            st.caption(
+                f"Each row compares the last {window} days with the {daily.BASELINE_WINDOWS} "
+                f"{window}-day windows before it. Rows with |z| ≥ {daily.ANOMALY_Z:g} are flagged. "
+                "Weekday and hour filters do not apply to this tab."
             )
+            left, right = st.columns(2)
+            with left:
+                anomaly_table(panel["anomalies"]["neighborhood"], "neighborhood")
+            with right:
+                anomaly_table(panel["anomalies"]["category"], "category")
 
 # ==================================================
-# TAB 4: About SF and Analysis Zones
+# TAB 6: About SF and Analysis Zones
 # ==================================================
-with tab4:
-    st.header("About San Francisco and the 41 Analysis Zones")
-
-    st.subheader("Insights Summary (Based on 2018–2025 Data)")
-
-    st.markdown("""
-    ---
-    ### Insights:
-
-    **1. Neighborhood Distribution**
-
-    The highest incident volumes are concentrated in **Mission, Tenderloin, and South of Market**—three dense neighborhoods with heavy foot traffic, nightlife, commercial activity, and transit connections. These areas traditionally account for a large share of police calls, and the counts in this dataset follow that well-known pattern. 
-
-    **2. Incident Category Distribution**
-
-    **Larceny Theft** is by far the dominant category, reflecting the long-standing pattern of property crime in San Francisco. Categories such as Malicious Mischief, Assault, Burglary, and Motor Vehicle Theft also appear frequently, forming the core group of incidents that drive citywide totals year after year.
-
-    **3. Weekday Distribution**
-
-    Incidents are relatively evenly spread across the week but peak slightly on **Fridays**, which often see higher mobility, nightlife, and social activity. **Sundays** show the lowest volume, consistent with quieter movement patterns across the city.
-
-    **4. Hour-of-Day Distribution**
-
-    The hourly pattern has two clear peaks: one around **midnight** and another around **midday**. Early morning hours (roughly 2 AM–5 AM) are the quietest, while daytime and early evening hours show steady, high activity. This pattern is typical of large cities where property crime and public disturbances follow both business hours and nightlife cycles.
-
-    ---
-
-    ### Note on Neighborhood Naming
-
-    The neighborhood labels in the dataset follow the official **41-zone “Analysis Neighborhoods”** system used by DataSF. This system is employed by the San Francisco Police Department, the Department of Public Health, and the Mayor’s Office to ensure consistent reporting across city agencies. Because these 41 analysis zones combine or redefine several commonly known neighborhoods, their names may differ from those used by the San Francisco Planning Department or from informal neighborhood boundaries found on maps, tourism guides, or Wikipedia. For example, the area labeled “Financial District/South Beach” in the Analysis Neighborhood system would appear as two separate neighborhoods in other sources. For the purposes of this project, all EDA and visualizations use the official SFPD Analysis Neighborhood definitions to maintain accuracy and consistency with city-level reporting.
-
-    ## Approximate Mapping: Common Neighborhood Names vs. Analysis Neighborhoods
-
-    The table below gives a practical translation from the 41 Analysis Neighborhoods
-    to the closest common or informal neighborhood names people use in daily life.
-    These are approximate matches meant to help interpretation.
-
-    | Analysis Neighborhood (DataSF) | Closest Common Name(s) |
-    |---|---|
-    | Bayview Hunters Point | Bayview, Hunters Point, Butchertown |
-    | Bernal Heights | Bernal Heights |
-    | Castro/Upper Market | The Castro, Upper Market, Duboce Triangle |
-    | Chinatown | Chinatown |
-    | Excelsior | Excelsior, Mission Terrace (parts) |
-    | Financial District/South Beach | Financial District, South Beach, Embarcadero (downtown portion) |
-    | Glen Park | Glen Park |
-    | Golden Gate Park | Golden Gate Park |
-    | Haight Ashbury | Haight-Ashbury, Cole Valley (parts), Buena Vista area |
-    | Hayes Valley | Hayes Valley, Civic Center fringe (west) |
-    | Inner Richmond | Inner Richmond, Central Richmond |
-    | Inner Sunset | Inner Sunset |
-    | Japantown | Japantown, Western Addition (northeast portion) |
-    | Lakeshore | Lakeshore, Lake Merced area, St. Francis Wood fringe |
-    | Lincoln Park | Lincoln Park, Sea Cliff fringe |
-    | Lone Mountain/USF | USF area, Lone Mountain, Inner Anza Vista fringe |
-    | Marina | Marina, Cow Hollow (often grouped informally) |
-    | McLaren Park | McLaren Park, University Mound fringe |
-    | Mission | Mission District |
-    | Mission Bay | Mission Bay, China Basin |
-    | Nob Hill | Nob Hill, Lower Nob Hill |
-    | Noe Valley | Noe Valley |
-    | North Beach | North Beach, Telegraph Hill |
-    | Oceanview/Merced/Ingleside | Oceanview, Ingleside, Merced Heights, Lakeview |
-    | Outer Mission | Outer Mission, Crocker-Amazon, Geneva area |
-    | Outer Richmond | Outer Richmond |
-    | Outer Sunset | Outer Sunset |
-    | Pacific Heights | Pacific Heights, Lower Pacific Heights |
-    | Portola | Portola, Silver Terrace fringe |
-    | Potrero Hill | Potrero Hill, Dogpatch fringe |
-    | Presidio | Presidio |
-    | Presidio Heights | Presidio Heights, Laurel Heights fringe |
-    | Russian Hill | Russian Hill |
-    | Seacliff | Sea Cliff |
-    | South of Market | SoMa (South of Market) |
-    | Sunset/Parkside | Inner Sunset fringe, Outer Sunset, Parkside |
-    | Tenderloin | Tenderloin |
-    | Treasure Island | Treasure Island, Yerba Buena Island |
-    | Twin Peaks | Twin Peaks, Clarendon Heights |
-    | Visitacion Valley | Visitacion Valley |
-    | West Of Twin Peaks | West Portal, Forest Hill, St. Francis Wood (parts) |
-    | Western Addition | Western Addition, Alamo Square, Fillmore, Lower Haight fringe |
-
-    ### Why the 41 Analysis Neighborhood System Exists
-
-    San Francisco agencies adopted the 41 Analysis Neighborhood system to create one consistent geography for reporting citywide indicators. These zones were built by grouping Census tracts into neighborhoods that reflect how residents and planning agencies commonly describe the city. Using a single standardized set allows the Police Department, Public Health, and other departments to compare trends across time and across datasets without mismatched neighborhood definitions.
-
-    With the standardized 41 Analysis Neighborhood geography established, we now explore how incidents vary over time, across categories, and between neighborhoods.
-    """)
\ No newline at end of file
+if tab6.open:
+    with tab6:
+        st.header("About San Francisco and the 41 Analysis Zones")
+
+        st.subheader("Insights Summary (Based on 2018–2025 Data)")
+
+        st.markdown("""
+        ---
+        ### Insights:
+
+        **1. Neighborhood Distribution**
+
+        The highest incident volumes are concentrated in **Mission, Tenderloin, and South of Market**—three dense neighborhoods with heavy foot traffic, nightlife, commercial activity, and transit connections. These areas traditionally account for a large share of police calls, and the counts in this dataset follow that well-known pattern. 
+
+        **2. Incident Category Distribution**
+
+        **Larceny Theft** is by far the dominant category, reflecting the long-standing pattern of property crime in San Francisco. Categories such as Malicious Mischief, Assault, Burglary, and Motor Vehicle Theft also appear frequently, forming the core group of incidents that drive citywide totals year after year.
+
+        **3. Weekday Distribution**
+
+        Incidents are relatively evenly spread across the week but peak slightly on **Fridays**, which often see higher mobility, nightlife, and social activity. **Sundays** show the lowest volume, consistent with quieter movement patterns across the city.
+
+        **4. Hour-of-Day Distribution**
+
+        The hourly pattern has two clear peaks: one around **midnight** and another around **midday**. Early morning hours (roughly 2 AM–5 AM) are the quietest, while daytime and early evening hours show steady, high activity. This pattern is typical of large cities where property crime and public disturbances follow both business hours and nightlife cycles.
+
+        ---
+
+        ### Note on Neighborhood Naming
+
+        The neighborhood labels in the dataset follow the official **41-zone “Analysis Neighborhoods”** system used by DataSF. This system is employed by the San Francisco Police Department, the Department of Public Health, and the Mayor’s Office to ensure consistent reporting across city agencies. Because these 41 analysis zones combine or redefine several commonly known neighborhoods, their names may differ from those used by the San Francisco Planning Department or from informal neighborhood boundaries found on maps, tourism guides, or Wikipedia. For example, the area labeled “Financial District/South Beach” in the Analysis Neighborhood system would appear as two separate neighborhoods in other sources. For the purposes of this project, all EDA and visualizations use the official SFPD Analysis Neighborhood definitions to maintain accuracy and consistency with city-level reporting.
+
+        ## Approximate Mapping: Common Neighborhood Names vs. Analysis Neighborhoods
+
+        The table below gives a practical translation from the 41 Analysis Neighborhoods
+        to the closest common or informal neighborhood names people use in daily life.
+        These are approximate matches meant to help interpretation.
+
+        | Analysis Neighborhood (DataSF) | Closest Common Name(s) |
+        |---|---|
+        | Bayview Hunters Point | Bayview, Hunters Point, Butchertown |
+        | Bernal Heights | Bernal Heights |
+        | Castro/Upper Market | The Castro, Upper Market, Duboce Triangle |
+        | Chinatown | Chinatown |
+        | Excelsior | Excelsior, Mission Terrace (parts) |
+        | Financial District/South Beach | Financial District, South Beach, Embarcadero (downtown portion) |
+        | Glen Park | Glen Park |
+        | Golden Gate Park | Golden Gate Park |
+        | Haight Ashbury | Haight-Ashbury, Cole Valley (parts), Buena Vista area |
+        | Hayes Valley | Hayes Valley, Civic Center fringe (west) |
+        | Inner Richmond | Inner Richmond, Central Richmond |
+        | Inner Sunset | Inner Sunset |
+        | Japantown | Japantown, Western Addition (northeast portion) |
+        | Lakeshore | Lakeshore, Lake Merced area, St. Francis Wood fringe |
+        | Lincoln Park | Lincoln Park, Sea Cliff fringe |
+        | Lone Mountain/USF | USF area, Lone Mountain, Inner Anza Vista fringe |
+        | Marina | Marina, Cow Hollow (often grouped informally) |
+        | McLaren Park | McLaren Park, University Mound fringe |
+        | Mission | Mission District |
+        | Mission Bay | Mission Bay, China Basin |
+        | Nob Hill | Nob Hill, Lower Nob Hill |
+        | Noe Valley | Noe Valley |
+        | North Beach | North Beach, Telegraph Hill |
+        | Oceanview/Merced/Ingleside | Oceanview, Ingleside, Merced Heights, Lakeview |
+        | Outer Mission | Outer Mission, Crocker-Amazon, Geneva area |
+        | Outer Richmond | Outer Richmond |
+        | Outer Sunset | Outer Sunset |
+        | Pacific Heights | Pacific Heights, Lower Pacific Heights |
+        | Portola | Portola, Silver Terrace fringe |
+        | Potrero Hill | Potrero Hill, Dogpatch fringe |
+        | Presidio | Presidio |
+        | Presidio Heights | Presidio Heights, Laurel Heights fringe |
+        | Russian Hill | Russian Hill |
+        | Seacliff | Sea Cliff |
+        | South of Market | SoMa (South of Market) |
+        | Sunset/Parkside | Inner Sunset fringe, Outer Sunset, Parkside |
+        | Tenderloin | Tenderloin |
+        | Treasure Island | Treasure Island, Yerba Buena Island |
+        | Twin Peaks | Twin Peaks, Clarendon Heights |
+        | Visitacion Valley | Visitacion Valley |
+        | West Of Twin Peaks | West Portal, Forest Hill, St. Francis Wood (parts) |
+        | Western Addition | Western Addition, Alamo Square, Fillmore, Lower Haight fringe |
+
+        ### Why the 41 Analysis Neighborhood System Exists
+
+        San Francisco agencies adopted the 41 Analysis Neighborhood system to create one consistent geography for reporting citywide indicators. These zones were built by grouping Census tracts into neighborhoods that reflect how residents and planning agencies commonly describe the city. Using a single standardized set allows the Police Department, Public Health, and other departments to compare trends across time and across datasets without mismatched neighborhood definitions.
+
+        With the standardized 41 Analysis Neighborhood geography established, we now explore how incidents vary over time, across categories, and between neighborhoods.
+        """)
+
+# --------------------------------------------------
+# Performance (timings of the rerun that drew this page)
+# --------------------------------------------------
+run_summary = run_timer.finish()
+with st.sidebar.expander("Performance"):
+    st.caption(
+        f"This rerun: {run_summary['wall_ms']:,.0f} ms, "
+        f"RSS {run_summary['rss_mb']:,.0f} MiB ({run_summary['rss_delta_mb']:+,.1f} MiB)."
+    )
+    if perf.cold_start is not None:
+        st.caption(
+            f"Cold start of this server process: imports {perf.cold_start['imports_ms']:,.0f} ms, "
+            f"first paint {perf.cold_start['first_paint_ms']:,.0f} ms."
+        )
+    st.dataframe(run_timer.frame(), hide_index=True)
+    st.button(
+        "Profile next rerun",
+        help="Runs the script once more under cProfile and shows the hottest calls here.",
+        on_click=lambda: st.session_state.update(profile_rerun=True)
+    )
+    if run_timer.profile_report:
+        st.code(run_timer.profile_report, language=None)
@@ -0,0 +1,115 @@
+"""Compare ``ingest.clean_incidents`` with the pandas pipeline it replaced.
+
+    python -m benchmarks.clean_speedup                  # 1M rows in 50k pages
+    python -m benchmarks.clean_speedup --rows 200k --output clean.json
+
+Both implementations clean the same synthetic raw pages (generated up
+front, not timed). The outputs are checked to agree before the best of
+``--repeat`` wall times and the speedup are reported, as JSON.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.run import environment, parse_size
+from benchmarks.synthetic import raw_pages
+from sfcrime.geo import fill_missing_neighborhoods
+from sfcrime.ingest import END_YEAR, PAGE_SIZE, START_YEAR, clean_incidents
+from sfcrime.schema import COLUMNS, HOUR_MISSING, apply_schema
+
+
+def legacy_clean_incidents(df: pd.DataFrame) -> pd.DataFrame:
+    """The cleaning step as it was before the single-pass rewrite."""
+    df = df.rename(columns={
+        "incident_date": "date",
+        "incident_datetime": "incident_datetime",
+        "analysis_neighborhood": "neighborhood",
+        "incident_category": "category",
+        "incident_day_of_week": "weekday",
+    })
+
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    df["incident_datetime"] = pd.to_datetime(df["incident_datetime"], errors="coerce")
+    df["latitude"] = pd.to_numeric(df["latitude"], errors="coerce").astype("float32")
+    df["longitude"] = pd.to_numeric(df["longitude"], errors="coerce").astype("float32")
+
+    df = fill_missing_neighborhoods(df)
+    df = df.dropna(subset=["date", "neighborhood", "category"])
+
+    df["year"] = df["date"].dt.year.astype("int16")
+    df["month"] = df["date"].dt.to_period("M").dt.to_timestamp()
+    df["hour"] = df["incident_datetime"].dt.hour.fillna(HOUR_MISSING).astype("int8")
+
+    df = df[(df["year"] >= START_YEAR) & (df["year"] <= END_YEAR)]
+    return df
+
+
+def check_agreement(pages: list):
+    """Raise if the two implementations disagree on any page."""
+    for page in pages:
+        new = apply_schema(clean_incidents(page.copy())).reset_index(drop=True)
+        old = apply_schema(legacy_clean_incidents(page.copy())[COLUMNS]).reset_index(drop=True)
+        if len(new) != len(old):
+            raise AssertionError(f"row counts differ: {len(new)} != {len(old)}")
+        for col in COLUMNS:
+            if col in ("latitude", "longitude"):
+                # Parsing straight to float32 may round the last bit differently
+                same = np.allclose(new[col], old[col], rtol=1e-6, equal_nan=True)
+            elif isinstance(new[col].dtype, pd.CategoricalDtype):
+                same = new[col].astype(object).equals(old[col].astype(object))
+            else:
+                same = np.array_equal(new[col].to_numpy(), old[col].to_numpy().astype(new[col].dtype))
+            if not same:
+                raise AssertionError(f"column {col!r} differs")
+
+
+def best_of(fn, pages: list, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for page in pages:
+            fn(page.copy())
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", default="1M")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args(argv)
+
+    n = parse_size(args.rows)
+    pages = list(raw_pages(n, args.page_size, args.seed))
+    check_agreement(pages[:3])
+
+    legacy = best_of(legacy_clean_incidents, pages, args.repeat)
+    current = best_of(clean_incidents, pages, args.repeat)
+    result = {
+        "environment": environment(),
+        "rows": n,
+        "page_size": args.page_size,
+        "repeat": args.repeat,
+        "legacy_s": round(legacy, 4),
+        "current_s": round(current, 4),
+        "legacy_rows_per_s": round(n / legacy),
+        "current_rows_per_s": round(n / current),
+        "speedup": round(legacy / current, 2),
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
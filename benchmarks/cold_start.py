@@ -0,0 +1,134 @@
+"""Cold-start cost of the dashboard: import time and first paint.
+
+    python -m benchmarks.cold_start                     # 50k synthetic incidents
+    python -m benchmarks.cold_start --rows 200k --repeat 5 --output cold.json
+
+Every measurement runs in a fresh interpreter, as a new container would.
+``imports`` times app.py's top-level imports one by one, in file order
+(each figure is what that import adds on top of the ones before it).
+``first_paint`` runs the whole script once through Streamlit's
+``AppTest`` against a dataset that is already published, then switches to
+each other tab and reruns with the filters unchanged; only the open tab's
+body runs, so each switch pays just for that tab. The DataSF endpoint is
+replaced by ``FixtureSession`` (``SFCRIME_FIXTURE``) throughout.
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.run import environment, parse_size
+from benchmarks.synthetic import raw_records
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = ROOT / "app.py"
+TABS = [
+    "Trends and Rankings",
+    "Hour and Weekday Patterns",
+    "Spatial Density Map",
+    "Forecast (2026 Outlook)",
+    "Rolling Windows and Anomalies",
+    "About SF and Analysis Zones",
+]
+
+_IMPORTS_CHILD = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+times = []
+for stmt in {statements!r}:
+    t0 = time.perf_counter()
+    exec(stmt, {{}})
+    times.append([stmt, (time.perf_counter() - t0) * 1000])
+print(json.dumps(times))
+"""
+
+_PAINT_CHILD = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+from streamlit.testing.v1 import AppTest
+t0 = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=600).run()
+first = (time.perf_counter() - t0) * 1000
+if at.exception:
+    raise SystemExit(at.exception[0].value)
+statsmodels = "statsmodels" in sys.modules
+from sfcrime import perf
+switches = {{}}
+for tab in {tabs!r}[1:]:
+    at.session_state["tab"] = tab
+    t0 = time.perf_counter()
+    at.run()
+    switches[tab] = (time.perf_counter() - t0) * 1000
+print(json.dumps({{"first_paint_ms": first, "cold_start": perf.cold_start, "tab_switch_ms": switches,
+                  "statsmodels_at_first_paint": statsmodels}}))
+"""
+
+
+def app_imports() -> list:
+    """app.py's top-level import statements, as source, in file order."""
+    tree = ast.parse(APP.read_text(encoding="utf-8"))
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def run_child(code: str, env: dict) -> dict:
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                         env=env, cwd=ROOT, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", default="50k")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args(argv)
+
+    n = parse_size(args.rows)
+    statements = app_imports()
+    with tempfile.TemporaryDirectory(prefix="sfcrime-cold-") as tmp:
+        fixture = Path(tmp) / "fixture.json"
+        with open(fixture, "w", encoding="utf-8") as f:
+            json.dump(raw_records(n, args.seed).to_dict("records"), f)
+        env = dict(os.environ, SFCRIME_FIXTURE=str(fixture), SFCRIME_DATA_DIR=str(Path(tmp) / "data"))
+
+        import_runs = [run_child(_IMPORTS_CHILD.format(root=str(ROOT), statements=statements), env)
+                       for _ in range(args.repeat)]
+        # The first run fetches and publishes the dataset; it is not a cold start we measure
+        paint_code = _PAINT_CHILD.format(root=str(ROOT), app=str(APP), tabs=TABS)
+        run_child(paint_code, env)
+        paint_runs = [run_child(paint_code, env) for _ in range(args.repeat)]
+
+    imports = [
+        {"statement": stmt, "median_ms": round(float(np.median([r[i][1] for r in import_runs])), 2)}
+        for i, stmt in enumerate(statements)
+    ]
+    result = {
+        "environment": environment(),
+        "rows": n,
+        "repeat": args.repeat,
+        "imports_total_ms": round(sum(i["median_ms"] for i in imports), 1),
+        "imports": imports,
+        "first_paint_ms": round(float(np.median([r["first_paint_ms"] for r in paint_runs])), 1),
+        "script_imports_ms": round(float(np.median([r["cold_start"]["imports_ms"] for r in paint_runs])), 1),
+        "tab_switch_ms": {
+            tab: round(float(np.median([r["tab_switch_ms"][tab] for r in paint_runs])), 1)
+            for tab in TABS[1:]
+        },
+        "statsmodels_at_first_paint": any(r["statsmodels_at_first_paint"] for r in paint_runs),
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
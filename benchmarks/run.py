@@ -0,0 +1,244 @@
+"""Time the dashboard's hot paths on synthetic data.
+
+    python -m benchmarks.run                       # 100k, 1M and 5M rows
+    python -m benchmarks.run --sizes 100k 1M --repeat 5 --output bench.json
+
+Everything runs offline: cleaning is timed on generated raw pages, and the
+end-to-end fetch goes through ``FixtureSession`` (``SFCRIME_FIXTURE``) in
+place of the DataSF endpoint. Each benchmark reports the best and median
+wall time over ``--repeat`` runs, throughput in rows per second and the
+peak memory it allocated (traced in a separate run so tracing does not
+skew the timings). Results are written as JSON together with the
+versions, machine and commit they were measured on.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import incident_frame, raw_pages, raw_records
+from sfcrime import ingest
+from sfcrime.binning import hexbin
+from sfcrime.cube import CountCube
+from sfcrime.daily import DailyCounts
+from sfcrime.export import export_rows
+from sfcrime.filter_index import FilterIndex
+from sfcrime.forecast import fit_sarimax
+from sfcrime.ingest import PAGE_SIZE, START_YEAR, clean_incidents
+from sfcrime.model_store import ModelStore
+from sfcrime.perf import rss_bytes
+
+SIZES = {"100k": 100_000, "1M": 1_000_000, "5M": 5_000_000}
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+# The stub scans every record per query, so the fetch is timed on small sizes only
+FETCH_MAX_ROWS = 100_000
+# Raw string pages cost ~500 bytes a row; cleaning is per page, so its
+# throughput at larger sizes is measured on this many rows
+CLEAN_MAX_ROWS = 1_000_000
+
+# A typical sidebar state: a few busy neighborhoods, most categories,
+# all weekdays, daytime hours, the last five years
+FILTERS = {
+    "years": (2021, 2025),
+    "neighborhoods": ["Mission", "Tenderloin", "South of Market", "Nob Hill"],
+    "weekdays": None,
+    "hours": (6, 22),
+}
+
+
+def parse_size(text: str) -> int:
+    if text in SIZES:
+        return SIZES[text]
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1].lower())
+    return int(float(text[:-1]) * scale) if scale else int(text)
+
+
+def measure(fn, repeat: int):
+    """Best and median wall seconds over ``repeat`` calls, and traced peak MiB."""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), float(np.median(times)), peak / 2**20
+
+
+def filter_args(df: pd.DataFrame) -> dict:
+    categories = list(df["category"].cat.categories)
+    return dict(FILTERS, categories=[c for c in categories if c not in ("Non-Criminal", "Case Closure")],
+                weekdays=list(df["weekday"].cat.categories))
+
+
+def isin_mask(df: pd.DataFrame, f: dict) -> np.ndarray:
+    """The boolean-mask filter the index replaced, kept as a baseline."""
+    mask = (
+        df["year"].between(*f["years"])
+        & df["neighborhood"].isin(f["neighborhoods"])
+        & df["category"].isin(f["categories"])
+        & df["weekday"].isin(f["weekdays"])
+        & df["hour"].between(*f["hours"])
+    )
+    return np.flatnonzero(mask.to_numpy())
+
+
+def clean_pages(n: int, seed: int):
+    """Raw pages are generated up front so only cleaning is timed."""
+    pages = list(raw_pages(n, PAGE_SIZE, seed))
+    return lambda: [clean_incidents(page.copy()) for page in pages]
+
+
+def fetch_via_stub(n: int, seed: int, workdir: Path):
+    path = workdir / f"fixture-{n}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(raw_records(n, seed).to_dict("records"), f)
+
+    def run():
+        os.environ[ingest.FIXTURE_ENV] = str(path)
+        try:
+            return ingest.fetch_incidents()
+        finally:
+            del os.environ[ingest.FIXTURE_ENV]
+    return run
+
+
+class _Setup:
+    """Deferred benchmark: ``factory()`` builds the callable to time."""
+
+    def __init__(self, factory):
+        self.factory = factory
+
+
+def benchmarks_for(n: int, seed: int, workdir: Path):
+    """Yield ``(name, rows, fn)`` for every benchmark at size ``n``.
+
+    ``fn`` may be a zero-argument factory wrapped in ``_Setup`` when
+    preparing its input is itself expensive.
+    """
+    yield "clean", min(n, CLEAN_MAX_ROWS), _Setup(lambda: clean_pages(min(n, CLEAN_MAX_ROWS), seed))
+    if n <= FETCH_MAX_ROWS:
+        yield "fetch_stub", n, _Setup(lambda: fetch_via_stub(n, seed, workdir))
+
+    df = incident_frame(n, seed)
+    f = filter_args(df)
+    index = FilterIndex(df)
+    cube = CountCube(df)
+    rows = index.select(**f)
+    view = cube.select(**f)
+
+    yield "filter_mask.isin", n, lambda: isin_mask(df, f)
+    yield "filter_index.build", n, lambda: FilterIndex(df)
+    yield "filter_index.select", n, lambda: index.select(**f)
+    yield "cube.build", n, lambda: CountCube(df)
+    yield "cube.select", n, lambda: cube.select(**f)
+    yield "groupby.month", len(rows), lambda: view.counts_by("month")
+    yield "groupby.neighborhood", len(rows), lambda: view.counts_by("neighborhood").nlargest(10)
+    yield "groupby.category", len(rows), lambda: view.counts_by("category").nlargest(10)
+    yield "groupby.weekday_hour", len(rows), lambda: view.counts_by_pair("weekday", "hour")
+    yield "groupby.hour", len(rows), lambda: view.counts_by("hour")
+    yield "groupby.weekday", len(rows), lambda: view.counts_by("weekday")
+    lat, lon = df["latitude"].to_numpy(), df["longitude"].to_numpy()
+    yield "hexbin", len(rows), lambda: hexbin(lat[rows], lon[rows], 200)
+
+    def csv_export():
+        with export_rows(df, rows, "CSV") as out:
+            out.seek(0, os.SEEK_END)
+    yield "export.csv", len(rows), csv_export
+
+    # Incremental daily counts: the last month arrives as a refresh would deliver it
+    latest = df["date"] >= df["date"].max() - pd.Timedelta(days=30)
+    daily_base = DailyCounts.from_frame(df[~latest.to_numpy()])
+    new_rows = df[latest.to_numpy()]
+    daily = daily_base.update(new_rows)
+    daily_args = (f["neighborhoods"], f["categories"])
+    yield "daily.build", n, lambda: DailyCounts.from_frame(df)
+    yield "daily.update", len(new_rows), lambda: daily_base.update(new_rows)
+    yield "daily.rolling_28d", n, lambda: daily.rolling(28, *daily_args)
+    yield "daily.window_sum", n, lambda: daily.window_sum("2025-01-01", "2025-12-31", *daily_args)
+    yield "daily.anomalies", n, lambda: daily.anomalies("neighborhood", 28, None, *daily_args)
+
+    ts = cube.select(years=(START_YEAR, f["years"][1])).counts_by("month")
+    yield "forecast.fit_cold", len(ts), lambda: fit_sarimax(ts)
+    store = ModelStore(workdir / f"models-{n}")
+    fit_sarimax(ts, series_id="citywide", store=store)
+    yield "forecast.fit_stored", len(ts), lambda: fit_sarimax(ts, series_id="citywide", store=store)
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=Path(__file__).resolve().parent, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES), help="row counts, e.g. 100k 1M 5M")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="+", help="run only benchmarks whose name starts with one of these")
+    parser.add_argument("--output", type=Path, help="JSON file to write (default: benchmarks/results/<UTC time>.json)")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="sfcrime-bench-") as tmp:
+        for size in args.sizes:
+            n = parse_size(size)
+            for name, rows, fn in benchmarks_for(n, args.seed, Path(tmp)):
+                if args.only and not name.startswith(tuple(args.only)):
+                    continue
+                if isinstance(fn, _Setup):
+                    fn = fn.factory()
+                best, median, peak_mb = measure(fn, args.repeat)
+                results.append({
+                    "size": n,
+                    "benchmark": name,
+                    "rows": int(rows),
+                    "best_s": round(best, 6),
+                    "median_s": round(median, 6),
+                    "rows_per_s": round(rows / best) if best > 0 else None,
+                    "peak_mb": round(peak_mb, 2),
+                    "rss_mb": round(rss_bytes() / 2**20, 1),
+                })
+                print(f"{n:>10,} {name:<22} {best * 1000:>10.2f} ms "
+                      f"{rows / best if best > 0 else float('inf'):>14,.0f} rows/s "
+                      f"{peak_mb:>9.1f} MiB peak", flush=True)
+
+    output = args.output or RESULTS_DIR / f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "repeat": args.repeat, "seed": args.seed,
+                   "results": results}, f, indent=2)
+    print(f"wrote {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Import and run every module once on a small synthetic table.
+
+    python -m benchmarks.smoke                 # 5k rows, a few seconds
+    python -m benchmarks.smoke --rows 50k
+
+A quick check to run before committing: it imports every module of
+``sfcrime`` and ``benchmarks`` (so one that fails at import time cannot
+ship), calls each benchmark of ``benchmarks.run`` once, and checks the
+daily prefix-sum store against counts taken straight from the rows.
+Exits non-zero on the first failure.
+"""
+import argparse
+import importlib
+import pkgutil
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import benchmarks
+import sfcrime
+
+
+def import_all() -> list:
+    """Import every module of both packages; returns their names."""
+    names = []
+    for package in (sfcrime, benchmarks):
+        for info in pkgutil.iter_modules(package.__path__, f"{package.__name__}."):
+            importlib.import_module(info.name)
+            names.append(info.name)
+    return names
+
+
+def check_daily(df: pd.DataFrame):
+    """Windows, rolling series and an incremental update against plain counts."""
+    from sfcrime.daily import DailyCounts
+
+    counts = DailyCounts.from_frame(df)
+    dates = df["date"].dt.normalize()
+    start, end = dates.min() + pd.Timedelta(days=40), dates.max() - pd.Timedelta(days=40)
+    expected = int((dates.between(start, end) & df["neighborhood"].notna() & df["category"].notna()).sum())
+    got = counts.window_sum(start, end)
+    assert got == expected, f"window_sum {got} != {expected}"
+
+    rolling = counts.rolling(28)
+    daily = df.dropna(subset=["neighborhood", "category"]).groupby(dates).size()
+    daily = daily.reindex(pd.date_range(counts.days[0], counts.days[counts.last_day]), fill_value=0)
+    expected = daily.rolling(28).sum().dropna().astype(np.int64)
+    assert np.array_equal(rolling.to_numpy(), expected.to_numpy()), "rolling(28) differs from pandas"
+
+    split = dates >= dates.max() - pd.Timedelta(days=30)
+    updated = DailyCounts.from_frame(df[~split.to_numpy()]).update(df[split.to_numpy()])
+    assert np.array_equal(updated.prefix, counts.prefix), "update differs from a full build"
+    counts.anomalies("neighborhood", 28, as_of=end)
+
+
+def main(argv=None) -> int:
+    from benchmarks.run import _Setup, benchmarks_for, parse_size
+    from benchmarks.synthetic import incident_frame
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", default="5k")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    n = parse_size(args.rows)
+
+    modules = import_all()
+    print(f"imported {len(modules)} modules")
+    check_daily(incident_frame(n, args.seed))
+    print("daily counts match the rows")
+    with tempfile.TemporaryDirectory(prefix="sfcrime-smoke-") as tmp:
+        for name, _, fn in benchmarks_for(n, args.seed, Path(tmp)):
+            if isinstance(fn, _Setup):
+                fn = fn.factory()
+            fn()
+            print(f"ran {name}", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
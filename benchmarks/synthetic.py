@@ -0,0 +1,144 @@
+"""Synthetic SFPD incident data for offline benchmarks.
+
+Incidents are drawn with the skew of the real 2018-2025 data: a handful of
+neighborhoods (Mission, Tenderloin, South of Market, ...) and categories
+(Larceny Theft far ahead) dominate, the hour of day has a small-hours
+trough and an evening peak, and Friday is the busiest weekday. Points are
+scattered around each neighborhood's centre so spatial code sees
+realistic clustering.
+
+``raw_records`` / ``raw_pages`` produce DataSF-shaped string records (what
+``ingest.clean_incidents`` and ``FixtureSession`` consume); ``incident_frame``
+produces the cleaned table ``load_incidents`` returns, directly and fast
+enough for millions of rows.
+"""
+import numpy as np
+import pandas as pd
+
+from sfcrime.geo import load_boundaries
+from sfcrime.ingest import END_YEAR, SELECT_COLS, START_YEAR
+from sfcrime.schema import CATEGORIES, NEIGHBORHOODS, WEEKDAYS, apply_schema
+
+# Rough share of incidents by neighborhood / category; the rest split the
+# remainder with a flattened Zipf tail
+TOP_NEIGHBORHOODS = {
+    "Mission": 0.11, "Tenderloin": 0.09, "South of Market": 0.09,
+    "Financial District/South Beach": 0.07, "Bayview Hunters Point": 0.05,
+    "Western Addition": 0.03, "North Beach": 0.03, "Nob Hill": 0.025,
+}
+TOP_CATEGORIES = {
+    "Larceny Theft": 0.30, "Other Miscellaneous": 0.07, "Malicious Mischief": 0.065,
+    "Assault": 0.06, "Non-Criminal": 0.055, "Burglary": 0.05,
+    "Motor Vehicle Theft": 0.045, "Recovered Vehicle": 0.035, "Fraud": 0.03,
+    "Warrant": 0.03, "Lost Property": 0.025, "Drug Offense": 0.02,
+}
+HOUR_WEIGHTS = np.array([
+    4.0, 3.2, 2.8, 2.0, 1.5, 1.3, 1.8, 2.6, 3.6, 4.0, 4.3, 4.5,
+    5.2, 4.8, 4.8, 5.0, 5.2, 5.4, 5.8, 5.4, 5.0, 4.8, 4.5, 4.2,
+])
+WEEKDAY_WEIGHTS = np.array([1.00, 1.00, 1.02, 1.02, 1.08, 1.00, 0.92])
+
+MISSING_NEIGHBORHOOD_RATE = 0.05
+# Share of raw records dated just outside the project window
+OUT_OF_RANGE_RATE = 0.01
+SPREAD_DEGREES = 0.004
+
+
+def _weights(names: list, top: dict) -> np.ndarray:
+    rest = [n for n in names if n not in top]
+    tail = 1.0 / np.arange(6, len(rest) + 6)
+    tail *= (1.0 - sum(top.values())) / tail.sum()
+    share = dict(zip(rest, tail), **top)
+    return np.array([share[n] for n in names])
+
+
+def _centres() -> np.ndarray:
+    """``(len(NEIGHBORHOODS), 2)`` lat/lon centre of each neighborhood's largest ring."""
+    boundaries = load_boundaries()
+    centres = []
+    for name in NEIGHBORHOODS:
+        ring = max(boundaries[name], key=len)
+        centres.append((ring[:, 1].mean(), ring[:, 0].mean()))
+    return np.array(centres)
+
+
+def _draw(n: int, rng: np.random.Generator, out_of_range: float = 0.0) -> dict:
+    """Columns of ``n`` incidents as NumPy arrays (codes, not labels)."""
+    lo = np.datetime64(f"{START_YEAR}-01-01")
+    hi = np.datetime64(f"{END_YEAR + 1}-01-01")
+    days = rng.integers(0, (hi - lo).astype(int), n)
+    # Thin each day by its weekday weight (1970-01-01 was a Thursday)
+    dates = lo + days.astype("timedelta64[D]")
+    weekday = (dates.astype("datetime64[D]").astype(np.int64) + 3) % 7
+    keep = rng.random(n) < WEEKDAY_WEIGHTS[weekday] / WEEKDAY_WEIGHTS.max()
+    dates = np.where(keep, dates, lo + rng.integers(0, (hi - lo).astype(int), n).astype("timedelta64[D]"))
+    if out_of_range:
+        shift = rng.random(n) < out_of_range
+        dates[shift] -= np.timedelta64(400, "D")
+
+    hours = rng.choice(24, n, p=HOUR_WEIGHTS / HOUR_WEIGHTS.sum())
+    minutes = rng.integers(0, 60, n)
+    stamps = (dates.astype("datetime64[m]")
+              + (hours * 60 + minutes).astype("timedelta64[m]"))
+
+    nbhd = rng.choice(len(NEIGHBORHOODS), n, p=_weights(NEIGHBORHOODS, TOP_NEIGHBORHOODS))
+    cat = rng.choice(len(CATEGORIES), n, p=_weights(CATEGORIES, TOP_CATEGORIES))
+    latlon = _centres()[nbhd] + rng.normal(0.0, SPREAD_DEGREES, (n, 2))
+    return {
+        "date": dates.astype("datetime64[D]"),
+        "incident_datetime": stamps,
+        "neighborhood": nbhd,
+        "category": cat,
+        "latitude": latlon[:, 0],
+        "longitude": latlon[:, 1],
+    }
+
+
+def raw_records(n: int, seed: int = 0, start_id: int = 0) -> pd.DataFrame:
+    """``n`` raw DataSF records (all strings), ``:id`` first, as a DataFrame."""
+    rng = np.random.default_rng(seed)
+    cols = _draw(n, rng, OUT_OF_RANGE_RATE)
+    date = np.char.add(np.datetime_as_string(cols["date"].astype("datetime64[s]")), ".000")
+    stamp = np.char.add(np.datetime_as_string(cols["incident_datetime"].astype("datetime64[s]")), ".000")
+    weekday = (cols["date"].astype(np.int64) + 3) % 7
+    nbhd = np.array(NEIGHBORHOODS, dtype=object)[cols["neighborhood"]]
+    nbhd[rng.random(n) < MISSING_NEIGHBORHOOD_RATE] = None
+    return pd.DataFrame({
+        ":id": [f"row-{i:012d}" for i in range(start_id, start_id + n)],
+        "incident_date": date.astype(object),
+        "incident_datetime": stamp.astype(object),
+        "analysis_neighborhood": nbhd,
+        "incident_category": np.array(CATEGORIES, dtype=object)[cols["category"]],
+        "incident_day_of_week": np.array(WEEKDAYS, dtype=object)[weekday],
+        "latitude": cols["latitude"].round(6).astype(str).astype(object),
+        "longitude": cols["longitude"].round(6).astype(str).astype(object),
+    })
+
+
+def raw_pages(n: int, page_size: int, seed: int = 0):
+    """Yield raw pages of at most ``page_size`` rows, ``SELECT_COLS`` only."""
+    for page, start in enumerate(range(0, n, page_size)):
+        yield raw_records(min(page_size, n - start), seed + page, start)[SELECT_COLS]
+
+
+def incident_frame(n: int, seed: int = 0) -> pd.DataFrame:
+    """``n`` cleaned incidents with exactly the schema of ``load_incidents``."""
+    rng = np.random.default_rng(seed)
+    cols = _draw(n, rng)
+    order = np.argsort(cols["incident_datetime"], kind="stable")
+    cols = {k: v[order] for k, v in cols.items()}
+    date = cols["date"].astype("datetime64[ns]")
+    stamp = cols["incident_datetime"].astype("datetime64[ns]")
+    df = pd.DataFrame({
+        "date": date,
+        "incident_datetime": stamp,
+        "neighborhood": pd.Categorical.from_codes(cols["neighborhood"], NEIGHBORHOODS),
+        "category": pd.Categorical.from_codes(cols["category"], CATEGORIES),
+        "weekday": pd.Categorical.from_codes((cols["date"].astype(np.int64) + 3) % 7, WEEKDAYS),
+        "latitude": cols["latitude"],
+        "longitude": cols["longitude"],
+        "year": date.astype("datetime64[Y]").astype(np.int64) + 1970,
+        "month": date.astype("datetime64[M]").astype("datetime64[ns]"),
+        "hour": (stamp - date).astype("timedelta64[h]").astype(np.int64),
+    })
+    return apply_schema(df)
@@ -0,0 +1,6 @@
+"""Data and analytics layer behind the SF Crime Analytics dashboard (app.py)."""
+import os
+from pathlib import Path
+
+# Root for everything the app persists locally (snapshot, model store, ...)
+DATA_DIR = Path(os.environ.get("SFCRIME_DATA_DIR", Path(__file__).resolve().parent.parent / "data"))
@@ -0,0 +1,276 @@
+"""Rolling-origin backtests of the forecast model against cheap baselines.
+
+Each fold cuts a monthly series at an origin, fits a model on the months
+before it and forecasts the next ``STEPS`` months, which are then scored
+against what actually happened. Origins run every ``ORIGIN_STEP`` months
+from ``MIN_MONTHS`` to the end of the series, so the dashboard's SARIMAX
+configuration is judged on the same folds as a seasonal-naive forecast
+and an additive ETS model.
+
+Folds are fitted in parallel on a process pool and each finished fold is
+cached on disk, keyed by the model and a fingerprint of its training
+window. A refresh that adds a month therefore only fits the new folds.
+Fit times are cached with the forecasts, so the reported CPU cost is what
+the model costs to fit, not what the cache costs to read.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import as_completed
+from pathlib import Path
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from sfcrime import DATA_DIR
+from sfcrime.forecast import (
+    MIN_MONTHS, ORDER, SEASONAL_ORDER, SERIES_TIMEOUT, STEPS, fit_sarimax
+)
+from sfcrime.model_store import series_fingerprint
+from sfcrime.parallel import MAX_WORKERS, process_pool, time_limit
+
+BACKTEST_DIR = DATA_DIR / "backtest"
+ORIGIN_STEP = 3
+SEASON = 12
+# Two-sided level of every prediction interval (SARIMAX's default)
+ALPHA = 0.05
+
+MODELS = ("SARIMAX", "Seasonal naive", "ETS")
+# Part of each fold's cache key, so changing a model invalidates its folds
+MODEL_CONFIG = {
+    "SARIMAX": [list(ORDER), list(SEASONAL_ORDER)],
+    "Seasonal naive": [SEASON],
+    "ETS": ["add", "add_damped", "add", SEASON],
+}
+
+FOLD_COLUMNS = ["model", "cutoff", "month", "h", "actual", "forecast", "lower", "upper", "scale"]
+SUMMARY_COLUMNS = ["model", "folds", "failed", "MAPE %", "MASE", "coverage %", "fit CPU s/fold", "total fit CPU s"]
+
+
+# --------------------------------------------------
+# Models
+# --------------------------------------------------
+def _month_index(train: pd.Series, horizon: int) -> pd.DatetimeIndex:
+    return pd.date_range(train.index[-1] + pd.offsets.MonthBegin(1), periods=horizon, freq="MS")
+
+
+def seasonal_naive(train: pd.Series, horizon: int, alpha: float = ALPHA) -> pd.DataFrame:
+    """Repeat the last observed year; intervals from the seasonal differences."""
+    y = train.to_numpy(dtype=float)
+    h = np.arange(1, horizon + 1)
+    years_back = (h - 1) // SEASON + 1
+    forecast = y[len(y) - SEASON * years_back + (h - 1) % SEASON]
+    sigma = np.std(y[SEASON:] - y[:-SEASON], ddof=1)
+    half = NormalDist().inv_cdf(1 - alpha / 2) * sigma * np.sqrt(years_back)
+    return pd.DataFrame({
+        "month": _month_index(train, horizon),
+        "forecast": forecast,
+        "lower": forecast - half,
+        "upper": forecast + half,
+    })
+
+
+def ets(train: pd.Series, horizon: int, alpha: float = ALPHA) -> pd.DataFrame:
+    """Additive error, damped additive trend and additive seasonality."""
+    from statsmodels.tsa.exponential_smoothing.ets import ETSModel
+
+    results = ETSModel(
+        train, error="add", trend="add", damped_trend=True,
+        seasonal="add", seasonal_periods=SEASON
+    ).fit(disp=False)
+    pred = results.get_prediction(start=len(train), end=len(train) + horizon - 1)
+    frame = pred.summary_frame(alpha=alpha)
+    return pd.DataFrame({
+        "month": _month_index(train, horizon),
+        "forecast": frame["mean"].to_numpy(),
+        "lower": frame["pi_lower"].to_numpy(),
+        "upper": frame["pi_upper"].to_numpy(),
+    })
+
+
+def sarimax(train: pd.Series, horizon: int, alpha: float = ALPHA) -> pd.DataFrame:
+    """The dashboard's configuration, fitted cold as it would be without a stored model."""
+    pred = fit_sarimax(train).get_forecast(steps=horizon)
+    ci = pred.conf_int(alpha=alpha)
+    return pd.DataFrame({
+        "month": _month_index(train, horizon),
+        "forecast": pred.predicted_mean.to_numpy(),
+        "lower": ci.iloc[:, 0].to_numpy(),
+        "upper": ci.iloc[:, 1].to_numpy(),
+    })
+
+
+_FORECASTERS = {"SARIMAX": sarimax, "Seasonal naive": seasonal_naive, "ETS": ets}
+
+
+# --------------------------------------------------
+# Folds
+# --------------------------------------------------
+def rolling_origins(n: int, horizon: int = STEPS, min_train: int = MIN_MONTHS,
+                    step: int = ORIGIN_STEP) -> list:
+    """Training lengths of every fold, oldest first; the last fold ends the series."""
+    return list(range(n - horizon, min_train - 1, -step))[::-1]
+
+
+def _fold_key(model: str, train: pd.Series, horizon: int, alpha: float) -> str:
+    key = json.dumps([model, MODEL_CONFIG[model], series_fingerprint(train), horizon, alpha])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+
+
+def _run_fold(model: str, train: pd.Series, horizon: int, alpha: float,
+              timeout: float, cache_dir: str) -> tuple:
+    """Process-pool task: ``(forecast frame, fit seconds)`` for one fold.
+
+    A fold fitted before on the same training window is read back from
+    ``cache_dir`` together with the fit time it originally took.
+    """
+    path = Path(cache_dir) / f"{_fold_key(model, train, horizon, alpha)}.json"
+    try:
+        with open(path, encoding="utf-8") as f:
+            record = json.load(f)
+        frame = pd.DataFrame(record["forecast"])
+        frame["month"] = pd.to_datetime(frame["month"])
+        return frame, record["fit_seconds"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    t0 = time.process_time()
+    with time_limit(timeout):
+        frame = _FORECASTERS[model](train, horizon, alpha)
+    seconds = time.process_time() - t0
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    record = {
+        "model": model,
+        "fit_seconds": seconds,
+        "forecast": frame.assign(month=frame["month"].dt.strftime("%Y-%m-%d")).to_dict("list"),
+    }
+    # Named per process and thread, so no two writers share a temporary file
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(record, f)
+    os.replace(tmp, path)
+    return frame, seconds
+
+
+def _mase_scale(train: pd.Series) -> float:
+    """In-sample MAE of the seasonal-naive forecast over the training window."""
+    y = train.to_numpy(dtype=float)
+    return float(np.mean(np.abs(y[SEASON:] - y[:-SEASON])))
+
+
+def backtest(ts: pd.Series, models: tuple = MODELS, horizon: int = STEPS,
+             step: int = ORIGIN_STEP, alpha: float = ALPHA,
+             max_workers: int = MAX_WORKERS, timeout: float = SERIES_TIMEOUT,
+             cache_dir: Path = BACKTEST_DIR, progress=None) -> tuple:
+    """Backtest ``models`` on every rolling origin of a monthly series.
+
+    Returns ``(folds, summary)``: one row per model, cutoff and horizon
+    month with the actual count, forecast, interval and MASE scale, and
+    the metrics per model (``summarize``). A fold that fails or times out
+    is counted as failed for its model and left out of the metrics.
+    ``progress(done, total)`` is called as folds finish.
+    """
+    ts = ts.astype(float).asfreq("MS", fill_value=0.0)
+    origins = rolling_origins(len(ts), horizon, MIN_MONTHS, step)
+    tasks = [(model, n) for n in origins for model in models]
+
+    frames = []
+    fit_seconds = {model: [] for model in models}
+    failed = dict.fromkeys(models, 0)
+    done = 0
+    if tasks:
+        with process_pool(min(max_workers, len(tasks))) as pool:
+            futures = {
+                pool.submit(_run_fold, model, ts.iloc[:n], horizon, alpha, timeout, str(cache_dir)): (model, n)
+                for model, n in tasks
+            }
+            for fut in as_completed(futures):
+                model, n = futures[fut]
+                try:
+                    frame, seconds = fut.result()
+                except Exception:
+                    failed[model] += 1
+                else:
+                    actual = ts.iloc[n:n + horizon]
+                    frame = frame.assign(
+                        model=model,
+                        cutoff=ts.index[n - 1],
+                        h=np.arange(1, horizon + 1),
+                        actual=actual.to_numpy(),
+                        scale=_mase_scale(ts.iloc[:n]),
+                    )
+                    frames.append(frame[FOLD_COLUMNS])
+                    fit_seconds[model].append(seconds)
+                done += 1
+                if progress is not None:
+                    progress(done, len(tasks))
+
+    folds = (pd.concat(frames, ignore_index=True).sort_values(["model", "cutoff", "h"], ignore_index=True)
+             if frames else pd.DataFrame(columns=FOLD_COLUMNS))
+    return folds, summarize(folds, fit_seconds, failed)
+
+
+# --------------------------------------------------
+# Metrics
+# --------------------------------------------------
+def summarize(folds: pd.DataFrame, fit_seconds: dict, failed: dict) -> pd.DataFrame:
+    """MAPE, MASE, interval coverage and fit cost per model.
+
+    MAPE skips months with no incidents; MASE scales each fold's errors by
+    its own training window's seasonal-naive MAE, so values below 1 beat
+    repeating last year in-sample.
+    """
+    rows = []
+    for model, seconds in fit_seconds.items():
+        f = folds[folds["model"] == model]
+        err = (f["actual"] - f["forecast"]).abs()
+        nonzero = f["actual"] != 0
+        scaled = err / f["scale"].where(f["scale"] > 0)
+        covered = (f["actual"] >= f["lower"]) & (f["actual"] <= f["upper"])
+        rows.append({
+            "model": model,
+            "folds": len(seconds),
+            "failed": failed[model],
+            "MAPE %": 100 * (err[nonzero] / f.loc[nonzero, "actual"].abs()).mean(),
+            "MASE": scaled.mean(),
+            "coverage %": 100 * covered.mean() if len(f) else np.nan,
+            "fit CPU s/fold": float(np.mean(seconds)) if seconds else np.nan,
+            "total fit CPU s": float(np.sum(seconds)),
+        })
+    return pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+
+
+class BacktestJob:
+    """Runs ``backtest`` on a background thread and exposes its state."""
+
+    def __init__(self, ts: pd.Series, **kwargs):
+        origins = rolling_origins(len(ts), kwargs.get("horizon", STEPS), MIN_MONTHS,
+                                  kwargs.get("step", ORIGIN_STEP))
+        self.total = len(origins) * len(kwargs.get("models", MODELS))
+        self.done = 0
+        self.folds = None
+        self.summary = None
+        self.error = None
+        self._finished = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ts,), kwargs=kwargs,
+                                        name="backtest", daemon=True)
+        self._thread.start()
+
+    def _progress(self, done: int, total: int):
+        self.done = done
+
+    def _run(self, ts: pd.Series, **kwargs):
+        try:
+            self.folds, self.summary = backtest(ts, progress=self._progress, **kwargs)
+        except Exception as e:
+            self.error = e
+        finally:
+            self._finished.set()
+
+    @property
+    def finished(self) -> bool:
+        return self._finished.is_set()
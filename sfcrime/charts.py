@@ -0,0 +1,233 @@
+"""Plotly figures of the dashboard, built from a cube slice or filtered rows.
+
+The builders know nothing about Streamlit: app.py caches and draws them,
+and ``sfcrime.precompute`` renders the same figures in batch.
+"""
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from sfcrime import perf
+from sfcrime.binning import hex_geojson, hexbin
+from sfcrime.schema import WEEKDAYS
+from sfcrime.shapes import neighborhood_geojson
+
+SF_CENTER = {"lat": 37.76, "lon": -122.44}
+
+
+def trend_figures(view) -> dict:
+    """Monthly trend and the top neighborhoods and categories (tab 1)."""
+    with perf.stage("groupby.month"):
+        monthly = view.counts_by("month")
+        monthly = monthly[monthly > 0].reset_index()
+    with perf.stage("figure.monthly_trend"):
+        fig_ts = px.line(
+            monthly,
+            x="month",
+            y="incidents",
+            markers=True,
+            labels={"month": "Month", "incidents": "Incidents"}
+        )
+        fig_ts.update_layout(height=350)
+
+    with perf.stage("groupby.neighborhood"):
+        top_nbh = (
+            view.counts_by("neighborhood")
+            .nlargest(10)
+            .reset_index()
+        )
+    with perf.stage("figure.top_neighborhoods"):
+        fig_bar = px.bar(
+            top_nbh,
+            x="incidents",
+            y="neighborhood",
+            orientation="h",
+            labels={"incidents": "Incidents", "neighborhood": ""},
+            color="incidents",
+            color_continuous_scale="Viridis",
+            text_auto=".2s"
+        )
+        fig_bar.update_layout(height=350, yaxis={"categoryorder": "total ascending"})
+
+    with perf.stage("groupby.category"):
+        top_cat = (
+            view.counts_by("category")
+            .nlargest(10)
+            .reset_index()
+        )
+    with perf.stage("figure.top_categories"):
+        fig_cat = px.bar(
+            top_cat,
+            x="category",
+            y="incidents",
+            labels={"category": "Category", "incidents": "Incidents"},
+            color="incidents",
+            color_continuous_scale="Plasma",
+            text_auto=".2s"
+        )
+    return {"monthly_trend": fig_ts, "top_neighborhoods": fig_bar, "top_categories": fig_cat}
+
+
+def pattern_figures(view) -> dict:
+    """Hour x weekday heatmap and the hourly and weekday profiles (tab 2)."""
+    with perf.stage("groupby.weekday_hour"):
+        heat = view.counts_by_pair("weekday", "hour").stack().rename("incidents")
+        heat = heat[heat > 0].reset_index()
+
+        heat["weekday"] = pd.Categorical(
+            heat["weekday"], categories=WEEKDAYS, ordered=True
+        )
+        heat = heat.sort_values(["weekday", "hour"], ascending=[False, True])
+    with perf.stage("figure.hour_weekday_heatmap"):
+        fig_heat = px.density_heatmap(
+            heat,
+            x="hour",
+            y="weekday",
+            z="incidents",
+            nbinsx=24,
+            labels={"hour": "Hour", "weekday": "Weekday", "z": "Incidents"},
+            color_continuous_scale="Reds"
+        )
+        fig_heat.update_layout(height=450)
+
+    with perf.stage("groupby.hour"):
+        hourly = view.counts_by("hour")
+        hourly = hourly[hourly > 0].reset_index()
+    with perf.stage("figure.hourly_pattern"):
+        fig_hour = px.line(hourly, x="hour", y="incidents", markers=True)
+
+    with perf.stage("groupby.weekday"):
+        wk = view.counts_by("weekday").reindex(WEEKDAYS).reset_index()
+    with perf.stage("figure.weekday_pattern"):
+        fig_wk = px.bar(wk, x="weekday", y="incidents", text_auto=True)
+    return {"hour_weekday_heatmap": fig_heat, "hourly_pattern": fig_hour, "weekday_pattern": fig_wk}
+
+
+def hexbin_figure(lat: np.ndarray, lon: np.ndarray, hex_size: float) -> tuple:
+    """``(figure, cells drawn)`` of the hexagonal density map (tab 3)."""
+    # Binned server-side; only occupied cells are sent to the browser
+    with perf.stage("hexbin", rows=len(lat)):
+        cells = hexbin(lat, lon, hex_size)
+
+    with perf.stage("figure.hexbin_map", rows=len(cells)):
+        fig_hex = go.Figure(
+            go.Choroplethmap(
+                geojson=hex_geojson(cells, hex_size),
+                locations=np.arange(len(cells)),
+                z=cells["incidents"],
+                colorscale="YlOrRd",
+                marker_opacity=0.7,
+                marker_line_width=0,
+                colorbar_title="Incidents",
+                hovertemplate="%{z:,} incidents<extra></extra>"
+            )
+        )
+        fig_hex.update_layout(
+            height=550,
+            map_style="carto-positron",
+            map_zoom=11.3,
+            map_center=SF_CENTER,
+            margin=dict(l=0, r=0, t=0, b=0)
+        )
+    return fig_hex, len(cells)
+
+
+def neighborhood_figure(view):
+    """Choropleth of incidents per analysis neighborhood (tab 3)."""
+    nbhd_counts = view.counts_by("neighborhood").reset_index()
+    with perf.stage("figure.neighborhood_choropleth"):
+        fig_choro = px.choropleth_map(
+            nbhd_counts,
+            geojson=neighborhood_geojson(),
+            locations="neighborhood",
+            color="incidents",
+            color_continuous_scale="Viridis",
+            map_style="carto-positron",
+            zoom=11.3,
+            center=SF_CENTER,
+            opacity=0.6,
+            labels={"incidents": "Incidents", "neighborhood": "Neighborhood"}
+        )
+        fig_choro.update_layout(height=550, margin=dict(l=0, r=0, t=0, b=0))
+    return fig_choro
+
+
+def forecast_figure(history: pd.Series, forecast_df: pd.DataFrame, title: str):
+    """Historical monthly line plus the forecast and its confidence band."""
+    historical_df = history.reset_index(name="incidents")
+    historical_df.columns = ["month", "incidents"]
+
+    fig = px.line(
+        historical_df,
+        x="month",
+        y="incidents",
+        markers=True,
+        title=title
+    )
+
+    # Add Forecast line
+    fig.add_trace(
+        go.Scatter(
+            x=forecast_df["month"],
+            y=forecast_df["forecast"],
+            mode="lines+markers",
+            name="Forecast",
+            line=dict(color="#d62728", dash="dash") # Red
+        )
+    )
+    # Add Confidence Interval bounds
+    fig.add_trace(
+        go.Scatter(
+            x=forecast_df["month"],
+            y=forecast_df["lower"],
+            mode="lines",
+            line=dict(width=0),
+            showlegend=False
+        )
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=forecast_df["month"],
+            y=forecast_df["upper"],
+            mode="lines",
+            line=dict(width=0),
+            fill="tonexty",
+            fillcolor="rgba(214, 39, 40, 0.2)", # Light Red Fill
+            name="Confidence Interval"
+        )
+    )
+
+    fig.update_layout(height=500, showlegend=True)
+    return fig
+
+
+def rolling_figure(rolling: pd.Series, year_ago: pd.Series, window: int):
+    """Trailing ``window``-day counts with the same series 52 weeks earlier."""
+    with perf.stage("figure.rolling_trend"):
+        fig = go.Figure()
+        fig.add_trace(
+            go.Scatter(
+                x=rolling.index,
+                y=rolling.to_numpy(),
+                mode="lines",
+                name=f"Last {window} days",
+                line=dict(color="#1f77b4")
+            )
+        )
+        fig.add_trace(
+            go.Scatter(
+                x=year_ago.index,
+                y=year_ago.to_numpy(),
+                mode="lines",
+                name="Same window a year earlier",
+                line=dict(color="#7f7f7f", dash="dot")
+            )
+        )
+        fig.update_layout(
+            height=400,
+            xaxis_title="Window end",
+            yaxis_title="Incidents",
+            legend=dict(orientation="h", y=1.1)
+        )
+    return fig
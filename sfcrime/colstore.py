@@ -0,0 +1,178 @@
+"""Read-only column store shared by every dashboard process.
+
+Each snapshot state is published once as a versioned directory of ``.npy``
+files: one per numeric column, the integer codes of each categorical, and
+the packed bitsets of the sidebar ``FilterIndex``. Readers open the files
+with ``np.load(mmap_mode="r")`` and wrap them in a DataFrame without
+copying, so the pages live in the OS page cache and are shared by all
+Streamlit workers on the host; a session's filtered view is an array of
+row positions into that frame, never a copy of it.
+
+A version directory is written under a temporary name and renamed into
+place, so readers only ever see complete versions. The ``CURRENT`` file
+names the version sessions should read; it is replaced atomically, so
+switching the whole app to a new dataset is a single rename. The mapped
+arrays are read-only; any attempt to modify the frame in place raises.
+"""
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sfcrime import DATA_DIR
+from sfcrime.filter_index import FilterIndex
+from sfcrime.schema import COLUMNS, SCHEMA_VERSION
+
+COLUMN_DIR = DATA_DIR / "columns"
+META = "meta.json"
+CURRENT = "CURRENT"
+FILTER_BITMAPS = "filter_index.npy"
+# Older versions kept for processes that still have them mapped
+KEEP_VERSIONS = 2
+
+
+def store_version(manifest: dict) -> str:
+    """Version name for the snapshot state described by ``manifest``.
+
+    A sync that adds no rows leaves the version, and so the published
+    files every worker maps, unchanged.
+    """
+    key = json.dumps([SCHEMA_VERSION, manifest.get("max_incident_datetime"), manifest.get("rows")])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def exists(version: str, root: Path = COLUMN_DIR) -> bool:
+    return (Path(root) / version / META).exists()
+
+
+def current_version(root: Path = COLUMN_DIR) -> str | None:
+    """Version named by the ``CURRENT`` pointer, or ``None`` before the first publish."""
+    try:
+        version = (Path(root) / CURRENT).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    return version if exists(version, root) else None
+
+
+def set_current(version: str, root: Path = COLUMN_DIR):
+    """Point ``CURRENT`` at a published ``version`` (atomic rename)."""
+    if not exists(version, root):
+        raise FileNotFoundError(f"column store {version} has not been published")
+    tmp = Path(root) / f".{CURRENT}.{os.getpid()}.tmp"
+    tmp.write_text(version, encoding="utf-8")
+    os.replace(tmp, Path(root) / CURRENT)
+
+
+def publish(df: pd.DataFrame, version: str, root: Path = COLUMN_DIR) -> Path:
+    """Write ``df`` (and its filter index) as column store ``version``."""
+    root = Path(root)
+    final = root / version
+    if exists(version, root):
+        return final
+    tmp = root / f".{version}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    try:
+        categories = {}
+        for col in COLUMNS:
+            s = df[col]
+            if isinstance(s.dtype, pd.CategoricalDtype):
+                # Saved in pandas' own code dtype so reading back needs no cast
+                np.save(tmp / f"{col}.codes.npy", s.array.codes)
+                categories[col] = [str(c) for c in s.cat.categories]
+            else:
+                np.save(tmp / f"{col}.npy", s.to_numpy())
+
+        index = FilterIndex(df)
+        keys, bitmaps = [], []
+        for dim, values in index.bitmaps.items():
+            for value, bits in values.items():
+                keys.append([dim, value])
+                bitmaps.append(bits)
+        np.save(tmp / FILTER_BITMAPS, np.vstack(bitmaps) if bitmaps else np.zeros((0, 0), np.uint8))
+
+        meta = {
+            "version": version,
+            "schema_version": SCHEMA_VERSION,
+            "rows": len(df),
+            "categories": categories,
+            "filter_index": keys,
+        }
+        with open(tmp / META, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        try:
+            os.replace(tmp, final)
+        except OSError:
+            # Another process published the same version first
+            if not exists(version, root):
+                raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    prune(root)
+    return final
+
+
+def prune(root: Path = COLUMN_DIR, keep: int = KEEP_VERSIONS):
+    """Delete all but the ``keep`` most recently published versions.
+
+    The ``CURRENT`` version is never deleted. Processes that still map a
+    deleted version keep reading it; the files are only freed once the
+    last mapping goes away.
+    """
+    current = current_version(root)
+    versions = sorted(
+        (p for p in Path(root).iterdir() if p.is_dir() and not p.name.startswith(".")),
+        key=lambda p: p.stat().st_mtime, reverse=True
+    )
+    for path in versions[keep:]:
+        if path.name == current:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+
+
+class ColumnStore:
+    """One published version, opened as memory-mapped arrays."""
+
+    def __init__(self, version: str, root: Path = COLUMN_DIR):
+        self.version = version
+        self.path = Path(root) / version
+        with open(self.path / META, encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta["schema_version"] != SCHEMA_VERSION:
+            raise ValueError(f"column store {version} has schema {self.meta['schema_version']}")
+        self.frame = self._frame()
+
+    def _map(self, name: str) -> np.ndarray:
+        # A plain read-only ndarray view of the mapping, not an np.memmap,
+        # so derived arrays do not carry the subclass around
+        return np.asarray(np.load(self.path / name, mmap_mode="r"))
+
+    def _frame(self) -> pd.DataFrame:
+        columns = {}
+        for col in COLUMNS:
+            if col in self.meta["categories"]:
+                values = pd.Categorical.from_codes(
+                    self._map(f"{col}.codes.npy"), self.meta["categories"][col], validate=False
+                )
+            else:
+                values = self._map(f"{col}.npy")
+            columns[col] = pd.Series(values, name=col, copy=False)
+        return pd.DataFrame(columns, copy=False)
+
+    def filter_index(self) -> FilterIndex:
+        """The sidebar index, its bitsets mapped rather than rebuilt."""
+        bitmaps = {}
+        rows = self._map(FILTER_BITMAPS)
+        for i, (dim, value) in enumerate(self.meta["filter_index"]):
+            bitmaps.setdefault(dim, {})[value] = rows[i]
+        # Dimensions with no values at all are filled in by from_bitmaps
+        return FilterIndex.from_bitmaps(self.meta["rows"], bitmaps)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the mapped files (shared, not per process)."""
+        return sum(p.stat().st_size for p in self.path.glob("*.npy"))
@@ -0,0 +1,131 @@
+"""Pre-aggregated count cube behind the dashboard charts.
+
+Incidents are counted once per load into the cells of
+month x neighborhood x category x weekday x hour. Only occupied cells are
+stored (coordinate form: one small-int code array per dimension plus a
+count), together with the first and last incident date in each cell so the
+"Average per day" metric can be answered exactly. Every chart and summary
+metric is then a mask over cells followed by ``np.bincount``; no query
+touches the raw incident rows.
+"""
+import numpy as np
+import pandas as pd
+
+from sfcrime.schema import HOUR_MISSING
+
+DIMENSIONS = ("month", "neighborhood", "category", "weekday", "hour")
+HOURS = list(range(HOUR_MISSING, 24))
+
+
+def _codes(df: pd.DataFrame, dim: str) -> tuple:
+    """Return ``(labels, codes)`` for one cube dimension."""
+    s = df[dim]
+    if dim == "month":
+        months = s.to_numpy().astype("datetime64[M]").astype(np.int64)
+        first = int(months.min()) if len(months) else 0
+        n = int(months.max()) - first + 1 if len(months) else 0
+        labels = pd.date_range(np.datetime64(first, "M"), periods=n, freq="MS")
+        return labels, months - first
+    if dim == "hour":
+        return HOURS, s.to_numpy().astype(np.int64) - HOUR_MISSING
+    return list(s.cat.categories), s.cat.codes.to_numpy().astype(np.int64)
+
+
+class CountCube:
+    """Sparse incident counts over the five filter dimensions."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.labels = {}
+        key = np.zeros(len(df), dtype=np.int64)
+        radix = []
+        for dim in DIMENSIONS:
+            labels, codes = _codes(df, dim)
+            self.labels[dim] = labels
+            radix.append(len(labels))
+            key = key * len(labels) + codes
+        # Rows with a missing categorical code never reach a chart
+        valid = np.ones(len(df), dtype=bool)
+        for dim in ("neighborhood", "category", "weekday"):
+            valid &= df[dim].cat.codes.to_numpy() >= 0
+        key = key[valid]
+        days = df["date"].to_numpy()[valid].astype("datetime64[D]").astype(np.int32)
+
+        order = np.argsort(key, kind="stable")
+        key, days = key[order], days[order]
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]]) if len(key) else np.array([], int)
+
+        self.counts = np.diff(np.r_[starts, len(key)]).astype(np.int32)
+        self.first_day = np.minimum.reduceat(days, starts) if len(key) else days
+        self.last_day = np.maximum.reduceat(days, starts) if len(key) else days
+
+        # Decode the mixed-radix cell keys back into per-dimension codes
+        cell_key = key[starts]
+        self.codes = {}
+        for dim, size in zip(reversed(DIMENSIONS), reversed(radix)):
+            self.codes[dim] = (cell_key % size).astype(np.int16)
+            cell_key = cell_key // size
+
+        self.years = self.labels["month"].year.to_numpy()
+
+    @property
+    def n_cells(self) -> int:
+        return len(self.counts)
+
+    def _lut(self, dim: str, selected) -> np.ndarray:
+        selected = set(selected)
+        return np.array([v in selected for v in self.labels[dim]], dtype=bool)
+
+    def select(self, years: tuple | None = None, neighborhoods=None, categories=None,
+               weekdays=None, hours: tuple | None = None) -> "CubeSlice":
+        """Cells matching the sidebar filters; ``None`` leaves a dimension open."""
+        mask = np.ones(self.n_cells, dtype=bool)
+        if years is not None:
+            mask &= ((self.years >= years[0]) & (self.years <= years[1]))[self.codes["month"]]
+        for dim, selected in (("neighborhood", neighborhoods), ("category", categories),
+                              ("weekday", weekdays)):
+            if selected is not None:
+                mask &= self._lut(dim, selected)[self.codes[dim]]
+        if hours is not None:
+            # HOUR_MISSING is never inside an hour range
+            mask &= self._lut("hour", range(hours[0], hours[1] + 1))[self.codes["hour"]]
+        return CubeSlice(self, mask)
+
+
+class CubeSlice:
+    """Aggregations over a selected set of cube cells."""
+
+    def __init__(self, cube: CountCube, mask: np.ndarray):
+        self.cube = cube
+        self.mask = mask
+        self._counts = cube.counts[mask]
+
+    def total(self) -> int:
+        return int(self._counts.sum())
+
+    def counts_by(self, dim: str) -> pd.Series:
+        """Incident count for every label of ``dim`` (zeros included)."""
+        labels = self.cube.labels[dim]
+        counts = np.bincount(self.cube.codes[dim][self.mask], weights=self._counts,
+                             minlength=len(labels)).astype(np.int64)
+        return pd.Series(counts, index=pd.Index(labels, name=dim), name="incidents")
+
+    def counts_by_pair(self, row_dim: str, col_dim: str) -> pd.DataFrame:
+        """Two-way count table with ``row_dim`` labels as rows."""
+        rows, cols = self.cube.labels[row_dim], self.cube.labels[col_dim]
+        flat = (self.cube.codes[row_dim][self.mask].astype(np.int64) * len(cols)
+                + self.cube.codes[col_dim][self.mask])
+        counts = np.bincount(flat, weights=self._counts, minlength=len(rows) * len(cols))
+        return pd.DataFrame(counts.astype(np.int64).reshape(len(rows), len(cols)),
+                            index=pd.Index(rows, name=row_dim),
+                            columns=pd.Index(cols, name=col_dim))
+
+    def n_distinct(self, dim: str) -> int:
+        return int((self.counts_by(dim) > 0).sum())
+
+    def span_days(self) -> int:
+        """Days from the first to the last selected incident, inclusive."""
+        if not self._counts.size:
+            return 0
+        first = self.cube.first_day[self.mask].min()
+        last = self.cube.last_day[self.mask].max()
+        return int(last - first) + 1
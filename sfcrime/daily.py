@@ -0,0 +1,313 @@
+"""Daily incident counts with prefix sums, behind the rolling-window panels.
+
+Incidents are counted per day x neighborhood x category over the fixed
+``START_YEAR``-``END_YEAR`` day axis, and only the running total along
+the day axis is kept: ``prefix[d]`` holds the counts of every day before
+``d``, so the count of any window ``[start, end]`` is
+``prefix[end + 1] - prefix[start]`` whatever its length. Rolling 7/28-day
+series, year-over-year deltas and the anomaly table are all differences
+of such rows; none of them touches the incident rows.
+
+Each column store version gets its own published copy (a ``.npy`` plus
+``meta.json``, written under a temporary name and renamed into place,
+as in ``sfcrime.colstore``) that readers memory-map. A refresh does not
+rebuild it: ``update`` counts only the rows the sync added and adds
+their running totals onto the previous version's prefix sums.
+"""
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sfcrime import DATA_DIR, colstore
+from sfcrime.ingest import END_YEAR, START_YEAR
+from sfcrime.schema import CATEGORY_LISTS, SCHEMA_VERSION
+
+DAILY_DIR = DATA_DIR / "daily"
+META = "meta.json"
+PREFIX = "prefix.npy"
+# Older versions kept for processes that still have them mapped
+KEEP_VERSIONS = 2
+
+FIRST_DAY = np.datetime64(f"{START_YEAR}-01-01", "D")
+N_DAYS = int((np.datetime64(f"{END_YEAR + 1}-01-01", "D") - FIRST_DAY) // np.timedelta64(1, "D"))
+WINDOWS = (7, 28)
+# Year-over-year compares with the window 52 weeks earlier, so both
+# windows cover the same weekdays
+YOY_DAYS = 364
+# Anomaly baseline: this many earlier, non-overlapping windows
+BASELINE_WINDOWS = 12
+ANOMALY_Z = 2.0
+
+AXES = ("neighborhood", "category")
+
+
+def _labels(previous: list, observed) -> list:
+    """``previous`` followed by any unseen ``observed`` values (sorted)."""
+    known = set(previous)
+    return list(previous) + sorted(v for v in set(observed) if v not in known)
+
+
+class DailyCounts:
+    """Prefix sums of daily counts per neighborhood and category."""
+
+    def __init__(self, prefix: np.ndarray, labels: dict, rows: int, last_day: int):
+        # prefix: (N_DAYS + 1, neighborhoods, categories), int32
+        self.prefix = prefix
+        self.labels = labels
+        self.rows = rows
+        self.last_day = last_day
+        self.days = pd.date_range(FIRST_DAY, periods=N_DAYS, freq="D")
+
+    # --------------------------------------------------
+    # Building and incremental updates
+    # --------------------------------------------------
+    @classmethod
+    def empty(cls) -> "DailyCounts":
+        labels = {axis: list(CATEGORY_LISTS[axis]) for axis in AXES}
+        prefix = np.zeros((N_DAYS + 1, len(labels["neighborhood"]), len(labels["category"])), np.int32)
+        return cls(prefix, labels, 0, -1)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "DailyCounts":
+        return cls.empty().update(df)
+
+    def update(self, df: pd.DataFrame) -> "DailyCounts":
+        """A new store holding these counts plus the rows of ``df``.
+
+        Only ``df`` is scanned. Its running totals are added to the prefix
+        rows from its first day on; rows after its last day move by its
+        total, so appending new days leaves the older rows as they were.
+        """
+        labels = {axis: _labels(self.labels[axis], df[axis].cat.categories) for axis in AXES}
+        prefix = np.zeros((N_DAYS + 1, len(labels["neighborhood"]), len(labels["category"])), np.int32)
+        prefix[:, :self.prefix.shape[1], :self.prefix.shape[2]] = self.prefix
+        out = DailyCounts(prefix, labels, self.rows + len(df), self.last_day)
+
+        day = (df["date"].to_numpy().astype("datetime64[D]") - FIRST_DAY).astype(np.int64)
+        valid = (day >= 0) & (day < N_DAYS)
+        codes = {}
+        for axis in AXES:
+            # The frame's category codes, translated to this store's label order
+            lookup = {v: i for i, v in enumerate(labels[axis])}
+            lut = np.array([lookup[v] for v in df[axis].cat.categories] + [-1], dtype=np.int64)
+            codes[axis] = lut[df[axis].cat.codes.to_numpy()]
+            # Incidents without a neighborhood or category never reach a chart
+            valid &= codes[axis] >= 0
+        if not valid.any():
+            return out
+
+        day = day[valid]
+        cell = codes["neighborhood"][valid] * len(labels["category"]) + codes["category"][valid]
+        first, last = int(day.min()), int(day.max())
+        span = last - first + 1
+        counts = np.bincount((day - first) * prefix[0].size + cell, minlength=span * prefix[0].size)
+        running = np.cumsum(counts.reshape(span, *prefix.shape[1:]), axis=0, dtype=np.int32)
+
+        prefix[first + 1:last + 2] += running
+        prefix[last + 2:] += running[-1]
+        out.last_day = max(self.last_day, last)
+        return out
+
+    # --------------------------------------------------
+    # Queries
+    # --------------------------------------------------
+    def day_index(self, day) -> int:
+        return int((pd.Timestamp(day).to_datetime64().astype("datetime64[D]") - FIRST_DAY) // np.timedelta64(1, "D"))
+
+    def _mask(self, axis: str, selected) -> np.ndarray:
+        if selected is None:
+            return np.ones(len(self.labels[axis]), dtype=np.int32)
+        selected = set(selected)
+        return np.array([v in selected for v in self.labels[axis]], dtype=np.int32)
+
+    def cumulative(self, neighborhoods=None, categories=None, by: str | None = None) -> np.ndarray:
+        """Prefix sums of the selection: ``(N_DAYS + 1,)``, or one column per ``by`` label.
+
+        One pass over the stored prefix rows, independent of the number
+        of incidents; every window below is then two lookups.
+        """
+        n_mask = self._mask("neighborhood", neighborhoods)
+        c_mask = self._mask("category", categories)
+        by_neighborhood = self.prefix @ c_mask
+        if by == "neighborhood":
+            return by_neighborhood * n_mask
+        if by == "category":
+            return np.einsum("dnc,n->dc", self.prefix, n_mask) * c_mask
+        return by_neighborhood @ n_mask
+
+    def window_sum(self, start, end, neighborhoods=None, categories=None) -> int:
+        """Incidents from day ``start`` to ``end``, inclusive."""
+        s, e = self.day_index(start), self.day_index(end)
+        s, e = max(s, 0), min(e, N_DAYS - 1)
+        if e < s:
+            return 0
+        n_mask = self._mask("neighborhood", neighborhoods).astype(bool)
+        c_mask = self._mask("category", categories).astype(bool)
+        diff = self.prefix[e + 1] - self.prefix[s]
+        return int(diff[np.ix_(n_mask, c_mask)].sum(dtype=np.int64))
+
+    def rolling(self, window: int, neighborhoods=None, categories=None) -> pd.Series:
+        """Trailing ``window``-day counts for every day with a full window of data."""
+        cum = self.cumulative(neighborhoods, categories)
+        end = self.last_day + 1
+        if end < window:
+            return pd.Series([], dtype=np.int64, name="incidents")
+        counts = cum[window:end + 1] - cum[:end + 1 - window]
+        return pd.Series(counts.astype(np.int64), index=self.days[window - 1:end],
+                         name="incidents").rename_axis("date")
+
+    def anomalies(self, by: str, window: int, as_of=None, neighborhoods=None, categories=None,
+                  n_baseline: int = BASELINE_WINDOWS, threshold: float = ANOMALY_Z) -> pd.DataFrame:
+        """Latest ``window``-day count per ``by`` label against its own history.
+
+        The window ends on ``as_of`` (default: the last day with data).
+        ``baseline`` and ``std`` are over the ``n_baseline`` windows just
+        before it, ``z`` is the current count's distance from that
+        baseline, and ``yoy`` is the change against the same window
+        ``YOY_DAYS`` earlier. Labels with ``|z| >= threshold`` are flagged.
+        """
+        end = self.last_day if as_of is None else min(self.day_index(as_of), self.last_day)
+        cum = self.cumulative(neighborhoods, categories, by=by)
+
+        def counts(last: int) -> np.ndarray:
+            # Windows reaching before the first day are undefined
+            if last - window + 1 < 0:
+                return np.full(cum.shape[1], np.nan)
+            return (cum[last + 1] - cum[last + 1 - window]).astype(float)
+
+        current = counts(end)
+        year_ago = counts(end - YOY_DAYS)
+        # Only baseline windows that lie inside the day axis
+        history = [counts(end - k * window) for k in range(1, n_baseline + 1)
+                   if end - (k + 1) * window + 1 >= 0]
+        if len(history) > 1:
+            baseline = np.mean(history, axis=0)
+            std = np.std(history, axis=0, ddof=1)
+        else:
+            baseline = std = np.full_like(current, np.nan)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # A flat or missing history (std 0 or NaN) flags nothing
+            z = np.where(std > 0, (current - baseline) / std, 0.0)
+            yoy = np.where(year_ago > 0, current / year_ago - 1, np.nan)
+
+        frame = pd.DataFrame({
+            by: self.labels[by],
+            "incidents": current,
+            "year_ago": year_ago,
+            "yoy": yoy,
+            "baseline": baseline,
+            "std": std,
+            "z": z,
+        })
+        frame["anomaly"] = np.where(frame["z"] >= threshold, "high",
+                                    np.where(frame["z"] <= -threshold, "low", ""))
+        selected = neighborhoods if by == "neighborhood" else categories
+        if selected is not None:
+            frame = frame[frame[by].isin(set(selected))]
+        frame = frame[(frame["incidents"] > 0) | (frame["baseline"] > 0)]
+        return frame.sort_values("z", ascending=False, key=np.abs).reset_index(drop=True)
+
+    @property
+    def nbytes(self) -> int:
+        return self.prefix.nbytes
+
+    # --------------------------------------------------
+    # Persistence
+    # --------------------------------------------------
+    def publish(self, version: str, root: Path = DAILY_DIR) -> Path:
+        """Write the store as ``version`` (the column store version it counts)."""
+        root = Path(root)
+        final = root / version
+        if exists(version, root):
+            return final
+        tmp = root / f".{version}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        try:
+            np.save(tmp / PREFIX, self.prefix)
+            meta = {
+                "version": version,
+                "schema_version": SCHEMA_VERSION,
+                "first_day": str(FIRST_DAY),
+                "rows": self.rows,
+                "last_day": self.last_day,
+                "labels": self.labels,
+            }
+            with open(tmp / META, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            try:
+                os.replace(tmp, final)
+            except OSError:
+                # Another process published the same version first
+                if not exists(version, root):
+                    raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        prune(root)
+        return final
+
+    @classmethod
+    def open(cls, version: str, root: Path = DAILY_DIR) -> "DailyCounts":
+        """A published version, its prefix sums memory-mapped read-only."""
+        path = Path(root) / version
+        with open(path / META, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["schema_version"] != SCHEMA_VERSION or meta["first_day"] != str(FIRST_DAY):
+            raise ValueError(f"daily counts {version} were written for another schema or day axis")
+        prefix = np.asarray(np.load(path / PREFIX, mmap_mode="r"))
+        return cls(prefix, meta["labels"], meta["rows"], meta["last_day"])
+
+
+def exists(version: str, root: Path = DAILY_DIR) -> bool:
+    return (Path(root) / version / META).exists()
+
+
+def prune(root: Path = DAILY_DIR, keep: int = KEEP_VERSIONS):
+    """Delete all but the ``keep`` most recently published versions."""
+    current = colstore.current_version()
+    versions = sorted(
+        (p for p in Path(root).iterdir() if p.is_dir() and not p.name.startswith(".")),
+        key=lambda p: p.stat().st_mtime, reverse=True
+    )
+    for path in versions[keep:]:
+        if path.name != current:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def publish_update(version: str, new_rows: pd.DataFrame | None, base: str | None, frame,
+                   root: Path = DAILY_DIR) -> DailyCounts:
+    """Publish the counts for ``version`` unless they exist; returns them.
+
+    When ``base`` (the version before the sync that fetched ``new_rows``)
+    is published and ``base`` plus ``new_rows`` accounts for every row of
+    ``version``, only ``new_rows`` are counted. Otherwise (first run, a
+    schema change, a full refetch) the counts are built from ``frame()``,
+    the whole table of ``version``.
+    """
+    if exists(version, root):
+        return DailyCounts.open(version, root)
+    counts = None
+    if base is not None and new_rows is not None and exists(base, root):
+        try:
+            previous = DailyCounts.open(base, root)
+        except ValueError:
+            previous = None
+        expected = _version_rows(version)
+        if previous is not None and (expected is None or previous.rows + len(new_rows) == expected):
+            counts = previous.update(new_rows)
+    if counts is None:
+        counts = DailyCounts.from_frame(frame())
+    counts.publish(version, root)
+    return counts
+
+
+def _version_rows(version: str) -> int | None:
+    try:
+        with open(colstore.COLUMN_DIR / version / colstore.META, encoding="utf-8") as f:
+            return json.load(f)["rows"]
+    except (OSError, ValueError, KeyError):
+        return None
@@ -0,0 +1,118 @@
+"""On-demand export of dashboard figures and filtered data.
+
+PNG rendering through kaleido is by far the most expensive thing a figure
+can do, so it only happens when a download is actually requested. Rendered
+images are memoized in a small LRU keyed by a hash of the figure spec, so
+downloading an unchanged chart again costs nothing.
+
+Filtered data is likewise written only on request, chunk by chunk into a
+spooled temporary file (in memory up to ``SPOOL_MAX_BYTES``, then on disk),
+as plain CSV, gzip-compressed CSV or Parquet.
+"""
+import gzip
+import hashlib
+import importlib.util
+import io
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from sfcrime import perf
+from sfcrime.schema import HOUR_MISSING
+
+PNG_CACHE_SIZE = 32
+PNG_SCALE = 2
+
+EXPORT_CHUNK_ROWS = 100_000
+SPOOL_MAX_BYTES = 32 * 2**20
+
+# Label -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+_png_cache = OrderedDict()
+_png_lock = threading.Lock()
+
+
+def png_export_available() -> bool:
+    """Whether kaleido (needed by ``fig.to_image``) is installed."""
+    return importlib.util.find_spec("kaleido") is not None
+
+
+def figure_png(fig, scale: int = PNG_SCALE) -> bytes:
+    """Render ``fig`` to PNG bytes, reusing a cached image when the spec is unchanged."""
+    key = (hashlib.sha256(fig.to_json().encode("utf-8")).hexdigest(), scale)
+    with _png_lock:
+        if key in _png_cache:
+            _png_cache.move_to_end(key)
+            return _png_cache[key]
+
+    with perf.stage("kaleido.export"):
+        img_bytes = fig.to_image(format="png", scale=scale)
+
+    with _png_lock:
+        _png_cache[key] = img_bytes
+        while len(_png_cache) > PNG_CACHE_SIZE:
+            _png_cache.popitem(last=False)
+    return img_bytes
+
+
+# --------------------------------------------------
+# Filtered data export
+# --------------------------------------------------
+def _for_export(chunk: pd.DataFrame) -> pd.DataFrame:
+    """``chunk`` with an unknown hour (``HOUR_MISSING``) written as empty."""
+    if "hour" not in chunk:
+        return chunk
+    hour = chunk["hour"].astype("Int8")
+    return chunk.assign(hour=hour.mask(hour == HOUR_MISSING))
+
+
+def _chunks(df: pd.DataFrame, rows: np.ndarray):
+    for start in range(0, len(rows), EXPORT_CHUNK_ROWS):
+        yield _for_export(df.take(rows[start:start + EXPORT_CHUNK_ROWS]))
+
+
+def _write_csv(df: pd.DataFrame, rows: np.ndarray, binary):
+    text = io.TextIOWrapper(binary, encoding="utf-8", newline="")
+    header = True
+    for chunk in _chunks(df, rows):
+        chunk.to_csv(text, index=False, header=header)
+        header = False
+    if header:
+        # No rows selected: still emit the column header
+        _for_export(df.head(0)).to_csv(text, index=False)
+    text.flush()
+    text.detach()
+
+
+def _write_parquet(df: pd.DataFrame, rows: np.ndarray, binary):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(_for_export(df.head(0)), preserve_index=False)
+    with pq.ParquetWriter(binary, schema) as writer:
+        for chunk in _chunks(df, rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def export_rows(df: pd.DataFrame, rows: np.ndarray, fmt: str = "CSV"):
+    """Write ``df`` rows at positions ``rows`` in ``fmt``; returns a rewound file."""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    if fmt == "CSV":
+        _write_csv(df, rows, spool)
+    elif fmt == "CSV (gzip)":
+        with gzip.GzipFile(fileobj=spool, mode="wb", compresslevel=6) as gz:
+            _write_csv(df, rows, gz)
+    elif fmt == "Parquet":
+        _write_parquet(df, rows, spool)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    spool.seek(0)
+    return spool
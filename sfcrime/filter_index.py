@@ -0,0 +1,121 @@
+"""Bitmap index answering the dashboard's sidebar filters.
+
+Built once per dataset load: for every value of every filter dimension
+(year, neighborhood, category, weekday, hour) the index keeps a packed
+bitset of the rows holding that value. A filter is answered by OR-ing the
+bitsets of the selected values within each dimension and AND-ing across
+dimensions, so no column is scanned per rerun.
+"""
+import numpy as np
+import pandas as pd
+
+from sfcrime.schema import HOUR_MISSING
+
+DIMENSIONS = ("year", "neighborhood", "category", "weekday", "hour")
+
+
+def _value_codes(s: pd.Series) -> tuple:
+    """Return ``(values, codes)`` with ``codes`` indexing into ``values``."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return list(s.cat.categories), s.cat.codes.to_numpy()
+    values, codes = np.unique(s.to_numpy(), return_inverse=True)
+    return values.tolist(), codes
+
+
+def _complete_dimensions(bitmaps: dict, n_rows: int) -> set:
+    """Dimensions whose bitsets cover every row (no missing values).
+
+    The bitsets of one dimension are disjoint, so they cover all rows
+    exactly when their bit counts add up to ``n_rows``.
+    """
+    return {dim for dim, by_value in bitmaps.items()
+            if sum(int(np.unpackbits(b, count=n_rows).sum()) for b in by_value.values()) == n_rows}
+
+
+class FilterIndex:
+    """Per-value packed bitsets over the rows of one incident table."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.n_rows = len(df)
+        self._nbytes = (self.n_rows + 7) // 8
+        self._bitmaps = {}
+        for dim in DIMENSIONS:
+            values, codes = _value_codes(df[dim])
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(values) + 1))
+            bitmaps = {}
+            for i, value in enumerate(values):
+                rows = order[bounds[i]:bounds[i + 1]]
+                if len(rows):
+                    bits = np.zeros(self.n_rows, dtype=bool)
+                    bits[rows] = True
+                    bitmaps[value] = np.packbits(bits)
+            self._bitmaps[dim] = bitmaps
+        self._complete = _complete_dimensions(self._bitmaps, self.n_rows)
+
+    @classmethod
+    def from_bitmaps(cls, n_rows: int, bitmaps: dict) -> "FilterIndex":
+        """Index over precomputed bitsets (``{dim: {value: packed bits}}``)."""
+        index = cls.__new__(cls)
+        index.n_rows = n_rows
+        index._nbytes = (n_rows + 7) // 8
+        index._bitmaps = {dim: dict(bitmaps.get(dim, {})) for dim in DIMENSIONS}
+        index._complete = _complete_dimensions(index._bitmaps, n_rows)
+        return index
+
+    @property
+    def bitmaps(self) -> dict:
+        """``{dim: {value: packed bits}}``; the arrays must not be modified."""
+        return self._bitmaps
+
+    def values(self, dim: str) -> list:
+        """Values of ``dim`` that occur in at least one row."""
+        return list(self._bitmaps[dim])
+
+    def _dimension_bits(self, dim: str, selected) -> np.ndarray | None:
+        """OR of the bitsets for ``selected``; ``None`` when nothing is excluded."""
+        bitmaps = self._bitmaps[dim]
+        selected = set(selected)
+        chosen = [v for v in bitmaps if v in selected]
+        complete = dim in self._complete
+        if len(chosen) == len(bitmaps) and complete:
+            return None
+        # OR whichever side is smaller and invert if that was the complement;
+        # rows missing a value are in the complement too, so only invert
+        # when there are none
+        excluded = [v for v in bitmaps if v not in selected]
+        invert = complete and len(excluded) < len(chosen)
+        acc = np.zeros(self._nbytes, dtype=np.uint8)
+        for v in excluded if invert else chosen:
+            np.bitwise_or(acc, bitmaps[v], out=acc)
+        if invert:
+            np.invert(acc, out=acc)
+        return acc
+
+    def select(self, years: tuple, neighborhoods, categories, weekdays,
+               hours: tuple) -> np.ndarray:
+        """Row positions matching the sidebar filters (ranges are inclusive)."""
+        selections = {
+            "year": range(years[0], years[1] + 1),
+            "neighborhood": neighborhoods,
+            "category": categories,
+            "weekday": weekdays,
+            # The missing-hour sentinel never matches an hour range
+            "hour": [h for h in range(hours[0], hours[1] + 1) if h != HOUR_MISSING],
+        }
+        acc = None
+        for dim, selected in selections.items():
+            bits = self._dimension_bits(dim, selected)
+            if bits is None:
+                continue
+            if acc is None:
+                acc = bits
+            else:
+                np.bitwise_and(acc, bits, out=acc)
+        if acc is None:
+            return np.arange(self.n_rows)
+        return np.flatnonzero(np.unpackbits(acc, count=self.n_rows))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(b.nbytes for bitmaps in self._bitmaps.values() for b in bitmaps.values())
@@ -0,0 +1,221 @@
+"""SARIMAX forecasting: the citywide model and batch per-series outlooks.
+
+``batch_forecast`` fits one model per neighborhood and per major incident
+category on a process pool. Each series runs under its own time limit and
+any failure is recorded against that series only, so one bad fit never
+takes down the batch. ``BatchForecastJob`` drives a batch from a background
+thread so the Streamlit script thread never waits on it.
+
+Fits go through the on-disk ``ModelStore`` when given a ``series_id``, so
+restarts and data refreshes reuse previously fitted parameters. With
+``auto_orders`` each series gets its own orders from
+``sfcrime.order_selection`` instead of the fixed ``ORDER`` and
+``SEASONAL_ORDER``.
+"""
+import threading
+from concurrent.futures import as_completed
+
+import pandas as pd
+
+from sfcrime.model_store import ModelStore, series_fingerprint
+from sfcrime.parallel import MAX_WORKERS, process_pool, time_limit
+
+ORDER = (1, 1, 1)
+SEASONAL_ORDER = (1, 1, 1, 12)
+STEPS = 6
+MIN_MONTHS = 24
+
+SERIES_TIMEOUT = 60
+MAJOR_CATEGORIES = 15
+
+FORECAST_COLUMNS = ["kind", "name", "month", "forecast", "lower", "upper"]
+# Suffix of the stored parameters of auto-selected models, so they do not
+# overwrite the fixed-order fit of the same series
+AUTO_SUFFIX = "/auto"
+
+
+# --------------------------------------------------
+# Single series
+# --------------------------------------------------
+def fit_sarimax(ts: pd.Series, order: tuple = ORDER, seasonal_order: tuple = SEASONAL_ORDER,
+                series_id: str | None = None, store: ModelStore | None = None):
+    """Fit the dashboard's SARIMAX configuration to a monthly series.
+
+    With ``series_id``, stored parameters for the series are reused: data
+    identical to the last fit is only re-filtered (``model.smooth``), other
+    data is refitted with the stored parameters as ``start_params``.
+    """
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    model = SARIMAX(
+        ts,
+        order=order,
+        seasonal_order=seasonal_order,
+        enforce_stationarity=False,
+        enforce_invertibility=False
+    )
+    if series_id is None:
+        return model.fit(disp=False)
+
+    store = store or ModelStore()
+    record = store.load(series_id, order, seasonal_order)
+    if record is not None and len(record["params"]) == len(model.start_params):
+        if record["fingerprint"] == series_fingerprint(ts):
+            return model.smooth(record["params"])
+        results = model.fit(start_params=record["params"], disp=False)
+    else:
+        results = model.fit(disp=False)
+    store.save(series_id, ts, order, seasonal_order, results.params)
+    return results
+
+
+def forecast_frame(results, last_month: pd.Timestamp, steps: int = STEPS) -> pd.DataFrame:
+    """Point forecast and confidence bounds for the ``steps`` months after ``last_month``."""
+    pred = results.get_forecast(steps=steps)
+    ci = pred.conf_int()
+    return pd.DataFrame({
+        "month": pd.date_range(last_month + pd.offsets.MonthBegin(1), periods=steps, freq="MS"),
+        "forecast": pred.predicted_mean.values,
+        "lower": ci.iloc[:, 0].values,
+        "upper": ci.iloc[:, 1].values
+    })
+
+
+def describe_orders(order: tuple, seasonal_order: tuple) -> str:
+    """``SARIMAX(1,1,1)(1,1,1,12)``."""
+    return "SARIMAX({})({})".format(",".join(map(str, order)), ",".join(map(str, seasonal_order)))
+
+
+def _forecast_one(series_id: str, ts: pd.Series, steps: int, timeout: float,
+                  auto_orders: bool = False) -> tuple:
+    """Process-pool task: fit and forecast one series under a time limit.
+
+    Returns the forecast frame and a description of the model fitted.
+    """
+    with time_limit(timeout):
+        if not auto_orders:
+            results = fit_sarimax(ts, series_id=series_id)
+            return forecast_frame(results, ts.index[-1], steps), describe_orders(ORDER, SEASONAL_ORDER)
+
+        from sfcrime.order_selection import select_orders
+
+        # Already one of many pool tasks: search this series' grid in-process
+        selection = select_orders(ts, series_id=series_id, max_workers=1, timeout=timeout)
+        order, seasonal_order = selection["order"], selection["seasonal_order"]
+        results = fit_sarimax(ts, order, seasonal_order, series_id=series_id + AUTO_SUFFIX)
+        return forecast_frame(results, ts.index[-1], steps), describe_orders(order, seasonal_order)
+
+
+# --------------------------------------------------
+# Batch
+# --------------------------------------------------
+def batch_series(cube) -> dict:
+    """Monthly series for each neighborhood and each major category.
+
+    Keys are ``(kind, name)``; values are month-indexed counts from the cube.
+    """
+    everything = cube.select()
+    series = {}
+    nbhd_totals = everything.counts_by("neighborhood")
+    for name in nbhd_totals[nbhd_totals > 0].index:
+        series[("Neighborhood", name)] = cube.select(neighborhoods=[name]).counts_by("month")
+    cat_totals = everything.counts_by("category")
+    for name in cat_totals[cat_totals > 0].nlargest(MAJOR_CATEGORIES).index:
+        series[("Category", name)] = cube.select(categories=[name]).counts_by("month")
+    return series
+
+
+def batch_forecast(series: dict, steps: int = STEPS, max_workers: int = MAX_WORKERS,
+                   timeout: float = SERIES_TIMEOUT, auto_orders: bool = False, progress=None) -> tuple:
+    """Forecast every series in parallel.
+
+    Returns ``(forecasts, status)``: a long table with ``FORECAST_COLUMNS``
+    and one status row per series (``ok``, ``skipped``, ``timeout`` or the
+    error message, and the model fitted). ``progress(done, total)`` is
+    called as series finish.
+    """
+    status = {}
+    models = {}
+    todo = {}
+    for key, ts in series.items():
+        if len(ts) < MIN_MONTHS:
+            status[key] = f"skipped: fewer than {MIN_MONTHS} months of data"
+        elif not ts.any():
+            status[key] = "skipped: no incidents"
+        else:
+            todo[key] = ts.astype(float).asfreq("MS")
+
+    frames = []
+    done = 0
+    with process_pool(min(max_workers, max(len(todo), 1))) as pool:
+        futures = {
+            pool.submit(_forecast_one, "/".join(key), ts, steps, timeout, auto_orders): key
+            for key, ts in todo.items()
+        }
+        for fut in as_completed(futures):
+            key = futures[fut]
+            try:
+                frame, models[key] = fut.result()
+                frame.insert(0, "kind", key[0])
+                frame.insert(1, "name", key[1])
+                frames.append(frame)
+                status[key] = "ok"
+            except TimeoutError:
+                status[key] = "timeout"
+            except Exception as e:
+                status[key] = f"error: {e}"
+            done += 1
+            if progress is not None:
+                progress(done, len(todo))
+
+    forecasts = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=FORECAST_COLUMNS)
+    status = pd.DataFrame(
+        [(kind, name, s, models.get((kind, name))) for (kind, name), s in status.items()],
+        columns=["kind", "name", "status", "model"]
+    )
+    return forecasts, status
+
+
+class BatchForecastJob:
+    """Runs ``batch_forecast`` on a background thread and exposes its state."""
+
+    def __init__(self, series: dict, **kwargs):
+        self.auto_orders = kwargs.get("auto_orders", False)
+        self.total = len(series)
+        self.done = 0
+        self.forecasts = None
+        self.status = None
+        self.error = None
+        self._finished = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(series,), kwargs=kwargs,
+                                        name="batch-forecast", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def completed(cls, forecasts: pd.DataFrame, status: pd.DataFrame,
+                  auto_orders: bool = False) -> "BatchForecastJob":
+        """A finished job holding results computed elsewhere (``sfcrime.precompute``)."""
+        job = cls.__new__(cls)
+        job.auto_orders = auto_orders
+        job.total = job.done = len(status)
+        job.forecasts, job.status = forecasts, status
+        job.error = None
+        job._finished = threading.Event()
+        job._finished.set()
+        job._thread = None
+        return job
+
+    def _progress(self, done: int, total: int):
+        self.done = done
+
+    def _run(self, series: dict, **kwargs):
+        try:
+            self.forecasts, self.status = batch_forecast(series, progress=self._progress, **kwargs)
+        except Exception as e:
+            self.error = e
+        finally:
+            self._finished.set()
+
+    @property
+    def finished(self) -> bool:
+        return self._finished.is_set()
@@ -0,0 +1,198 @@
+"""Neighborhood boundaries and vectorized point-in-polygon assignment.
+
+The 41 analysis neighborhood polygons are read once per process from the
+bundled GeoJSON. ``NeighborhoodIndex`` overlays a regular grid on their
+extent. Cells that no boundary passes through are labeled once, up front,
+so most points are assigned by a single cell lookup. Points in boundary
+cells get an even-odd ray-casting test against only the polygons whose
+bounding boxes touch the cell, evaluated with NumPy over blocks of points
+and all polygon edges at once.
+"""
+import functools
+import json
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+BOUNDARIES_GEOJSON = REPO_DIR / "Analysis_Neighborhoods_20251125.geojson"
+NAME_PROPERTY = "nhood"
+
+GRID_SIZE = 128
+POINT_BLOCK = 4096
+
+
+def load_boundaries(path: Path = BOUNDARIES_GEOJSON) -> dict:
+    """Map neighborhood name -> list of rings, each an ``(n, 2)`` lon/lat array.
+
+    Holes and multipolygon parts are all kept as plain rings; the even-odd
+    rule used for containment handles them without further bookkeeping.
+    """
+    with open(path, encoding="utf-8") as f:
+        collection = json.load(f)
+    boundaries = {}
+    for feature in collection["features"]:
+        geom = feature["geometry"]
+        polygons = [geom["coordinates"]] if geom["type"] == "Polygon" else geom["coordinates"]
+        rings = [np.asarray(ring, dtype=np.float64)[:, :2] for poly in polygons for ring in poly]
+        boundaries.setdefault(feature["properties"][NAME_PROPERTY], []).extend(rings)
+    return boundaries
+
+
+class NeighborhoodIndex:
+    """Grid-accelerated point-in-polygon lookup over named polygons."""
+
+    def __init__(self, boundaries: dict, grid_size: int = GRID_SIZE):
+        self.names = list(boundaries)
+        self._edges = []
+        bboxes = []
+        for name in self.names:
+            rings = boundaries[name]
+            # Each edge as (x1, y1, x2, y2); rings are closed in GeoJSON
+            self._edges.append(np.vstack([np.hstack([r[:-1], r[1:]]) for r in rings]))
+            pts = np.vstack(rings)
+            bboxes.append((*pts.min(axis=0), *pts.max(axis=0)))
+        bboxes = np.array(bboxes)
+
+        self.grid_size = grid_size
+        self.x0, self.y0 = bboxes[:, 0].min(), bboxes[:, 1].min()
+        self.dx = (bboxes[:, 2].max() - self.x0) / grid_size
+        self.dy = (bboxes[:, 3].max() - self.y0) / grid_size
+
+        # candidates[cell, polygon]: polygon's bounding box overlaps the cell
+        cx0 = np.floor((bboxes[:, 0] - self.x0) / self.dx).astype(int).clip(0, grid_size - 1)
+        cx1 = np.floor((bboxes[:, 2] - self.x0) / self.dx).astype(int).clip(0, grid_size - 1)
+        cy0 = np.floor((bboxes[:, 1] - self.y0) / self.dy).astype(int).clip(0, grid_size - 1)
+        cy1 = np.floor((bboxes[:, 3] - self.y0) / self.dy).astype(int).clip(0, grid_size - 1)
+        self._candidates = np.zeros((grid_size, grid_size, len(self.names)), dtype=bool)
+        for p in range(len(self.names)):
+            self._candidates[cy0[p]:cy1[p] + 1, cx0[p]:cx1[p] + 1, p] = True
+        self._candidates = self._candidates.reshape(grid_size * grid_size, len(self.names))
+
+        # Label the cells no edge passes through by testing their centres
+        boundary = np.zeros(grid_size * grid_size, dtype=bool)
+        for edges in self._edges:
+            boundary[self._edge_cells(edges)] = True
+        self._cell_codes = np.full(grid_size * grid_size, -1, dtype=np.int16)
+        interior = np.flatnonzero(~boundary)
+        cx = self.x0 + (interior % grid_size + 0.5) * self.dx
+        cy = self.y0 + (interior // grid_size + 0.5) * self.dy
+        self._cell_codes[interior] = self._assign_tested(interior, cx, cy)
+        self._boundary = boundary
+
+    def _edge_cells(self, edges: np.ndarray) -> np.ndarray:
+        """Every cell an edge touches, even only at a corner (supercover).
+
+        An edge moves between cells only where it crosses a grid line, so
+        its endpoints and those crossings, each taken with the cells on
+        both sides of any line it lies on, give all the cells it touches.
+        """
+        u1, u2 = (edges[:, 0] - self.x0) / self.dx, (edges[:, 2] - self.x0) / self.dx
+        v1, v2 = (edges[:, 1] - self.y0) / self.dy, (edges[:, 3] - self.y0) / self.dy
+        us, vs = [u1, u2], [v1, v2]
+        for a1, a2, b1, b2, vertical in ((u1, u2, v1, v2, True), (v1, v2, u1, u2, False)):
+            # Grid lines a = k crossed by each edge (none for edges along one)
+            lo = np.ceil(np.minimum(a1, a2))
+            n = np.where(a1 != a2, np.floor(np.maximum(a1, a2)) - lo + 1, 0).astype(int)
+            edge_id = np.repeat(np.arange(len(edges)), n)
+            k = lo[edge_id] + np.arange(len(edge_id)) - np.repeat(np.cumsum(n) - n, n)
+            b = b1[edge_id] + (k - a1[edge_id]) * ((b2 - b1) / np.where(a1 != a2, a2 - a1, 1))[edge_id]
+            us.append(k if vertical else b)
+            vs.append(b if vertical else k)
+        u, v = np.concatenate(us), np.concatenate(vs)
+        # A coordinate on a grid line belongs to the cells on both sides
+        gx = np.concatenate([np.floor(u), np.ceil(u) - 1, np.floor(u), np.ceil(u) - 1])
+        gy = np.concatenate([np.floor(v), np.floor(v), np.ceil(v) - 1, np.ceil(v) - 1])
+        inside = (gx >= 0) & (gx < self.grid_size) & (gy >= 0) & (gy < self.grid_size)
+        return np.unique(gy[inside].astype(np.int64) * self.grid_size + gx[inside].astype(np.int64))
+
+    def _cells(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Grid cell per point, ``-1`` outside the boundaries' extent."""
+        gx = np.floor((x - self.x0) / self.dx)
+        gy = np.floor((y - self.y0) / self.dy)
+        inside = (gx >= 0) & (gx < self.grid_size) & (gy >= 0) & (gy < self.grid_size)
+        cells = np.full(len(x), -1, dtype=np.int64)
+        cells[inside] = gy[inside].astype(np.int64) * self.grid_size + gx[inside].astype(np.int64)
+        return cells
+
+    @staticmethod
+    def _contains(edges: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Even-odd ray casting of points against every edge of one polygon."""
+        inside = np.zeros(len(x), dtype=bool)
+        x1, y1, x2, y2 = (edges[:, i] for i in range(4))
+        upward = y2 > y1
+        for start in range(0, len(x), POINT_BLOCK):
+            px = x[start:start + POINT_BLOCK, None]
+            py = y[start:start + POINT_BLOCK, None]
+            straddles = (y1 > py) != (y2 > py)
+            # Point lies left of the edge (division-free form of the crossing test)
+            left = ((x2 - x1) * (py - y1) - (px - x1) * (y2 - y1) > 0) == upward
+            crossings = np.count_nonzero(straddles & left, axis=1)
+            inside[start:start + POINT_BLOCK] = crossings % 2 == 1
+        return inside
+
+    def _assign_tested(self, cells: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Ray-cast points (all inside the grid) against their candidate polygons."""
+        codes = np.full(len(x), -1, dtype=np.int16)
+        for p, edges in enumerate(self._edges):
+            todo = np.flatnonzero(self._candidates[cells, p] & (codes < 0))
+            if len(todo):
+                hit = self._contains(edges, x[todo], y[todo])
+                codes[todo[hit]] = p
+        return codes
+
+    def assign(self, lat, lon) -> np.ndarray:
+        """Polygon code (index into ``names``) per point; ``-1`` when none contains it."""
+        x = np.asarray(lon, dtype=np.float64)
+        y = np.asarray(lat, dtype=np.float64)
+        codes = np.full(len(x), -1, dtype=np.int16)
+        cells = self._cells(x, y)
+        valid = cells >= 0
+        codes[valid] = self._cell_codes[cells[valid]]
+        edge = np.flatnonzero(valid & self._boundary[np.where(valid, cells, 0)])
+        codes[edge] = self._assign_tested(cells[edge], x[edge], y[edge])
+        return codes
+
+
+_index_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def _build_index(path: Path) -> NeighborhoodIndex:
+    return NeighborhoodIndex(load_boundaries(path))
+
+
+def neighborhood_index(path: Path = BOUNDARIES_GEOJSON) -> NeighborhoodIndex:
+    """Process-wide index for ``path`` (built on first use)."""
+    with _index_lock:
+        return _build_index(Path(path))
+
+
+def assign_neighborhoods(lat, lon, path: Path = BOUNDARIES_GEOJSON) -> pd.Series:
+    """Neighborhood name per point (``NaN`` outside every polygon)."""
+    index = neighborhood_index(path)
+    codes = index.assign(lat, lon)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=index.names))
+
+
+def fill_missing_neighborhoods(df: pd.DataFrame, column: str = "neighborhood",
+                               path: Path = BOUNDARIES_GEOJSON) -> pd.DataFrame:
+    """Fill ``column`` from coordinates wherever it is missing.
+
+    Passing every row (``df[column] = NaN`` first) re-buckets the whole
+    table, e.g. after the boundary file changes.
+    """
+    missing = df[column].isna() & df["latitude"].notna() & df["longitude"].notna()
+    if not missing.any():
+        return df
+    names = assign_neighborhoods(df.loc[missing, "latitude"].to_numpy(),
+                                 df.loc[missing, "longitude"].to_numpy(), path)
+    df = df.copy()
+    if isinstance(df[column].dtype, pd.CategoricalDtype):
+        df[column] = df[column].cat.add_categories(
+            [n for n in names.cat.categories if n not in df[column].cat.categories]
+        )
+    df.loc[missing, column] = names.to_numpy()
+    return df
@@ -0,0 +1,360 @@
+"""Concurrent ingestion of SFPD incident reports from the DataSF (SODA) API.
+
+The 2018-2025 window is split into calendar-month shards. Each shard is read
+with keyset pagination (ordered by the Socrata row id, so deep pages cost the
+same as the first one), and shards are fetched concurrently over a pooled
+``requests.Session``. A failed request is retried with exponential backoff; a
+shard that still fails raises ``IngestError`` instead of quietly returning a
+partial dataset.
+
+Each page is cleaned into a compact typed chunk as soon as it arrives and
+appended to an ``IncidentStore``, so peak memory tracks the final columnar
+footprint rather than the size of the raw JSON.
+
+Setting ``SFCRIME_FIXTURE`` to a JSON file of raw DataSF records swaps the
+HTTP session for ``FixtureSession``, which answers the same queries locally
+(offline development, benchmarks).
+"""
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from sfcrime.geo import assign_neighborhoods
+from sfcrime.schema import HOUR_MISSING
+from sfcrime.store import IncidentStore
+
+if TYPE_CHECKING:
+    import requests
+
+BASE_URL = "https://data.sfgov.org/resource/wg3w-h783.json"
+
+SELECT_COLS = [
+    "incident_date", "incident_datetime", "analysis_neighborhood",
+    "incident_category", "incident_day_of_week", "latitude", "longitude"
+]
+
+# Project scope (inclusive years)
+START_YEAR = 2018
+END_YEAR = 2025
+
+PAGE_SIZE = 50000
+MAX_WORKERS = 8
+MAX_RETRIES = 4
+BACKOFF_SECONDS = 1.0
+REQUEST_TIMEOUT = 60
+
+# Status codes worth retrying (rate limiting and transient server errors)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.000"
+FIXTURE_ENV = "SFCRIME_FIXTURE"
+
+
+class IngestError(RuntimeError):
+    """Raised when a shard cannot be fetched.
+
+    Either every retry failed, or the response was one no retry would fix
+    (a client error such as 403, or a body that is not JSON).
+    """
+
+
+# --------------------------------------------------
+# Shards and HTTP plumbing
+# --------------------------------------------------
+def month_shards(since: str | None = None) -> list:
+    """Return ``(lower, upper)`` ISO bounds, one half-open range per month.
+
+    With ``since``, shards before the month containing it are skipped.
+    """
+    first = f"{START_YEAR}-01-01"
+    if since is not None:
+        first = max(pd.Timestamp(first), pd.Timestamp(since).to_period("M").to_timestamp())
+    starts = pd.date_range(first, f"{END_YEAR + 1}-01-01", freq="MS")
+    return [
+        (lo.strftime(TIMESTAMP_FORMAT), hi.strftime(TIMESTAMP_FORMAT))
+        for lo, hi in zip(starts[:-1], starts[1:])
+    ]
+
+
+def make_session(pool_size: int = MAX_WORKERS) -> "requests.Session":
+    """Session whose connection pool is large enough for every worker."""
+    fixture = os.environ.get(FIXTURE_ENV)
+    if fixture:
+        return FixtureSession.from_file(fixture)
+    # Imported here: the dashboard only talks to DataSF when it refreshes,
+    # so most processes never need requests at all
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_json(session: "requests.Session", params: dict, url: str = BASE_URL) -> list:
+    """GET one page, retrying transient failures with exponential backoff."""
+    import requests
+
+    last_error = None
+    for attempt in range(MAX_RETRIES + 1):
+        if attempt:
+            time.sleep(BACKOFF_SECONDS * 2 ** (attempt - 1))
+        try:
+            r = session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+            if r.status_code in RETRY_STATUS:
+                last_error = requests.HTTPError(f"HTTP {r.status_code}", response=r)
+                continue
+            r.raise_for_status()
+            return r.json()
+        except (requests.ConnectionError, requests.Timeout) as e:
+            last_error = e
+        except (requests.RequestException, ValueError) as e:
+            # Other HTTP errors (400, 403, 404, ...) and bodies that are
+            # not JSON will not go away on a retry
+            raise IngestError(f"request failed: {e}") from e
+    raise IngestError(f"giving up after {MAX_RETRIES + 1} attempts: {last_error}")
+
+
+class _FixtureResponse:
+    def __init__(self, payload: list):
+        self.status_code = 200
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self) -> list:
+        return self._payload
+
+
+class FixtureSession:
+    """Local stand-in for the DataSF endpoint, backed by a list of records.
+
+    Understands exactly the queries this module issues: the shard bounds,
+    the ``since`` cutoff, ``:id`` keyset paging and ``count(*)``.
+    """
+
+    def __init__(self, records: list):
+        for i, rec in enumerate(records):
+            rec.setdefault(":id", f"row-{i:012d}")
+        self.records = sorted(records, key=lambda rec: rec[":id"])
+
+    @classmethod
+    def from_file(cls, path: str) -> "FixtureSession":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def mount(self, prefix, adapter):
+        pass
+
+    def get(self, url, params=None, timeout=None) -> _FixtureResponse:
+        where = params.get("$where", "")
+        tests = re.findall(r"(:?\w+) ([<>]=?) '([^']*)'", where)
+        ops = {">": str.__gt__, ">=": str.__ge__, "<": str.__lt__}
+        rows = [
+            rec for rec in self.records
+            if all(ops[op](rec.get(field) or "", value) for field, op, value in tests)
+        ]
+        if params.get("$select", "").startswith("count("):
+            return _FixtureResponse([{"n": str(len(rows))}])
+        return _FixtureResponse(rows[:int(params.get("$limit", len(rows)))])
+
+
+# --------------------------------------------------
+# Fetching
+# --------------------------------------------------
+def shard_where(lower: str, upper: str, since: str | None = None) -> str:
+    where = f"incident_date >= '{lower}' AND incident_date < '{upper}'"
+    if since is not None:
+        where += f" AND incident_datetime > '{since}'"
+    return where
+
+
+def count_incidents(session: "requests.Session", lower: str, upper: str,
+                    since: str | None = None) -> int:
+    """Server-side row count for a date range (used to presize the store)."""
+    params = {"$select": "count(*) AS n", "$where": shard_where(lower, upper, since)}
+    page = get_json(session, params)
+    return int(page[0]["n"]) if page else 0
+
+
+def fetch_shard(session: "requests.Session", lower: str, upper: str,
+                page_size: int = PAGE_SIZE, since: str | None = None) -> list:
+    """Fetch every record with ``lower <= incident_date < upper``.
+
+    Pages are walked by ``:id`` (keyset pagination) rather than ``$offset``
+    and cleaned as they arrive; returns a list of compact chunks.
+    """
+    chunks = []
+    last_id = None
+    while True:
+        where = shard_where(lower, upper, since)
+        if last_id is not None:
+            where += f" AND :id > '{last_id}'"
+        params = {
+            "$select": ",".join([":id"] + SELECT_COLS),
+            "$where": where,
+            "$order": ":id",
+            "$limit": page_size,
+        }
+        try:
+            page = get_json(session, params)
+        except IngestError as e:
+            raise IngestError(f"shard {lower[:7]}: {e}") from e
+
+        if page:
+            chunks.append(clean_incidents(pd.DataFrame.from_records(page, columns=SELECT_COLS)))
+        if len(page) < page_size:
+            return chunks
+        last_id = page[-1][":id"]
+
+
+def fetch_incidents(since: str | None = None, max_workers: int = MAX_WORKERS,
+                    page_size: int = PAGE_SIZE) -> pd.DataFrame:
+    """Fetch and clean the project window, shards in parallel.
+
+    With ``since`` (an ISO timestamp) only incidents whose
+    ``incident_datetime`` is strictly later are fetched.
+
+    Shards are appended to the store in chronological order as they finish;
+    a shard's chunks are released as soon as they have been copied in.
+    """
+    shards = month_shards(since)
+    session = make_session(max_workers)
+    if not shards:
+        return IncidentStore().to_frame()
+    store = IncidentStore(capacity=count_incidents(session, shards[0][0], shards[-1][1], since))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(fetch_shard, session, lo, hi, page_size, since)
+            for lo, hi in shards
+        ]
+        try:
+            for i, fut in enumerate(futures):
+                for chunk in fut.result():
+                    store.append(chunk)
+                futures[i] = None
+        finally:
+            for fut in futures:
+                if fut is not None:
+                    fut.cancel()
+    return store.to_frame()
+
+
+# --------------------------------------------------
+# Cleaning
+# --------------------------------------------------
+_NS_PER_HOUR = 3600 * 10**9
+_NS_PER_DAY = 24 * _NS_PER_HOUR
+
+
+def _strings(s: pd.Series) -> pa.Array:
+    return pa.array(s, type=pa.string(), from_pandas=True)
+
+
+def _timestamps(values: pa.Array) -> np.ndarray:
+    """Parse DataSF's fixed timestamp format; anything else becomes NaT."""
+    parsed = pc.strptime(values, format=TIMESTAMP_FORMAT, unit="ms", error_is_null=True)
+    return parsed.to_numpy(zero_copy_only=False).astype("datetime64[ns]")
+
+
+def _coordinates(values: pa.Array) -> np.ndarray:
+    try:
+        return pc.cast(values, pa.float32()).to_numpy(zero_copy_only=False)
+    except pa.ArrowInvalid:
+        # A malformed value somewhere in the page: coerce it to NaN instead
+        return pd.to_numeric(values.to_pandas(), errors="coerce").to_numpy(dtype="float32")
+
+
+def _civil(ns: np.ndarray) -> tuple:
+    """``(year, month_start_ns)`` of datetime64[ns] values, by integer arithmetic.
+
+    Howard Hinnant's days-to-civil algorithm, a few times faster than
+    NumPy's calendar casts. NaT maps to a year far outside any range.
+    """
+    days = ns.view(np.int64) // _NS_PER_DAY
+    z = days + 719468
+    era = z // 146097
+    doe = z - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    day = doy - (153 * mp + 2) // 5 + 1
+    month = np.where(mp < 10, mp + 3, mp - 9)
+    year = yoe + era * 400 + (month <= 2)
+    return year, ((days - day + 1) * _NS_PER_DAY).view("datetime64[ns]")
+
+
+def _categorical(values: pa.Array) -> pd.Categorical:
+    """Chunk-local categorical (the store remaps codes to its own vocabulary)."""
+    encoded = pc.dictionary_encode(values)
+    codes = encoded.indices.fill_null(-1).to_numpy(zero_copy_only=False)
+    return pd.Categorical.from_codes(codes, encoded.dictionary.to_pylist())
+
+
+def clean_incidents(df: pd.DataFrame) -> pd.DataFrame:
+    """Type-convert and derive the fields used by the dashboard.
+
+    Works on one raw page at a time. ``incident_date`` is parsed first and
+    rows outside the project years or without a date or category are
+    dropped before any other column is touched. Timestamps are parsed with
+    the fixed DataSF format, and ``year``/``month``/``hour`` are derived
+    with integer arithmetic on the datetime64 values. The result uses the
+    store's compact dtypes, so it can be appended without further
+    conversion.
+    """
+    raw = {col: _strings(df[col]) for col in SELECT_COLS}
+
+    # Project scope (inclusive years), applied before anything else is parsed
+    date = _timestamps(raw["incident_date"])
+    year, month = _civil(date)
+    keep = (year >= START_YEAR) & (year <= END_YEAR)
+    keep &= raw["incident_category"].is_valid().to_numpy(zero_copy_only=False)
+    if not keep.all():
+        rows = pa.array(np.flatnonzero(keep))
+        raw = {col: values.take(rows) for col, values in raw.items()}
+        date, year, month = date[keep], year[keep], month[keep]
+
+    latitude = _coordinates(raw["latitude"])
+    longitude = _coordinates(raw["longitude"])
+
+    # Recover unlabeled incidents from their coordinates
+    neighborhood = _categorical(raw["analysis_neighborhood"])
+    codes = neighborhood.codes.astype(np.int16)
+    missing = (codes < 0) & ~np.isnan(latitude) & ~np.isnan(longitude)
+    if missing.any():
+        filled = assign_neighborhoods(latitude[missing], longitude[missing]).array
+        names = list(neighborhood.categories)
+        names += [n for n in filled.categories if n not in set(names)]
+        lookup = np.array([names.index(n) for n in filled.categories] + [-1], dtype=codes.dtype)
+        codes[missing] = lookup[filled.codes]
+        neighborhood = pd.Categorical.from_codes(codes, names)
+    located = codes >= 0
+
+    incident_datetime = _timestamps(raw["incident_datetime"])
+    ns = incident_datetime.view(np.int64)
+    hour = np.where(np.isnat(incident_datetime), HOUR_MISSING, ns % _NS_PER_DAY // _NS_PER_HOUR)
+
+    out = pd.DataFrame({
+        "date": date,
+        "incident_datetime": incident_datetime,
+        "neighborhood": neighborhood,
+        "category": _categorical(raw["incident_category"]),
+        "weekday": _categorical(raw["incident_day_of_week"]),
+        "latitude": latitude,
+        "longitude": longitude,
+        "year": year.astype("int16"),
+        "month": month,
+        "hour": hour.astype("int8"),
+    })
+    return out if located.all() else out[located].reset_index(drop=True)
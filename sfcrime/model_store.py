@@ -0,0 +1,101 @@
+"""Persistent store of fitted SARIMAX parameters.
+
+Each series (for example ``citywide`` or ``Neighborhood/Mission``) has one
+JSON record holding its model orders, fitted parameters and a fingerprint
+of the data they were fitted on. ``forecast.fit_sarimax`` consults the
+store: unchanged data is re-filtered with the stored parameters (no
+optimization at all), changed or extended data is refitted starting from
+them, and only a series that has never been seen is fitted cold.
+
+The orders chosen by ``sfcrime.order_selection`` are kept per series in
+``orders/``, next to the parameters, together with the data they were
+selected on.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sfcrime import DATA_DIR
+
+MODEL_DIR = DATA_DIR / "models"
+ORDERS_SUBDIR = "orders"
+
+
+def series_fingerprint(ts: pd.Series) -> str:
+    """Hash of a monthly series' dates and values."""
+    h = hashlib.sha256()
+    h.update(ts.index.to_numpy().astype("datetime64[M]").astype(np.int64).tobytes())
+    h.update(ts.to_numpy(dtype=np.float64).tobytes())
+    return h.hexdigest()[:16]
+
+
+class ModelStore:
+    """Directory of per-series parameter records, written atomically."""
+
+    def __init__(self, root: Path = MODEL_DIR):
+        self.root = Path(root)
+
+    def _path(self, series_id: str, subdir: str = "") -> Path:
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", series_id).strip("_").lower()
+        return self.root / subdir / f"{slug}.json"
+
+    @staticmethod
+    def _read(path: Path) -> dict | None:
+        if not path.exists():
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write(path: Path, record: dict):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique per thread too: sessions of one server write the same records
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(tmp, path)
+
+    def load(self, series_id: str, order: tuple, seasonal_order: tuple) -> dict | None:
+        """Stored record for ``series_id``, if it was fitted with the same orders."""
+        record = self._read(self._path(series_id))
+        if record is None:
+            return None
+        if (tuple(record["order"]) != tuple(order)
+                or tuple(record["seasonal_order"]) != tuple(seasonal_order)):
+            return None
+        return record
+
+    def save(self, series_id: str, ts: pd.Series, order: tuple, seasonal_order: tuple,
+             params: np.ndarray):
+        record = {
+            "series_id": series_id,
+            "order": list(order),
+            "seasonal_order": list(seasonal_order),
+            "fingerprint": series_fingerprint(ts),
+            "nobs": len(ts),
+            "params": [float(p) for p in params],
+        }
+        self._write(self._path(series_id), record)
+
+    def load_orders(self, series_id: str) -> dict | None:
+        """The last order selection for ``series_id``, if any."""
+        return self._read(self._path(series_id, ORDERS_SUBDIR))
+
+    def save_orders(self, series_id: str, ts: pd.Series, selection: dict):
+        record = dict(
+            selection,
+            series_id=series_id,
+            fingerprint=series_fingerprint(ts),
+            months=ts.index.strftime("%Y-%m").tolist(),
+            values=[float(v) for v in ts.to_numpy(dtype=np.float64)],
+        )
+        self._write(self._path(series_id, ORDERS_SUBDIR), record)
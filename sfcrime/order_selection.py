@@ -0,0 +1,215 @@
+"""Automatic SARIMAX order selection.
+
+``select_orders`` searches a bounded ``(p, d, q)(P, D, Q, 12)`` grid in two
+stages. The differencing orders come first, from a KPSS test and the
+series' seasonal strength, since information criteria are not comparable
+across differencing orders. Then every ARMA candidate is scored by an
+approximate AIC: the log-likelihood at statsmodels' ``start_params``,
+which are conditional-sum-of-squares (Hannan-Rissanen style) estimates
+and cost one Kalman filter pass instead of a full optimization. Only the
+best ``PRUNE_KEEP`` candidates, plus the dashboard's default ARMA orders, get
+the full maximum-likelihood fit, in parallel on a process pool; the
+lowest exact AIC wins.
+
+With a ``series_id`` the chosen orders are kept in the ``ModelStore`` and
+reused until the series changes materially: it grows by
+``RESELECT_MONTHS`` or more, or the months it shares with the series the
+orders were chosen on move by more than ``MATERIAL_CHANGE`` in total.
+``OrderSelectionJob`` runs a selection from a background thread so the
+Streamlit script thread never waits on the search.
+"""
+import itertools
+import threading
+import warnings
+from concurrent.futures import as_completed
+
+import numpy as np
+import pandas as pd
+
+from sfcrime.forecast import ORDER, SEASONAL_ORDER, SERIES_TIMEOUT
+from sfcrime.model_store import ModelStore, series_fingerprint
+from sfcrime.parallel import MAX_WORKERS, process_pool, time_limit
+
+SEASON = 12
+MAX_P, MAX_Q = 2, 2
+MAX_SEASONAL_P, MAX_SEASONAL_Q = 1, 1
+PRUNE_KEEP = 6
+
+RESELECT_MONTHS = 12
+# Total absolute change on the shared months, relative to their total
+MATERIAL_CHANGE = 0.05
+# Hyndman & Athanasopoulos' threshold on STL seasonal strength for D = 1
+SEASONAL_STRENGTH = 0.64
+KPSS_ALPHA = 0.05
+
+
+def _model(ts: pd.Series, order: tuple, seasonal_order: tuple):
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    # Same constraints as forecast.fit_sarimax, so the AICs match what it fits
+    return SARIMAX(ts, order=order, seasonal_order=seasonal_order,
+                   enforce_stationarity=False, enforce_invertibility=False)
+
+
+def differencing_orders(ts: pd.Series) -> tuple:
+    """``(d, D)``, each 0 or 1, for a monthly series."""
+    from statsmodels.tsa.seasonal import STL
+    from statsmodels.tsa.stattools import kpss
+
+    y = ts.to_numpy(dtype=float)
+    D = 0
+    if len(y) >= 2 * SEASON + 1:
+        stl = STL(y, period=SEASON, robust=True).fit()
+        resid_var = np.var(stl.resid)
+        strength = max(0.0, 1.0 - resid_var / max(np.var(stl.seasonal + stl.resid), 1e-12))
+        D = int(strength > SEASONAL_STRENGTH)
+    if D:
+        y = y[SEASON:] - y[:-SEASON]
+
+    d = 0
+    if np.ptp(y) > 0:
+        with warnings.catch_warnings():
+            # kpss warns when the statistic is outside its p-value table
+            warnings.simplefilter("ignore")
+            d = int(kpss(y, regression="c", nlags="auto")[1] < KPSS_ALPHA)
+    return d, D
+
+
+def candidate_orders(d: int, D: int) -> list:
+    """Every ``(order, seasonal_order)`` in the grid at the given differencing."""
+    return [
+        ((p, d, q), (P, D, Q, SEASON))
+        for p, q, P, Q in itertools.product(
+            range(MAX_P + 1), range(MAX_Q + 1), range(MAX_SEASONAL_P + 1), range(MAX_SEASONAL_Q + 1)
+        )
+    ]
+
+
+def approximate_aic(ts: pd.Series, order: tuple, seasonal_order: tuple) -> float:
+    """AIC at the starting estimates, without optimizing; ``inf`` if they fail."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        try:
+            model = _model(ts, order, seasonal_order)
+            params = model.start_params
+            llf = model.loglike(params)
+        except (ValueError, np.linalg.LinAlgError):
+            return np.inf
+    return -2.0 * llf + 2.0 * len(params) if np.isfinite(llf) else np.inf
+
+
+def _fit_aic(ts: pd.Series, order: tuple, seasonal_order: tuple, timeout: float) -> float:
+    """Process-pool task: exact AIC of one candidate after the full MLE fit."""
+    with time_limit(timeout), warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return float(_model(ts, order, seasonal_order).fit(disp=False).aic)
+
+
+def changed_materially(record: dict, ts: pd.Series) -> bool:
+    """True when ``ts`` is different enough from the series ``record`` was chosen on."""
+    if record.get("fingerprint") == series_fingerprint(ts):
+        return False
+    old = pd.Series(record["values"], index=pd.to_datetime(record["months"], format="%Y-%m"))
+    if abs(len(ts) - len(old)) >= RESELECT_MONTHS:
+        return True
+    shared = old.index.intersection(ts.index)
+    if len(shared) == 0:
+        return True
+    base = old[shared].abs().sum()
+    change = (ts[shared].astype(float) - old[shared]).abs().sum()
+    return change > MATERIAL_CHANGE * max(base, 1.0)
+
+
+def select_orders(ts: pd.Series, series_id: str | None = None, store: ModelStore | None = None,
+                  keep: int = PRUNE_KEEP, max_workers: int = MAX_WORKERS,
+                  timeout: float = SERIES_TIMEOUT) -> dict:
+    """Choose SARIMAX orders for a monthly series.
+
+    Returns a record with ``order``, ``seasonal_order``, their ``aic``, the
+    number of ``candidates`` scored and ``fitted`` in full, and ``reused``
+    (True when a stored selection was still valid). ``max_workers=1`` fits
+    the survivors in this process, for callers that are pool tasks
+    themselves.
+    """
+    ts = ts.astype(float).asfreq("MS", fill_value=0.0)
+    if series_id is not None:
+        store = store or ModelStore()
+        record = store.load_orders(series_id)
+        if record is not None and not changed_materially(record, ts):
+            return {
+                "order": tuple(record["order"]),
+                "seasonal_order": tuple(record["seasonal_order"]),
+                "aic": record["aic"],
+                "candidates": record["candidates"],
+                "fitted": record["fitted"],
+                "reused": True,
+            }
+
+    d, D = differencing_orders(ts)
+    candidates = candidate_orders(d, D)
+    scored = sorted(candidates, key=lambda c: approximate_aic(ts, *c))
+    survivors = scored[:keep]
+    # The dashboard's default ARMA structure, at the differencing chosen here
+    baseline = ((ORDER[0], d, ORDER[2]), (SEASONAL_ORDER[0], D, SEASONAL_ORDER[2], SEASON))
+    if baseline not in survivors:
+        survivors.append(baseline)
+
+    aics = {}
+    if max_workers <= 1:
+        for c in survivors:
+            try:
+                aics[c] = _fit_aic(ts, *c, timeout)
+            except TimeoutError:
+                # In a pool task this is the caller's limit running out too
+                raise
+            except Exception:
+                pass
+    else:
+        with process_pool(min(max_workers, len(survivors))) as pool:
+            futures = {pool.submit(_fit_aic, ts, *c, timeout): c for c in survivors}
+            for fut in as_completed(futures):
+                try:
+                    aics[futures[fut]] = fut.result()
+                except Exception:
+                    pass
+    aics = {c: a for c, a in aics.items() if np.isfinite(a)}
+    if not aics:
+        raise ValueError("no candidate SARIMAX orders could be fitted")
+
+    order, seasonal_order = min(aics, key=aics.get)
+    selection = {
+        "order": order,
+        "seasonal_order": seasonal_order,
+        "aic": aics[(order, seasonal_order)],
+        "candidates": len(candidates),
+        "fitted": len(survivors),
+        "reused": False,
+    }
+    if series_id is not None:
+        stored = {k: v for k, v in selection.items() if k != "reused"}
+        store.save_orders(series_id, ts, dict(stored, order=list(order), seasonal_order=list(seasonal_order)))
+    return selection
+
+
+class OrderSelectionJob:
+    """Runs ``select_orders`` on a background thread and exposes its state."""
+
+    def __init__(self, ts: pd.Series, **kwargs):
+        self.selection = None
+        self.error = None
+        self._finished = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ts,), kwargs=kwargs,
+                                        name="order-selection", daemon=True)
+        self._thread.start()
+
+    def _run(self, ts: pd.Series, **kwargs):
+        try:
+            self.selection = select_orders(ts, **kwargs)
+        except Exception as e:
+            self.error = e
+        finally:
+            self._finished.set()
+
+    @property
+    def finished(self) -> bool:
+        return self._finished.is_set()
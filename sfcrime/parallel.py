@@ -0,0 +1,87 @@
+"""Process pools that can be started from inside the Streamlit script.
+
+Streamlit executes app.py as a fake ``__main__`` module that has a
+``__file__``, and "spawn" or "forkserver" workers re-import the parent's
+main module from that path, which would re-run the whole dashboard (and
+any pools it starts) in every worker. ``process_pool`` starts workers
+from a forkserver that preloads ``sfcrime.worker_entry``, so they skip
+the parent's main module and only import what their tasks need. Nothing
+in the calling process is changed, whichever thread starts the pool.
+
+The forkserver is shared by every pool of the process and started on
+first use; it also preloads the modules whose functions run as pool
+tasks. It runs ``python -c`` in the current directory with the default
+``sys.path`` rather than the parent's, so ``sfcrime`` has to be
+importable from there (the repository root, or an installed package);
+the first pool checks this and raises ``RuntimeError`` otherwise. Where
+there is no forkserver (Windows), pools fall back to "spawn" and workers
+import the main module as usual.
+"""
+import contextlib
+import functools
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+MAX_WORKERS = os.cpu_count() or 1
+
+PRELOAD = ["sfcrime.worker_entry", "sfcrime.forecast", "sfcrime.backtest", "sfcrime.order_selection"]
+
+
+@functools.lru_cache(maxsize=None)
+def _context():
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    # A failed preload is silently skipped, and the workers would then run
+    # the script; try the import the way the forkserver will do it
+    probe = subprocess.run([sys.executable, "-c", f"import {PRELOAD[0]}"], capture_output=True)
+    if probe.returncode:
+        raise RuntimeError(
+            f"{PRELOAD[0]} cannot be imported from {os.getcwd()}; start the app from the "
+            "repository root or install the package so pool workers can start"
+        )
+    ctx = multiprocessing.get_context("forkserver")
+    # Only read when the forkserver starts, by the first pool of the process
+    ctx.set_forkserver_preload(PRELOAD)
+    return ctx
+
+
+def process_pool(max_workers: int = MAX_WORKERS) -> ProcessPoolExecutor:
+    """Pool whose workers never run the Streamlit script."""
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=_context())
+
+
+def _on_alarm(signum, frame):
+    raise TimeoutError("task exceeded its time limit")
+
+
+@contextlib.contextmanager
+def time_limit(seconds: float):
+    """Raise ``TimeoutError`` in the block after ``seconds`` (pool workers only).
+
+    Uses ``SIGALRM``, which only a process's main thread can handle; on
+    other threads, and where the platform has no interval timers, the
+    block simply runs unbounded. Limits
+    nest: an inner block never outlives the one around it, and leaving it
+    re-arms the outer timer with whatever time the outer block has left.
+    """
+    if not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+    handler = signal.signal(signal.SIGALRM, _on_alarm)
+    outer = signal.getitimer(signal.ITIMER_REAL)[0]
+    signal.setitimer(signal.ITIMER_REAL, min(seconds, outer) if outer else seconds)
+    t0 = time.monotonic()
+    try:
+        yield
+    finally:
+        if outer:
+            signal.setitimer(signal.ITIMER_REAL, max(outer - (time.monotonic() - t0), 1e-3))
+        else:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, handler)
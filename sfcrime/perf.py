@@ -0,0 +1,212 @@
+"""Per-rerun stage timings for the dashboard.
+
+``RerunTimer`` collects one record per named stage of a script run (wall
+time, rows processed, resident-memory change) and emits the whole run as
+one JSON line on the ``sfcrime.perf`` logger. The timer of the current
+run is held in a context variable, so library code can time its own
+stages with the module-level ``stage()`` without the timer being passed
+in; outside a run (a deferred download, a background thread) the stage is
+logged on its own.
+
+The first run in a process is also its cold start: everything imported
+between this module and the timer's start (the app's own imports) is
+recorded as an ``imports`` stage, and the run is logged a second time as
+a ``cold_start`` event with the import time and the first-paint latency
+(imports plus the run itself). ``cold_start`` keeps those numbers for
+the life of the process.
+
+RSS is process-wide: with several sessions rerunning at once, memory
+deltas include their allocations too. Set ``SFCRIME_PERF_LOG`` to a file
+path to append the JSON lines there.
+"""
+import contextlib
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import resource
+import sys
+import time
+import uuid
+
+import pandas as pd
+
+PERF_LOG_ENV = "SFCRIME_PERF_LOG"
+PROFILE_LINES = 40
+
+logger = logging.getLogger("sfcrime.perf")
+if os.environ.get(PERF_LOG_ENV):
+    _handler = logging.FileHandler(os.environ[PERF_LOG_ENV], encoding="utf-8")
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+_current = contextvars.ContextVar("sfcrime_perf_timer", default=None)
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process.
+
+    Read from ``/proc`` on Linux; elsewhere falls back to the peak RSS,
+    which only ever grows, so deltas there are lower bounds.
+    """
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS and KiB everywhere else
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+# Start of the import window the first run reports as its "imports" stage
+_IMPORTED_AT = time.perf_counter()
+_IMPORTED_RSS = rss_bytes()
+_cold_start_pending = True
+# Filled in by the first run to finish in this process
+cold_start = None
+
+
+class Stage:
+    """One timed stage; set ``rows`` inside the ``with`` block if known."""
+
+    __slots__ = ("name", "depth", "rows", "wall_ms", "rss_delta_mb", "rss_mb")
+
+    def __init__(self, name: str, depth: int = 0, rows=None):
+        self.name = name
+        self.depth = depth
+        self.rows = rows
+        self.wall_ms = None
+        self.rss_delta_mb = None
+        self.rss_mb = None
+
+    def record(self) -> dict:
+        return {
+            "stage": self.name,
+            "depth": self.depth,
+            "rows": None if self.rows is None else int(self.rows),
+            "wall_ms": round(self.wall_ms, 2),
+            "rss_delta_mb": round(self.rss_delta_mb, 2),
+            "rss_mb": round(self.rss_mb, 1),
+        }
+
+
+@contextlib.contextmanager
+def _measure(s: Stage):
+    rss0 = rss_bytes()
+    t0 = time.perf_counter()
+    try:
+        yield s
+    finally:
+        s.wall_ms = (time.perf_counter() - t0) * 1000
+        rss1 = rss_bytes()
+        s.rss_delta_mb = (rss1 - rss0) / 2**20
+        s.rss_mb = rss1 / 2**20
+
+
+class RerunTimer:
+    """Stage records for a single script run."""
+
+    def __init__(self, profile: bool = False):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.stages = []
+        self.profile_report = None
+        self._depth = 0
+        self._t0 = None
+        self._rss0 = None
+        self._token = None
+        self._profiler = cProfile.Profile() if profile else None
+        self.cold = False
+
+    def start(self) -> "RerunTimer":
+        global _cold_start_pending
+        self._token = _current.set(self)
+        self._rss0 = rss_bytes()
+        self._t0 = time.perf_counter()
+        if _cold_start_pending:
+            _cold_start_pending = False
+            self.cold = True
+            imports = Stage("imports")
+            imports.wall_ms = (self._t0 - _IMPORTED_AT) * 1000
+            imports.rss_delta_mb = (self._rss0 - _IMPORTED_RSS) / 2**20
+            imports.rss_mb = self._rss0 / 2**20
+            self.stages.append(imports)
+        if self._profiler is not None:
+            self._profiler.enable()
+        return self
+
+    def finish(self) -> dict:
+        """Stop the run, log it as one JSON line and return the summary."""
+        global cold_start
+        if self._profiler is not None:
+            self._profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+            self.profile_report = out.getvalue()
+            self._profiler = None
+        summary = {
+            "event": "rerun",
+            "run_id": self.run_id,
+            "wall_ms": round((time.perf_counter() - self._t0) * 1000, 2),
+            "rss_delta_mb": round((rss_bytes() - self._rss0) / 2**20, 2),
+            "rss_mb": round(rss_bytes() / 2**20, 1),
+            "stages": [s.record() for s in self.stages],
+        }
+        if self._token is not None:
+            _current.reset(self._token)
+            self._token = None
+        logger.info(json.dumps(summary))
+        if self.cold:
+            imports_ms = self.stages[0].wall_ms
+            cold_start = {
+                "event": "cold_start",
+                "run_id": self.run_id,
+                "imports_ms": round(imports_ms, 2),
+                "first_paint_ms": round(imports_ms + summary["wall_ms"], 2),
+                "rss_mb": summary["rss_mb"],
+            }
+            logger.info(json.dumps(cold_start))
+        return summary
+
+    @contextlib.contextmanager
+    def stage(self, name: str, rows=None):
+        s = Stage(name, self._depth, rows)
+        # Recorded in start order so nested stages list under their parent
+        self.stages.append(s)
+        self._depth += 1
+        try:
+            with _measure(s):
+                yield s
+        finally:
+            self._depth -= 1
+
+    def frame(self) -> pd.DataFrame:
+        """Completed stages as a table, nested names indented."""
+        records = [s.record() for s in self.stages if s.wall_ms is not None]
+        table = pd.DataFrame(records, columns=["stage", "depth", "rows", "wall_ms", "rss_delta_mb", "rss_mb"])
+        table["stage"] = [" " * d + name for d, name in zip(table.pop("depth"), table["stage"])]
+        table["rows"] = table["rows"].astype("Int64")
+        return table
+
+
+def current():
+    """The timer of the run in progress on this thread, or ``None``."""
+    return _current.get()
+
+
+@contextlib.contextmanager
+def stage(name: str, rows=None):
+    """Time a stage into the current run, or log it alone if there is none."""
+    timer = _current.get()
+    if timer is not None:
+        with timer.stage(name, rows) as s:
+            yield s
+        return
+    s = Stage(name, rows=rows)
+    with _measure(s):
+        yield s
+    logger.info(json.dumps({"event": "stage", **s.record()}))
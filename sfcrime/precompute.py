@@ -0,0 +1,420 @@
+"""Headless batch precompute of dashboard artifacts.
+
+    python -m sfcrime.precompute                          # default filters only
+    python -m sfcrime.precompute --matrix neighborhood year --png
+    python -m sfcrime.precompute --matrix category --auto-orders --workers 8
+
+Renders what the dashboard would show for a matrix of filter presets,
+without Streamlit: each preset is the sidebar's initial selection with
+one value picked along every ``--matrix`` dimension (each neighborhood x
+each year, say), plus the unmodified defaults. Per preset it writes the
+aggregates behind the charts, every chart as Plotly JSON and, with
+``--png``, as the PNG the download buttons offer. The citywide and batch
+SARIMAX forecasts are written as CSV. Presets are rendered on a process
+pool through the same ``sfcrime`` code app.py runs, against the published
+column store.
+
+Output goes to ``ARTIFACT_DIR/<version>/`` for the column-store version
+it was computed from, with a ``manifest.json`` indexing every file. The
+directory is written under a temporary name and renamed into place, so
+the app never reads a half-written set. When the app's filter state
+matches a preset, it draws the stored figures, serves the stored PNGs
+and starts from the stored forecasts instead of computing them.
+"""
+import argparse
+import functools
+import hashlib
+import itertools
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from sfcrime import DATA_DIR, charts, colstore
+from sfcrime.binning import HEX_LEVELS
+from sfcrime.cube import DIMENSIONS, CountCube
+from sfcrime.export import figure_png, png_export_available
+from sfcrime.forecast import (
+    AUTO_SUFFIX, MIN_MONTHS, ORDER, SEASONAL_ORDER, SERIES_TIMEOUT, STEPS,
+    batch_forecast, batch_series, describe_orders, fit_sarimax, forecast_frame
+)
+from sfcrime.parallel import MAX_WORKERS, process_pool, time_limit
+from sfcrime.schema import WEEKDAYS
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_DIR = DATA_DIR / "artifacts"
+MANIFEST = "manifest.json"
+# Artifact sets kept next to the one for the current column store
+KEEP_VERSIONS = colstore.KEEP_VERSIONS
+
+# --matrix dimension -> the cube.select argument it varies
+MATRIX_DIMENSIONS = {"year": "years", "neighborhood": "neighborhoods", "category": "categories"}
+TREND_CHARTS = ("monthly_trend", "top_neighborhoods", "top_categories")
+PATTERN_CHARTS = ("hour_weekday_heatmap", "hourly_pattern", "weekday_pattern")
+
+
+# --------------------------------------------------
+# Presets
+# --------------------------------------------------
+def default_filters(df: pd.DataFrame) -> dict:
+    """The sidebar's initial selection in app.py, as ``cube.select`` arguments."""
+    years = df["year"].dropna()
+    categories = sorted(df["category"].unique())
+    return {
+        "years": (int(years.min()), int(years.max())),
+        "neighborhoods": sorted(df["neighborhood"].unique()),
+        "categories": categories[:10],
+        "weekdays": list(WEEKDAYS),
+        "hours": (0, 23),
+    }
+
+
+def preset_key(years, neighborhoods, categories, weekdays, hours) -> str:
+    """Identifier of a filter state; the order values were picked in does not matter."""
+    key = json.dumps([
+        [int(y) for y in years],
+        sorted(neighborhoods),
+        sorted(categories),
+        [w for w in WEEKDAYS if w in set(weekdays)],
+        [int(h) for h in hours],
+    ])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def preset_matrix(df: pd.DataFrame, dimensions: list) -> list:
+    """The default preset plus one per combination of values along ``dimensions``."""
+    defaults = default_filters(df)
+    values = {
+        "year": [(y, y) for y in range(defaults["years"][0], defaults["years"][1] + 1)],
+        "neighborhood": [[n] for n in defaults["neighborhoods"]],
+        "category": [[c] for c in sorted(df["category"].unique())],
+    }
+    presets = [("Default filters", defaults)]
+    if not dimensions:
+        return presets
+    for combo in itertools.product(*(values[dim] for dim in dimensions)):
+        filters = dict(defaults)
+        labels = []
+        for dim, value in zip(dimensions, combo):
+            filters[MATRIX_DIMENSIONS[dim]] = value
+            labels.append(str(value[0]))
+        presets.append((", ".join(labels), filters))
+    return presets
+
+
+def hexbin_name(hex_size: float) -> str:
+    """Figure name of the density map at one cell size."""
+    return f"hexbin_map_{int(hex_size)}m"
+
+
+# --------------------------------------------------
+# Pool tasks
+# --------------------------------------------------
+@functools.lru_cache(maxsize=1)
+def _open(version: str) -> tuple:
+    # Once per worker: the store is memory-mapped, so every worker shares its pages
+    store = colstore.ColumnStore(version)
+    return store, store.filter_index(), CountCube(store.frame)
+
+
+def _write_figure(fig, root: Path, rel: str, name: str, png: bool) -> tuple:
+    """Write ``fig`` under ``root/rel`` as Plotly JSON and, with ``png``, as PNG.
+
+    Returns its manifest entry (paths relative to ``root``) and the error
+    that stopped the PNG from rendering, if any; the JSON is written either way.
+    """
+    fig.write_json(root / rel / f"{name}.json")
+    entry = {"json": f"{rel}/{name}.json", "png": None}
+    if png:
+        try:
+            (root / rel / f"{name}.png").write_bytes(figure_png(fig))
+        except Exception as e:
+            # kaleido raises whatever its browser backend does
+            return entry, str(e).strip().splitlines()[0]
+        entry["png"] = f"{rel}/{name}.png"
+    return entry, None
+
+
+def _render_preset(version: str, label: str, filters: dict, out_dir: str, png: bool) -> dict:
+    """Process-pool task: aggregates and figures of one preset; its manifest entry.
+
+    After a PNG fails to render (no kaleido browser, say) the rest of the
+    preset's figures are written as JSON only and the error is kept in
+    ``png_error``.
+    """
+    store, index, cube = _open(version)
+    root = Path(out_dir)
+    rel = f"presets/{preset_key(**filters)}"
+    (root / rel).mkdir(parents=True, exist_ok=True)
+
+    view = cube.select(**filters)
+    total = view.total()
+    aggregates = {
+        "total": total,
+        "span_days": view.span_days() if total else 0,
+        "counts": {
+            dim: {str(k): int(v) for k, v in view.counts_by(dim).items() if v}
+            for dim in DIMENSIONS
+        },
+    }
+    with open(root / rel / "aggregates.json", "w", encoding="utf-8") as f:
+        json.dump(aggregates, f)
+
+    entry = {"label": label, "filters": filters, "total": total, "aggregates": f"{rel}/aggregates.json",
+             "figures": {}, "png_error": None}
+    if not total:
+        # The app shows "no data" messages rather than charts
+        return entry
+
+    figures = dict(charts.trend_figures(view), **charts.pattern_figures(view))
+    figures["neighborhood_choropleth"] = charts.neighborhood_figure(view)
+    rows = index.select(**filters)
+    lat = store.frame["latitude"].to_numpy()[rows]
+    lon = store.frame["longitude"].to_numpy()[rows]
+    cells = {}
+    for hex_size in HEX_LEVELS.values():
+        name = hexbin_name(hex_size)
+        figures[name], cells[name] = charts.hexbin_figure(lat, lon, hex_size)
+
+    for name, fig in figures.items():
+        figure, error = _write_figure(fig, root, rel, name, png and entry["png_error"] is None)
+        entry["png_error"] = entry["png_error"] or error
+        if name in cells:
+            figure["cells"] = cells[name]
+        entry["figures"][name] = figure
+    return entry
+
+
+def _render_citywide(version: str, auto_orders: bool, out_dir: str, png: bool,
+                     timeout: float = SERIES_TIMEOUT) -> dict | None:
+    """Process-pool task: the forecast tab's citywide model; its manifest entry."""
+    _, _, cube = _open(version)
+    ts = cube.select().counts_by("month")
+    if len(ts) < MIN_MONTHS:
+        return None
+
+    # The series id and orders the app fits with, so the ModelStore is shared
+    series_id = "citywide"
+    order, seasonal_order = ORDER, SEASONAL_ORDER
+    with time_limit(timeout):
+        if auto_orders:
+            from sfcrime.order_selection import select_orders
+
+            # Already one of many pool tasks: search the grid in-process
+            selection = select_orders(ts, series_id=series_id, max_workers=1, timeout=timeout)
+            order, seasonal_order = selection["order"], selection["seasonal_order"]
+            series_id += AUTO_SUFFIX
+        results = fit_sarimax(ts, order, seasonal_order, series_id=series_id)
+    frame = forecast_frame(results, ts.index[-1], STEPS)
+
+    root = Path(out_dir)
+    rel = f"forecasts/{_mode(auto_orders)}"
+    (root / rel).mkdir(parents=True, exist_ok=True)
+    frame.to_csv(root / rel / "citywide.csv", index=False)
+    fig = charts.forecast_figure(ts, frame, "Historical Incidents (2018–2025) and 6-Month Forecast")
+    figure, error = _write_figure(fig, root, rel, "citywide", png)
+    return dict(figure, csv=f"{rel}/citywide.csv", model=describe_orders(order, seasonal_order),
+                aic=float(results.aic), png_error=error)
+
+
+def _mode(auto_orders: bool) -> str:
+    return "auto" if auto_orders else "fixed"
+
+
+# --------------------------------------------------
+# Writing a set
+# --------------------------------------------------
+def prune(root: Path = ARTIFACT_DIR, keep: int = KEEP_VERSIONS):
+    """Delete all but the ``keep`` most recent artifact sets, never the current version's."""
+    if not Path(root).exists():
+        return
+    current = colstore.current_version()
+    versions = sorted(
+        (p for p in Path(root).iterdir() if p.is_dir() and not p.name.startswith(".")),
+        key=lambda p: p.stat().st_mtime, reverse=True
+    )
+    for path in versions[keep:]:
+        if path.name != current:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def precompute(version: str, dimensions: list = (), png: bool = False,
+               auto_orders: bool = False, max_workers: int = MAX_WORKERS,
+               root: Path = ARTIFACT_DIR, progress=None) -> Path:
+    """Render every preset and the forecasts for ``version``; returns the set's directory.
+
+    ``progress(done, total)`` is called as presets finish.
+    """
+    store, index, cube = _open(version)
+    presets = preset_matrix(store.frame, list(dimensions))
+    if png and not png_export_available():
+        logger.warning("kaleido is not installed; writing figures without PNGs")
+        png = False
+
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = root / f".{version}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir()
+    t0 = time.perf_counter()
+    manifest = {
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "matrix": list(dimensions),
+        "presets": {},
+        "forecasts": {},
+    }
+    try:
+        with process_pool(min(max_workers, len(presets) + 1)) as pool:
+            city = pool.submit(_render_citywide, version, auto_orders, str(tmp), png)
+            futures = {pool.submit(_render_preset, version, label, filters, str(tmp), png): (label, filters)
+                       for label, filters in presets}
+            for done, fut in enumerate(as_completed(futures), 1):
+                label, filters = futures[fut]
+                try:
+                    manifest["presets"][preset_key(**filters)] = fut.result()
+                except Exception as e:
+                    # The app computes a missing preset live, as it always has
+                    logger.warning("preset %r failed: %s", label, e)
+                if progress is not None:
+                    progress(done, len(presets))
+            try:
+                citywide = city.result()
+            except Exception as e:
+                logger.warning("citywide forecast failed: %s", e)
+                citywide = None
+
+        # batch_forecast runs its own pool, one series per task
+        forecasts, status = batch_forecast(batch_series(cube), max_workers=max_workers,
+                                           auto_orders=auto_orders)
+        mode = _mode(auto_orders)
+        (tmp / "forecasts" / mode).mkdir(parents=True, exist_ok=True)
+        forecasts.to_csv(tmp / "forecasts" / mode / "batch.csv", index=False)
+        status.to_csv(tmp / "forecasts" / mode / "batch_status.csv", index=False)
+        manifest["forecasts"][mode] = {
+            "citywide": citywide,
+            "batch": f"forecasts/{mode}/batch.csv",
+            "batch_status": f"forecasts/{mode}/batch_status.csv",
+        }
+        manifest["seconds"] = round(time.perf_counter() - t0, 1)
+        with open(tmp / MANIFEST, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+
+        final = root / version
+        if final.exists():
+            # A rerun for the same version replaces the whole set
+            old = root / f".{version}.{os.getpid()}.old"
+            os.replace(final, old)
+            os.replace(tmp, final)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(tmp, final)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    prune(root)
+    return final
+
+
+# --------------------------------------------------
+# Reading a set (the dashboard)
+# --------------------------------------------------
+class Artifacts:
+    """A published artifact set for one column-store version."""
+
+    def __init__(self, version: str, root: Path = ARTIFACT_DIR):
+        self.version = version
+        self.path = Path(root) / version
+        with open(self.path / MANIFEST, encoding="utf-8") as f:
+            self.manifest = json.load(f)
+
+    @classmethod
+    def open(cls, version: str, root: Path = ARTIFACT_DIR) -> "Artifacts | None":
+        """The set for ``version``, or ``None`` if none has been published."""
+        try:
+            return cls(version, root)
+        except (OSError, ValueError):
+            return None
+
+    def preset(self, years, neighborhoods, categories, weekdays, hours) -> dict | None:
+        """Manifest entry of the preset with exactly these filters, if rendered."""
+        return self.manifest["presets"].get(preset_key(years, neighborhoods, categories, weekdays, hours))
+
+    def figures(self, preset: dict, names) -> dict | None:
+        """Stored figures of a preset by name; ``None`` unless all of them exist."""
+        import plotly.io as pio
+
+        if not all(name in preset["figures"] for name in names):
+            return None
+        return {name: pio.read_json(self.path / preset["figures"][name]["json"]) for name in names}
+
+    def png_path(self, preset: dict | None, name: str) -> Path | None:
+        """Stored PNG of a preset's figure, if one was rendered."""
+        entry = (preset or {}).get("figures", {}).get(name) or {}
+        return self.path / entry["png"] if entry.get("png") else None
+
+    def citywide_forecast(self, auto_orders: bool) -> tuple | None:
+        """``(forecast frame, manifest entry)`` of the citywide forecast, if stored."""
+        entry = (self.manifest["forecasts"].get(_mode(auto_orders)) or {}).get("citywide")
+        if entry is None:
+            return None
+        return pd.read_csv(self.path / entry["csv"], parse_dates=["month"]), entry
+
+    def batch_forecast(self, auto_orders: bool) -> tuple | None:
+        """``(forecasts, status)`` as ``batch_forecast`` returned them, if stored."""
+        entry = self.manifest["forecasts"].get(_mode(auto_orders))
+        if entry is None:
+            return None
+        forecasts = pd.read_csv(self.path / entry["batch"], parse_dates=["month"])
+        # Models of skipped or failed series are empty, not NaN
+        status = pd.read_csv(self.path / entry["batch_status"], keep_default_na=False)
+        return forecasts, status
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--matrix", nargs="*", default=[], choices=list(MATRIX_DIMENSIONS),
+                        help="dimensions to vary; one preset per combination of their values")
+    parser.add_argument("--png", action="store_true", help="also render every chart to PNG (needs kaleido)")
+    parser.add_argument("--auto-orders", action="store_true",
+                        help="forecast with automatically selected SARIMAX orders")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--version", help="column-store version (default: CURRENT, refreshing first if due)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s: %(message)s")
+
+    version = args.version
+    if version is None:
+        from sfcrime.refresh import refresh
+
+        version = refresh(blocking=True)
+    if version is None or not colstore.exists(version):
+        logger.error("no published column store to precompute from")
+        return 1
+
+    def progress(done: int, total: int):
+        if done == total or done % 50 == 0:
+            logger.info("presets: %d/%d", done, total)
+
+    path = precompute(version, args.matrix, png=args.png, auto_orders=args.auto_orders,
+                      max_workers=args.workers, progress=progress)
+    with open(path / MANIFEST, encoding="utf-8") as f:
+        manifest = json.load(f)
+    logger.info("wrote %d presets and %s forecasts to %s in %.1f s",
+                len(manifest["presets"]), ", ".join(manifest["forecasts"]), path, manifest["seconds"])
+    return 0
+
+
+if __name__ == "__main__":
+    # Run the imported module, so pool tasks pickle as sfcrime.precompute.*
+    # rather than as functions of a __main__ the workers never import
+    from sfcrime import precompute
+
+    sys.exit(precompute.main())
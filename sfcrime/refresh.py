@@ -0,0 +1,191 @@
+"""Dataset refresh off the request path.
+
+``refresh()`` syncs the snapshot with DataSF, publishes the result as a
+new column store version (``sfcrime.colstore``), adds the new rows to the
+daily counts (``sfcrime.daily``) and then points ``CURRENT`` at it. Sessions only ever open the version ``CURRENT`` names,
+so they keep reading the last good dataset while a refresh runs, and a
+failed refresh changes nothing.
+
+Refreshes are serialized across processes by an exclusive lock on
+``DATA_DIR/refresh.lock`` and are due only once the snapshot's
+``synced_at`` is older than the refresh interval, so any number of
+workers (or the CLI below, run from cron) can schedule them without
+duplicate fetches.
+
+    python -m sfcrime.refresh                 # refresh once if due
+    python -m sfcrime.refresh --force         # refresh once now
+    python -m sfcrime.refresh --loop          # keep refreshing every interval
+"""
+import argparse
+import contextlib
+import logging
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from sfcrime import DATA_DIR, colstore, daily, snapshot
+from sfcrime.ingest import IngestError
+
+try:
+    import fcntl
+except ImportError:  # Windows: refreshes are serialized within the process only
+    fcntl = None
+
+REFRESH_INTERVAL = 24 * 3600
+POLL_SECONDS = 60
+# After a failed refresh, wait this long before trying the API again
+RETRY_SECONDS = 15 * 60
+LOCK_FILE = DATA_DIR / "refresh.lock"
+
+logger = logging.getLogger("sfcrime.refresh")
+_process_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _refresh_lock(blocking: bool):
+    """Yield ``True`` while holding the refresh lock, ``False`` if it is taken."""
+    if not _process_lock.acquire(blocking=blocking):
+        yield False
+        return
+    try:
+        if fcntl is None:
+            yield True
+            return
+        LOCK_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(LOCK_FILE, "a") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+    finally:
+        _process_lock.release()
+
+
+def refresh_due(interval: float = REFRESH_INTERVAL) -> bool:
+    """True when nothing is published yet or the last sync is ``interval`` old."""
+    manifest = snapshot.read_manifest()
+    if manifest is None or colstore.current_version() is None:
+        return True
+    synced_at = datetime.fromisoformat(manifest["synced_at"])
+    return (datetime.now(timezone.utc) - synced_at).total_seconds() >= interval
+
+
+def refresh(blocking: bool = False, force: bool = False,
+            interval: float = REFRESH_INTERVAL) -> str | None:
+    """Sync, publish and switch ``CURRENT``; returns the current version.
+
+    Without ``blocking`` the call returns ``None`` straight away when
+    another refresh holds the lock. A blocking caller that waited for
+    someone else's refresh does not repeat it. ``IngestError`` propagates
+    and leaves the current version in place.
+    """
+    with _refresh_lock(blocking) as acquired:
+        if not acquired:
+            return None
+        if not force and not refresh_due(interval):
+            return colstore.current_version()
+        t0 = time.perf_counter()
+        before = snapshot.read_manifest()
+        added = snapshot.sync()
+        manifest = snapshot.read_manifest()
+        if manifest is None or not manifest["rows"]:
+            return colstore.current_version()
+        version = colstore.store_version(manifest)
+        if not colstore.exists(version):
+            colstore.publish(snapshot.read_snapshot(), version)
+        # Incremental from the version the sync started at, if it is published
+        daily.publish_update(version, added, colstore.store_version(before) if before else None,
+                             frame=lambda: colstore.ColumnStore(version).frame)
+        colstore.set_current(version)
+        logger.info("refreshed: %d new rows, version %s, %.1f s",
+                    len(added), version, time.perf_counter() - t0)
+        return version
+
+
+class RefreshScheduler:
+    """Daemon thread that refreshes when due and reports new versions.
+
+    ``on_publish(version)`` is called from the thread whenever ``CURRENT``
+    changes, whichever process published it, so callers can warm their
+    caches before the next request needs them.
+    """
+
+    def __init__(self, interval: float = REFRESH_INTERVAL, poll: float = POLL_SECONDS,
+                 on_publish=None):
+        self.interval = interval
+        self.poll = poll
+        self.on_publish = on_publish
+        self.version = colstore.current_version()
+        self.last_error = None
+        self._retry_at = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self.run, name="sfcrime-refresh", daemon=True)
+
+    def start(self) -> "RefreshScheduler":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self):
+        while True:
+            self.tick()
+            if self._stop.wait(self.poll):
+                return
+
+    def tick(self):
+        if time.monotonic() >= self._retry_at:
+            try:
+                refresh(interval=self.interval)
+                self.last_error = None
+            except IngestError as e:
+                self.last_error = str(e)
+                self._retry_at = time.monotonic() + RETRY_SECONDS
+                logger.warning("refresh failed, keeping version %s: %s", self.version, e)
+            except Exception:
+                self._retry_at = time.monotonic() + RETRY_SECONDS
+                logger.exception("refresh failed")
+
+        version = colstore.current_version()
+        if version is not None and version != self.version:
+            self.version = version
+            if self.on_publish is not None:
+                try:
+                    self.on_publish(version)
+                except Exception:
+                    logger.exception("on_publish failed for version %s", version)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Refresh the dashboard's incident dataset.")
+    parser.add_argument("--force", action="store_true", help="refresh even if the last sync is recent")
+    parser.add_argument("--loop", action="store_true", help="keep running, refreshing when due")
+    parser.add_argument("--interval", type=float, default=REFRESH_INTERVAL, help="seconds between refreshes")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    if args.loop:
+        scheduler = RefreshScheduler(interval=args.interval)
+        try:
+            scheduler.run()
+        except KeyboardInterrupt:
+            pass
+        return 0
+    try:
+        version = refresh(blocking=True, force=args.force, interval=args.interval)
+    except IngestError as e:
+        logger.error("refresh failed: %s", e)
+        return 1
+    print(version)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""Compact dtype schema for the cleaned incident table.
+
+Low-cardinality strings are ``pd.Categorical`` over fixed category lists
+(values outside a list are appended after it rather than dropped), years
+and hours are small integers with ``HOUR_MISSING`` standing in for an
+unknown time of day, and coordinates are float32.
+"""
+import numpy as np
+import pandas as pd
+
+# DataSF's 41 Analysis Neighborhoods
+NEIGHBORHOODS = [
+    "Bayview Hunters Point", "Bernal Heights", "Castro/Upper Market", "Chinatown",
+    "Excelsior", "Financial District/South Beach", "Glen Park", "Golden Gate Park",
+    "Haight Ashbury", "Hayes Valley", "Inner Richmond", "Inner Sunset", "Japantown",
+    "Lakeshore", "Lincoln Park", "Lone Mountain/USF", "Marina", "McLaren Park",
+    "Mission", "Mission Bay", "Nob Hill", "Noe Valley", "North Beach",
+    "Oceanview/Merced/Ingleside", "Outer Mission", "Outer Richmond", "Pacific Heights",
+    "Portola", "Potrero Hill", "Presidio", "Presidio Heights", "Russian Hill",
+    "Seacliff", "South of Market", "Sunset/Parkside", "Tenderloin", "Treasure Island",
+    "Twin Peaks", "Visitacion Valley", "West of Twin Peaks", "Western Addition",
+]
+
+# incident_category values used by the 2018-present SFPD dataset
+CATEGORIES = [
+    "Arson", "Assault", "Burglary", "Case Closure", "Civil Sidewalks",
+    "Courtesy Report", "Disorderly Conduct", "Drug Offense", "Drug Violation",
+    "Embezzlement", "Fire Report", "Forgery And Counterfeiting", "Fraud", "Gambling",
+    "Homicide", "Human Trafficking (A), Commercial Sex Acts",
+    "Human Trafficking (B), Involuntary Servitude",
+    "Human Trafficking, Commercial Sex Acts", "Juvenile Offenses", "Larceny Theft",
+    "Liquor Laws", "Lost Property", "Malicious Mischief", "Miscellaneous Investigation",
+    "Missing Person", "Motor Vehicle Theft", "Motor Vehicle Theft?", "Non-Criminal",
+    "Offences Against The Family And Children", "Other", "Other Miscellaneous",
+    "Other Offenses", "Prostitution", "Rape", "Recovered Vehicle", "Robbery",
+    "Sex Offense", "Stolen Property", "Suicide", "Suspicious", "Suspicious Occ",
+    "Traffic Collision", "Traffic Violation Arrest", "Vandalism", "Vehicle Impounded",
+    "Vehicle Misplaced", "Warrant", "Weapons Carrying Etc", "Weapons Offence",
+    "Weapons Offense",
+]
+
+WEEKDAYS = [
+    "Monday", "Tuesday", "Wednesday", "Thursday",
+    "Friday", "Saturday", "Sunday"
+]
+
+CATEGORY_LISTS = {
+    "neighborhood": NEIGHBORHOODS,
+    "category": CATEGORIES,
+    "weekday": WEEKDAYS,
+}
+
+# Sentinel for incidents without a usable incident_datetime
+HOUR_MISSING = -1
+
+# Non-categorical columns and their storage dtypes
+NUMERIC_DTYPES = {
+    "date": "datetime64[ns]",
+    "incident_datetime": "datetime64[ns]",
+    "latitude": "float32",
+    "longitude": "float32",
+    "year": "int16",
+    "month": "datetime64[ns]",
+    "hour": "int8",
+}
+CODE_DTYPE = "int16"
+
+# Column order of the cleaned table
+COLUMNS = [
+    "date", "incident_datetime", "neighborhood", "category", "weekday",
+    "latitude", "longitude", "year", "month", "hour"
+]
+
+# Bump when stored rows change shape or content (invalidates on-disk snapshots)
+SCHEMA_VERSION = 3
+
+
+def categories_for(col: str, observed=()) -> list:
+    """Fixed category list for ``col`` followed by any unseen ``observed`` values."""
+    fixed = CATEGORY_LISTS[col]
+    known = set(fixed)
+    return fixed + sorted(v for v in set(observed) if v not in known)
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Return ``df`` converted to the compact schema (cheap if already compact)."""
+    out = {}
+    for col in COLUMNS:
+        s = df[col]
+        if col in CATEGORY_LISTS:
+            if not isinstance(s.dtype, pd.CategoricalDtype):
+                s = s.astype("category")
+            cats = categories_for(col, s.cat.categories)
+            if list(s.cat.categories) != cats:
+                s = s.cat.set_categories(cats)
+        elif col == "hour" and s.dtype != NUMERIC_DTYPES["hour"]:
+            s = s.fillna(HOUR_MISSING).astype(NUMERIC_DTYPES["hour"])
+        else:
+            s = s.astype(NUMERIC_DTYPES[col], copy=False)
+        out[col] = s
+    return pd.DataFrame(out, index=df.index, copy=False)
+
+
+def memory_report(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-column resident size, with an object-dtype estimate for comparison."""
+    rows = []
+    for col in df.columns:
+        s = df[col]
+        actual = s.memory_usage(deep=True, index=False)
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            baseline = s.astype(object).memory_usage(deep=True, index=False)
+        elif col in ("year", "hour", "latitude", "longitude"):
+            baseline = len(s) * np.dtype("float64").itemsize
+        else:
+            baseline = actual
+        rows.append({"column": col, "dtype": str(s.dtype), "bytes": actual,
+                     "uncompacted_bytes": baseline})
+    report = pd.DataFrame(rows)
+    total = pd.DataFrame([{
+        "column": "TOTAL", "dtype": "",
+        "bytes": report["bytes"].sum(),
+        "uncompacted_bytes": report["uncompacted_bytes"].sum(),
+    }])
+    return pd.concat([report, total], ignore_index=True)
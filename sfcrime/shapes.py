@@ -0,0 +1,140 @@
+"""Simplified neighborhood geometry for drawing choropleths.
+
+The bundled boundary file carries survey-grade coordinates, far more than
+a city-scale map can show, and Plotly embeds the whole GeoJSON in every
+figure it sends to the browser. Each ring is simplified here with
+Douglas-Peucker at a fixed tolerance in metres, coordinates are quantized
+to a fixed number of decimals, and the result is kept per level of detail
+for the life of the process.
+
+Features are keyed by ``id`` = neighborhood name, so a frame of counts
+joins directly with ``locations=<name column>`` and no ``featureidkey``.
+"""
+import functools
+import json
+import threading
+
+import numpy as np
+
+from sfcrime.geo import BOUNDARIES_GEOJSON, NAME_PROPERTY
+
+# Level of detail -> Douglas-Peucker tolerance in metres (0 = quantize only)
+LOD_TOLERANCES = {"full": 0.0, "high": 2.0, "medium": 8.0, "low": 30.0}
+# The dashboard's city-wide maps are drawn at roughly 60 m per pixel
+DEFAULT_LOD = "low"
+# 5 decimals of a degree is ~1.1 m of latitude in San Francisco
+COORD_DECIMALS = 5
+
+_METRES_PER_DEG_LAT = 111_320.0
+_lock = threading.Lock()
+
+
+def douglas_peucker(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """Mask of the vertices of an open polyline kept at ``tolerance``.
+
+    ``points`` is an ``(n, 2)`` array in a metric projection. The endpoints
+    are always kept. Uses an explicit stack so long rings cannot hit the
+    recursion limit.
+    """
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        lo, hi = stack.pop()
+        if hi - lo < 2:
+            continue
+        a, b = points[lo], points[hi]
+        seg = points[lo + 1:hi] - a
+        ab = b - a
+        length = np.hypot(*ab)
+        if length == 0:
+            dist = np.hypot(seg[:, 0], seg[:, 1])
+        else:
+            dist = np.abs(ab[0] * seg[:, 1] - ab[1] * seg[:, 0]) / length
+        i = int(dist.argmax())
+        if dist[i] > tolerance:
+            mid = lo + 1 + i
+            keep[mid] = True
+            stack.append((lo, mid))
+            stack.append((mid, hi))
+    return keep
+
+
+def simplify_ring(ring: np.ndarray, tolerance: float, decimals: int = COORD_DECIMALS):
+    """Simplify and quantize one closed lon/lat ring.
+
+    Returns a closed list of ``[lon, lat]`` pairs, or ``None`` when the ring
+    collapses to fewer than three distinct vertices at this tolerance.
+    """
+    ring = ring[:-1] if np.array_equal(ring[0], ring[-1]) else ring
+    if tolerance > 0 and len(ring) > 3:
+        # Local equirectangular projection is plenty at neighborhood scale
+        scale = np.array([_METRES_PER_DEG_LAT * np.cos(np.radians(ring[:, 1].mean())),
+                          _METRES_PER_DEG_LAT])
+        xy = ring * scale
+        # Split at the vertex farthest from the start so both halves are
+        # open polylines with fixed endpoints
+        far = int(np.hypot(*(xy - xy[0]).T).argmax())
+        first = douglas_peucker(xy[:far + 1], tolerance)
+        second = douglas_peucker(np.vstack([xy[far:], xy[:1]]), tolerance)[:-1]
+        ring = ring[np.concatenate([first, second[1:]])]
+
+    ring = np.round(ring, decimals)
+    # Quantizing can make neighbours coincide
+    distinct = np.any(ring != np.roll(ring, 1, axis=0), axis=1)
+    ring = ring[distinct]
+    if len(ring) < 3:
+        return None
+    return np.vstack([ring, ring[:1]]).tolist()
+
+
+def simplify_collection(collection: dict, tolerance: float,
+                        decimals: int = COORD_DECIMALS) -> dict:
+    """Simplified FeatureCollection with one MultiPolygon per neighborhood."""
+    polygons_by_name = {}
+    for feature in collection["features"]:
+        geom = feature["geometry"]
+        polygons = [geom["coordinates"]] if geom["type"] == "Polygon" else geom["coordinates"]
+        name = feature["properties"][NAME_PROPERTY]
+        for poly in polygons:
+            rings = [simplify_ring(np.asarray(r, dtype=np.float64)[:, :2], tolerance, decimals)
+                     for r in poly]
+            # A polygon whose outer ring collapses (a sliver island) is dropped
+            # along with its holes; collapsed holes are simply left out
+            if rings[0] is None:
+                continue
+            polygons_by_name.setdefault(name, []).append([r for r in rings if r is not None])
+
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "id": name,
+                "properties": {"analysis_neighborhood": name},
+                "geometry": {"type": "MultiPolygon", "coordinates": polygons},
+            }
+            for name, polygons in polygons_by_name.items()
+        ],
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _simplified(lod: str, path) -> dict:
+    # The raw file is parsed per level and then dropped; only the small
+    # simplified collections stay resident
+    with open(path, encoding="utf-8") as f:
+        return simplify_collection(json.load(f), LOD_TOLERANCES[lod])
+
+
+def neighborhood_geojson(lod: str = DEFAULT_LOD, path=BOUNDARIES_GEOJSON) -> dict:
+    """Simplified neighborhood boundaries at level of detail ``lod``.
+
+    Built on first use and shared by every session in the process; callers
+    must not mutate the returned dict.
+    """
+    if lod not in LOD_TOLERANCES:
+        raise ValueError(f"unknown level of detail {lod!r}; expected one of {list(LOD_TOLERANCES)}")
+    with _lock:
+        return _simplified(lod, path)
@@ -0,0 +1,175 @@
+"""On-disk columnar snapshot of the cleaned incident table.
+
+The snapshot is a directory of uncompressed Arrow IPC files, one per
+incident month, plus ``manifest.json`` recording the newest
+``incident_datetime``, the time of the last sync and which file holds
+each month. Files are memory-mapped when read, so a cold start is a local
+read instead of an API crawl. ``sync`` fetches only incidents newer than
+the snapshot and rewrites just the month partitions they land in.
+
+Partition files are never overwritten. A merge writes each changed month
+to a new file named after the manifest's next ``generation``
+(``2024-05.7.arrow``), and replacing the manifest switches to all of them
+at once. A merge that fails part way leaves the old manifest pointing at
+the old files; the new ones are unreferenced and the next sync deletes
+them.
+"""
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from sfcrime import DATA_DIR, ingest, perf
+from sfcrime.schema import SCHEMA_VERSION, apply_schema
+
+SNAPSHOT_DIR = DATA_DIR / "snapshot"
+MANIFEST = "manifest.json"
+
+ARROW_SCHEMA = pa.schema([
+    ("date", pa.timestamp("ns")),
+    ("incident_datetime", pa.timestamp("ns")),
+    ("neighborhood", pa.dictionary(pa.int16(), pa.string())),
+    ("category", pa.dictionary(pa.int16(), pa.string())),
+    ("weekday", pa.dictionary(pa.int16(), pa.string())),
+    ("latitude", pa.float32()),
+    ("longitude", pa.float32()),
+    ("year", pa.int16()),
+    ("month", pa.timestamp("ns")),
+    ("hour", pa.int8()),
+])
+
+
+# --------------------------------------------------
+# Manifest and partition files
+# --------------------------------------------------
+def read_manifest(root: Path = SNAPSHOT_DIR) -> dict | None:
+    path = Path(root) / MANIFEST
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_atomic(path: Path, write):
+    """Write through a temporary sibling, then rename over ``path``."""
+    tmp = path.with_name(path.name + ".tmp")
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _write_manifest(root: Path, manifest: dict):
+    def write(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+    _write_atomic(root / MANIFEST, write)
+
+
+def _read_partition(path: Path) -> pa.Table:
+    # The returned table references the mapped pages directly
+    return pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+
+
+def _write_partition(path: Path, table: pa.Table):
+    table = table.unify_dictionaries().combine_chunks()
+
+    def write(tmp):
+        with pa.OSFile(str(tmp), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    _write_atomic(path, write)
+
+
+def _to_table(df: pd.DataFrame) -> pa.Table:
+    return pa.Table.from_pandas(apply_schema(df), schema=ARROW_SCHEMA, preserve_index=False)
+
+
+def partition_name(month: pd.Timestamp, generation: int) -> str:
+    return f"{month:%Y-%m}.{generation}.arrow"
+
+
+def _remove_unlisted(root: Path, partitions: dict):
+    """Delete partition files the manifest does not reference."""
+    keep = set(partitions.values())
+    for path in Path(root).glob("*.arrow*"):
+        if path.name not in keep:
+            path.unlink(missing_ok=True)
+
+
+# --------------------------------------------------
+# Public API
+# --------------------------------------------------
+def read_snapshot(root: Path = SNAPSHOT_DIR) -> pd.DataFrame:
+    """Memory-map every partition and return the table as a DataFrame."""
+    partitions = (read_manifest(root) or {}).get("partitions")
+    if not partitions:
+        return pd.DataFrame()
+    paths = [Path(root) / partitions[month] for month in sorted(partitions)]
+    table = pa.concat_tables([_read_partition(p) for p in paths]).unify_dictionaries()
+    with perf.stage("snapshot.to_pandas", rows=table.num_rows):
+        return apply_schema(table.to_pandas())
+
+
+def merge_into_snapshot(df: pd.DataFrame, root: Path = SNAPSHOT_DIR) -> int:
+    """Append cleaned rows to their month partitions; returns rows written.
+
+    Nothing the current manifest references is modified: the changed
+    months are written to new files and the manifest written last makes
+    them, and the new row count, current together.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    manifest = read_manifest(root) or {
+        "schema_version": SCHEMA_VERSION, "max_incident_datetime": None, "rows": 0,
+        "generation": 0, "partitions": {}
+    }
+    partitions = dict(manifest["partitions"])
+    generation = manifest["generation"] + 1
+
+    for month, part in df.groupby("month", sort=True):
+        key = f"{month:%Y-%m}"
+        table = _to_table(part)
+        if key in partitions:
+            table = pa.concat_tables([_read_partition(root / partitions[key]), table])
+        partitions[key] = partition_name(month, generation)
+        _write_partition(root / partitions[key], table)
+
+    if len(df):
+        newest = df["incident_datetime"].max()
+        if pd.notna(newest):
+            previous = manifest["max_incident_datetime"]
+            newest = newest.strftime(ingest.TIMESTAMP_FORMAT)
+            manifest["max_incident_datetime"] = max(filter(None, [previous, newest]))
+    manifest["rows"] += len(df)
+    manifest["generation"] = generation
+    manifest["partitions"] = partitions
+    manifest["synced_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    _write_manifest(root, manifest)
+    # Superseded files; a reader that still maps one keeps its pages
+    _remove_unlisted(root, partitions)
+    return len(df)
+
+
+def sync(root: Path = SNAPSHOT_DIR) -> pd.DataFrame:
+    """Bring the snapshot up to date; returns the rows it added.
+
+    An empty snapshot (or one written under an older schema) triggers a
+    full fetch, otherwise only incidents newer than the recorded
+    ``max_incident_datetime`` are requested.
+    """
+    manifest = read_manifest(root)
+    if manifest is not None and manifest.get("schema_version") != SCHEMA_VERSION:
+        (Path(root) / MANIFEST).unlink()
+        manifest = None
+    # Without a manifest no partition can be trusted (start over); with one,
+    # drop files left behind by a merge that failed before writing it
+    _remove_unlisted(root, manifest["partitions"] if manifest else {})
+    since = manifest["max_incident_datetime"] if manifest else None
+    with perf.stage("api.fetch") as s:
+        df = ingest.fetch_incidents(since=since)
+        s.rows = len(df)
+    with perf.stage("snapshot.write", rows=len(df)):
+        merge_into_snapshot(df, root)
+    return df
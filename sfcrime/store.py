@@ -0,0 +1,83 @@
+"""Growable columnar store for cleaned incidents.
+
+Pages are cleaned into compact typed chunks as they arrive and appended
+here, so the loader never holds more than a handful of raw JSON pages at a
+time. String columns are kept as integer codes against the fixed category
+lists in ``sfcrime.schema``; everything else lives in fixed-width NumPy
+arrays.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from sfcrime.schema import CATEGORY_LISTS, CODE_DTYPE, COLUMNS, NUMERIC_DTYPES, categories_for
+
+CATEGORICAL_COLUMNS = list(CATEGORY_LISTS)
+
+GROWTH_FACTOR = 1.25
+
+
+class IncidentStore:
+    """Append-only columnar buffer that grows geometrically when full."""
+
+    def __init__(self, capacity: int = 0):
+        self._n = 0
+        self._lock = threading.Lock()
+        self._vocab = {
+            col: {cat: code for code, cat in enumerate(categories_for(col))}
+            for col in CATEGORICAL_COLUMNS
+        }
+        self._arrays = {}
+        self._allocate(max(int(capacity), 1))
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _allocate(self, capacity: int):
+        arrays = {col: np.empty(capacity, dtype=dt) for col, dt in NUMERIC_DTYPES.items()}
+        arrays.update({col: np.empty(capacity, dtype=CODE_DTYPE) for col in CATEGORICAL_COLUMNS})
+        for col, old in self._arrays.items():
+            arrays[col][:self._n] = old[:self._n]
+        self._arrays = arrays
+        self._capacity = capacity
+
+    def _codes(self, col: str, values: pd.Categorical) -> np.ndarray:
+        """Translate a chunk-local categorical into store-wide codes.
+
+        Values missing from the fixed list are appended to the vocabulary.
+        """
+        vocab = self._vocab[col]
+        for cat in values.categories:
+            vocab.setdefault(cat, len(vocab))
+        lookup = np.array([vocab[c] for c in values.categories] + [-1], dtype=CODE_DTYPE)
+        # Local code -1 (missing) indexes the trailing -1 entry
+        return lookup[values.codes]
+
+    def append(self, chunk: pd.DataFrame):
+        """Append a chunk produced by ``ingest.clean_incidents``."""
+        m = len(chunk)
+        if m == 0:
+            return
+        with self._lock:
+            if self._n + m > self._capacity:
+                self._allocate(max(self._n + m, int(self._capacity * GROWTH_FACTOR)))
+            end = self._n + m
+            for col in NUMERIC_DTYPES:
+                self._arrays[col][self._n:end] = chunk[col].to_numpy(dtype=NUMERIC_DTYPES[col])
+            for col in CATEGORICAL_COLUMNS:
+                values = pd.Categorical(chunk[col])
+                self._arrays[col][self._n:end] = self._codes(col, values)
+            self._n = end
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return the stored rows as a DataFrame (views over the buffers)."""
+        n = self._n
+        data = {}
+        for col in COLUMNS:
+            arr = self._arrays[col][:n]
+            if col in CATEGORICAL_COLUMNS:
+                data[col] = pd.Categorical.from_codes(arr, categories=list(self._vocab[col]))
+            else:
+                data[col] = arr
+        return pd.DataFrame(data, copy=False)
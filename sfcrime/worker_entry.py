@@ -0,0 +1,21 @@
+"""Entry module of the forkserver that starts every pool worker.
+
+``sfcrime.parallel`` preloads this module into the forkserver, a process
+of its own that the dashboard never runs in. A worker forked from it
+would first re-import the parent's main module, which under Streamlit is
+app.py, and so re-run the whole dashboard. Importing this module stops
+that in the forkserver only: workers skip the parent's main module and
+import just what their tasks need, which must therefore be module-level
+functions from the ``sfcrime`` package.
+"""
+from multiprocessing import spawn
+
+_prepare = spawn.prepare
+
+
+def _prepare_without_main(data: dict):
+    data = {k: v for k, v in data.items() if k not in ("init_main_from_name", "init_main_from_path")}
+    _prepare(data)
+
+
+spawn.prepare = _prepare_without_main
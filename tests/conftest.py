@@ -0,0 +1,16 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import incident_frame
+from sfcrime.schema import HOUR_MISSING
+
+
+@pytest.fixture(scope="session")
+def incidents():
+    """20k synthetic incidents, a few without a neighborhood, category or hour."""
+    df = incident_frame(20_000, seed=1)
+    rng = np.random.default_rng(1)
+    for col in ("neighborhood", "category"):
+        df.loc[rng.random(len(df)) < 0.03, col] = np.nan
+    df.loc[rng.random(len(df)) < 0.05, "hour"] = HOUR_MISSING
+    return df
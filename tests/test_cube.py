@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sfcrime.cube import DIMENSIONS, CountCube
+
+
+@pytest.fixture(scope="module")
+def cube(incidents):
+    return CountCube(incidents)
+
+
+def selected_rows(df, years=None, neighborhoods=None, categories=None, weekdays=None, hours=None):
+    """Rows the cube counts for a selection, filtered with pandas."""
+    mask = df["neighborhood"].notna() & df["category"].notna() & df["weekday"].notna()
+    if years is not None:
+        mask &= df["year"].between(*years)
+    for col, selected in (("neighborhood", neighborhoods), ("category", categories),
+                          ("weekday", weekdays)):
+        if selected is not None:
+            mask &= df[col].isin(selected)
+    if hours is not None:
+        mask &= df["hour"].between(*hours)
+    return df[mask]
+
+
+SELECTIONS = [
+    {},
+    {"years": (2019, 2021)},
+    {"neighborhoods": ["Mission", "Tenderloin", "Bayview Hunters Point"], "hours": (8, 17)},
+    {"categories": ["Larceny Theft", "Assault"], "weekdays": ["Saturday", "Sunday"]},
+    {"years": (2024, 2024), "hours": (0, 0)},
+    {"neighborhoods": []},
+]
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+def test_counts_match_pandas(incidents, cube, selection):
+    view = cube.select(**selection)
+    rows = selected_rows(incidents, **selection)
+    assert view.total() == len(rows)
+    for dim in DIMENSIONS:
+        expected = rows[dim].value_counts().reindex(cube.labels[dim], fill_value=0)
+        assert np.array_equal(view.counts_by(dim).to_numpy(), expected.to_numpy()), dim
+        assert view.n_distinct(dim) == rows[dim].nunique()
+
+    table = view.counts_by_pair("weekday", "hour")
+    expected = (pd.crosstab(rows["weekday"], rows["hour"], dropna=False)
+                .reindex(index=cube.labels["weekday"], columns=cube.labels["hour"], fill_value=0))
+    assert np.array_equal(table.to_numpy(), expected.to_numpy())
+
+    days = rows["date"].dt.normalize()
+    span = (days.max() - days.min()).days + 1 if len(rows) else 0
+    assert view.span_days() == span
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sfcrime.daily import DailyCounts
+
+NEIGHBORHOODS = ["Mission", "Tenderloin", "South of Market"]
+CATEGORIES = ["Larceny Theft", "Assault", "Burglary"]
+
+
+@pytest.fixture(scope="module")
+def counts(incidents):
+    return DailyCounts.from_frame(incidents)
+
+
+def counted(df, neighborhoods=None, categories=None):
+    """Rows the store counts, filtered with pandas."""
+    df = df.dropna(subset=["neighborhood", "category"])
+    if neighborhoods is not None:
+        df = df[df["neighborhood"].isin(neighborhoods)]
+    if categories is not None:
+        df = df[df["category"].isin(categories)]
+    return df
+
+
+def daily_series(df, counts):
+    days = df["date"].dt.normalize()
+    daily = df.groupby(days).size()
+    return daily.reindex(pd.date_range(counts.days[0], counts.days[counts.last_day]), fill_value=0)
+
+
+@pytest.mark.parametrize("neighborhoods, categories", [
+    (None, None), (NEIGHBORHOODS, None), (None, CATEGORIES), (NEIGHBORHOODS, CATEGORIES),
+])
+def test_window_sum(incidents, counts, neighborhoods, categories):
+    rows = counted(incidents, neighborhoods, categories)
+    dates = rows["date"].dt.normalize()
+    first, last = incidents["date"].min(), incidents["date"].max()
+    for start, end in [(first, last), (first + pd.Timedelta(days=40), last - pd.Timedelta(days=40)),
+                       (last - pd.Timedelta(days=6), last), (first, first)]:
+        expected = int(dates.between(start.normalize(), end.normalize()).sum())
+        assert counts.window_sum(start, end, neighborhoods, categories) == expected
+
+
+@pytest.mark.parametrize("window", [7, 28])
+def test_rolling(incidents, counts, window):
+    rows = counted(incidents, NEIGHBORHOODS)
+    expected = daily_series(rows, counts).rolling(window).sum().dropna().astype(np.int64)
+    got = counts.rolling(window, NEIGHBORHOODS)
+    assert got.index.equals(expected.index)
+    assert np.array_equal(got.to_numpy(), expected.to_numpy())
+
+
+def test_update_matches_full_build(incidents, counts):
+    dates = incidents["date"]
+    recent = (dates >= dates.max() - pd.Timedelta(days=30)).to_numpy()
+    appended = DailyCounts.from_frame(incidents[~recent]).update(incidents[recent])
+    assert np.array_equal(appended.prefix, counts.prefix)
+    assert appended.rows == counts.rows and appended.last_day == counts.last_day
+
+    # Late-arriving rows inside the already counted days
+    old = (dates < dates.min() + pd.Timedelta(days=200)).to_numpy()
+    backfilled = DailyCounts.from_frame(incidents[~old]).update(incidents[old])
+    assert np.array_equal(backfilled.prefix, counts.prefix)
+
+
+def test_anomaly_counts(incidents, counts):
+    as_of = incidents["date"].max() - pd.Timedelta(days=10)
+    table = counts.anomalies("neighborhood", 28, as_of=as_of).set_index("neighborhood")
+    rows = counted(incidents)
+    dates = rows["date"].dt.normalize()
+    window = rows[dates.between(as_of.normalize() - pd.Timedelta(days=27), as_of.normalize())]
+    expected = window["neighborhood"].value_counts()
+    expected = expected[expected > 0]
+    assert table["incidents"].reindex(expected.index).astype(np.int64).equals(expected.astype(np.int64))
+
+
+def test_publish_and_open(tmp_path, counts):
+    counts.publish("v1", tmp_path)
+    opened = DailyCounts.open("v1", tmp_path)
+    assert np.array_equal(opened.prefix, counts.prefix)
+    assert opened.labels == counts.labels
+    assert (opened.rows, opened.last_day) == (counts.rows, counts.last_day)
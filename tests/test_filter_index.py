@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from sfcrime.filter_index import FilterIndex
+from sfcrime.schema import HOUR_MISSING
+
+
+def expected_rows(df, years, neighborhoods, categories, weekdays, hours):
+    mask = (df["year"].between(*years)
+            & df["neighborhood"].isin(neighborhoods)
+            & df["category"].isin(categories)
+            & df["weekday"].isin(weekdays)
+            & df["hour"].between(*hours)
+            & (df["hour"] != HOUR_MISSING))
+    return np.flatnonzero(mask.to_numpy())
+
+
+@pytest.fixture(scope="module")
+def index(incidents):
+    return FilterIndex(incidents)
+
+
+def filters(index, seed):
+    """Random sidebar state: some dimensions left whole, others cut down."""
+    rng = np.random.default_rng(seed)
+    years = sorted(index.values("year"))
+    lo, hi = sorted(rng.choice(years, 2))
+    picked = {}
+    for dim in ("neighborhood", "category", "weekday"):
+        values = index.values(dim)
+        keep = rng.random() if seed % 2 else 1.0
+        picked[dim] = [v for v in values if rng.random() < keep]
+    start = int(rng.integers(0, 24))
+    return (lo, hi), picked["neighborhood"], picked["category"], picked["weekday"], \
+        (start, int(rng.integers(start, 24)))
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_select_matches_pandas(incidents, index, seed):
+    args = filters(index, seed)
+    assert np.array_equal(index.select(*args), expected_rows(incidents, *args))
+
+
+def test_everything_selected_drops_missing_values(incidents, index):
+    args = ((min(index.values("year")), max(index.values("year"))), index.values("neighborhood"),
+            index.values("category"), index.values("weekday"), (0, 23))
+    rows = index.select(*args)
+    assert len(rows) < len(incidents)
+    assert np.array_equal(rows, expected_rows(incidents, *args))
+
+
+def test_from_bitmaps_round_trip(incidents, index):
+    copy = FilterIndex.from_bitmaps(index.n_rows, index.bitmaps)
+    for seed in range(4):
+        args = filters(index, seed)
+        assert np.array_equal(copy.select(*args), index.select(*args))
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from sfcrime.geo import NeighborhoodIndex, assign_neighborhoods, load_boundaries
+
+
+@pytest.fixture(scope="module")
+def index():
+    return NeighborhoodIndex(load_boundaries())
+
+
+def brute_force(index, x, y):
+    """Ray-cast every point against every polygon; first hit wins, as in ``assign``."""
+    codes = np.full(len(x), -1, dtype=np.int16)
+    for p, edges in enumerate(index._edges):
+        hit = index._contains(edges, x, y) & (codes < 0)
+        codes[hit] = p
+    return codes
+
+
+def sample_points(index, n, seed):
+    """Uniform points over (and just beyond) the grid, points hugging the
+    polygon edges and points lying exactly on grid lines."""
+    rng = np.random.default_rng(seed)
+    width, height = index.dx * index.grid_size, index.dy * index.grid_size
+    x = index.x0 + rng.uniform(-0.05, 1.05, n) * width
+    y = index.y0 + rng.uniform(-0.05, 1.05, n) * height
+
+    edges = np.vstack(index._edges)
+    pick = edges[rng.integers(0, len(edges), n)]
+    t = rng.random(n)
+    ex = pick[:, 0] + t * (pick[:, 2] - pick[:, 0]) + rng.normal(0, index.dx / 50, n)
+    ey = pick[:, 1] + t * (pick[:, 3] - pick[:, 1]) + rng.normal(0, index.dy / 50, n)
+
+    gx = index.x0 + rng.integers(0, index.grid_size, n) * index.dx
+    gy = index.y0 + rng.uniform(0, 1, n) * height
+    return np.concatenate([x, ex, gx, x]), np.concatenate([y, ey, gy, gy])
+
+
+def test_assign_matches_ray_casting(index):
+    x, y = sample_points(index, 1_500, seed=0)
+    codes = index.assign(y, x)
+    assert (codes >= 0).any() and (codes < 0).any()
+    assert np.array_equal(codes, brute_force(index, x, y))
+
+
+def test_assign_neighborhoods_names(index):
+    x, y = sample_points(index, 200, seed=1)
+    names = assign_neighborhoods(y, x)
+    codes = brute_force(index, x, y)
+    assert names.isna().to_numpy().tolist() == (codes < 0).tolist()
+    known = codes >= 0
+    assert names[known].tolist() == [index.names[c] for c in codes[known]]
@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+
+from sfcrime import ingest, snapshot
+
+
+def normalized(df):
+    """Rows in a stable order with categoricals as plain values."""
+    df = df.astype({col: object for col in ("neighborhood", "category", "weekday")})
+    return df.sort_values(["incident_datetime", "latitude", "longitude"]).reset_index(drop=True)
+
+
+def assert_same_rows(got, expected):
+    pd.testing.assert_frame_equal(normalized(got), normalized(expected[got.columns]),
+                                  check_dtype=False)
+
+
+@pytest.fixture
+def halves(incidents):
+    """An initial load and a later batch that shares its last months."""
+    cut = incidents["incident_datetime"].quantile(0.8)
+    return incidents[incidents["incident_datetime"] <= cut], incidents[incidents["incident_datetime"] > cut]
+
+
+def test_merge_round_trip(tmp_path, incidents, halves):
+    first, second = halves
+    assert snapshot.merge_into_snapshot(first, tmp_path) == len(first)
+    assert_same_rows(snapshot.read_snapshot(tmp_path), first)
+
+    snapshot.merge_into_snapshot(second, tmp_path)
+    assert_same_rows(snapshot.read_snapshot(tmp_path), incidents)
+    manifest = snapshot.read_manifest(tmp_path)
+    assert manifest["rows"] == len(incidents)
+    # Only the files the manifest lists are left
+    assert sorted(p.name for p in tmp_path.glob("*.arrow*")) == sorted(manifest["partitions"].values())
+
+
+def test_failed_merge_keeps_the_old_snapshot(tmp_path, monkeypatch, halves):
+    first, second = halves
+    snapshot.merge_into_snapshot(first, tmp_path)
+    before = snapshot.read_manifest(tmp_path)
+
+    write_partition = snapshot._write_partition
+    written = []
+
+    def fail_after_one(path, table):
+        if written:
+            raise OSError("disk full")
+        written.append(path)
+        write_partition(path, table)
+
+    monkeypatch.setattr(snapshot, "_write_partition", fail_after_one)
+    with pytest.raises(OSError):
+        snapshot.merge_into_snapshot(second, tmp_path)
+    monkeypatch.setattr(snapshot, "_write_partition", write_partition)
+
+    assert snapshot.read_manifest(tmp_path) == before
+    assert_same_rows(snapshot.read_snapshot(tmp_path), first)
+    assert written[0].exists()
+
+    # The retried sync adds the batch once and leaves no orphaned files
+    monkeypatch.setattr(ingest, "fetch_incidents", lambda since=None: second)
+    snapshot.sync(tmp_path)
+    manifest = snapshot.read_manifest(tmp_path)
+    assert sorted(p.name for p in tmp_path.glob("*.arrow*")) == sorted(manifest["partitions"].values())
+    assert_same_rows(snapshot.read_snapshot(tmp_path), pd.concat([first, second]))
+    assert manifest["rows"] == len(first) + len(second)
+
+
+def test_sync_asks_only_for_newer_rows(tmp_path, monkeypatch, halves):
+    first, second = halves
+    requested = []
+
+    def fetch(since=None):
+        requested.append(since)
+        return first if since is None else second
+
+    monkeypatch.setattr(ingest, "fetch_incidents", fetch)
+    snapshot.sync(tmp_path)
+    snapshot.sync(tmp_path)
+    newest = first["incident_datetime"].max().strftime(ingest.TIMESTAMP_FORMAT)
+    assert requested == [None, newest]